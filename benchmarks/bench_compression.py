@@ -0,0 +1,97 @@
+"""
+Bytes saved against CPU spent by CAP_COMPRESS (COMPRESSED frames), for the
+large server -> client frames: ROOM_LIST, JSON GAME_STATE / GAME_OVER and
+admin broadcasts. Compares one deflate stream per connection (what the
+server does) with compressing each frame independently.
+
+Usage: python3 benchmarks/bench_compression.py
+"""
+import sys
+import os
+import json
+import struct
+import time
+import zlib
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+
+PLAYERS = ["Alice", "Bob", "Charlie", "Dominique", "Emilie"]
+
+
+def room_list(count, version):
+    payload = struct.pack('!I', count)
+    for rid in range(1, count + 1):
+        name = f"Table {rid}".encode('utf-8')
+        players = (rid * 7 + version * (rid % 3)) % 6
+        payload += struct.pack('!IB', rid, len(name)) + name + struct.pack('BB', players, 5)
+    return protocol.pack_message(protocol.ROOM_LIST, payload)
+
+
+def json_frame(data):
+    return protocol.pack_message(protocol.DATA, json.dumps(data).encode('utf-8'))
+
+
+def workloads():
+    states = [json_frame({"type": "GAME_STATE", "frag": "BONJOU"[:i % 7],
+                          "scores": {p: "GHOST"[:(i + j) % 4] for j, p in enumerate(PLAYERS)},
+                          "active_player": PLAYERS[i % len(PLAYERS)]}) for i in range(200)]
+    overs = [json_frame({"type": "GAME_OVER", "loser": PLAYERS[i % 5], "message": f"{PLAYERS[i % 5]} est un fantome !",
+                         "scores": {p: "GHOST" if p == PLAYERS[i % 5] else "GH" for p in PLAYERS}}) for i in range(200)]
+    broadcasts = [json_frame({"type": "BROADCAST", "sender": "ADMIN",
+                              "message": f"Redemarrage du serveur dans {10 - i % 10} minutes, terminez vos parties."})
+                  for i in range(200)]
+    return [
+        ("ROOM_LIST (50 rooms)", [room_list(50, i) for i in range(200)]),
+        ("GAME_STATE JSON", states),
+        ("GAME_OVER JSON", overs),
+        ("Admin broadcast", broadcasts),
+    ]
+
+
+def streamed(frames, threshold):
+    compressor = protocol.FrameCompressor(threshold)
+    return [compressor.compress(frame) for frame in frames]
+
+
+def per_frame(frames, threshold):
+    out = []
+    for frame in frames:
+        if len(frame) - protocol.HEADER_SIZE <= threshold:
+            out.append(frame)
+        else:
+            out.append(protocol.pack_message(protocol.COMPRESSED, b'\x01' + zlib.compress(frame[4:], 6, -zlib.MAX_WBITS)))
+    return out
+
+
+def inflate(frames):
+    decompressor = protocol.FrameDecompressor()
+    for frame in frames:
+        if frame[4] == protocol.COMPRESSED:
+            decompressor.decompress(memoryview(frame)[5:])
+
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"{'':<22}{'raw B/frame':>12}{'stream':>10}{'per-frame':>11}{'deflate':>12}{'inflate':>12}")
+    for name, frames in workloads():
+        # Threshold 0 so the smaller frames show what compression would cost them too
+        raw = sum(len(f) for f in frames) / len(frames)
+        stream, deflate_time = measure(streamed, frames, 0)
+        independent, _ = measure(per_frame, frames, 0)
+        _, inflate_time = measure(inflate, stream)
+        print(f"{name:<22}{raw:>12.0f}{sum(len(f) for f in stream) / len(frames):>10.0f}"
+              f"{sum(len(f) for f in independent) / len(frames):>11.0f}"
+              f"{deflate_time / len(frames) * 1e6:>9.1f} us{inflate_time / len(frames) * 1e6:>9.1f} us")
+    print(f"\nThe server only compresses frame bodies above {protocol.COMPRESS_THRESHOLD} bytes.")
+
+
+if __name__ == "__main__":
+    main()
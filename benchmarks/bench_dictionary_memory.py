@@ -0,0 +1,44 @@
+"""
+Memory footprint of the lexicon: the previous set of str objects against
+the word graph used by GameState (in memory, and memory-mapped from
+common/words.bin).
+
+Usage: python3 benchmarks/bench_dictionary_memory.py
+"""
+import sys
+import os
+import gc
+import tracemalloc
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import dictionary
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    word_set, set_size = traced(dictionary.read_words)
+    graph, graph_size = traced(lambda: dictionary.Dictionary(word_set))
+    mapped, mapped_heap = traced(dictionary.load_dictionary)
+
+    print(f"{len(word_set)} words")
+    print(f"{'representation':<34}{'Python heap':>14}")
+    print(f"{'set of str':<34}{set_size / 1e6:>11.2f} MB")
+    print(f"{'word graph (arrays)':<34}{graph_size / 1e6:>11.2f} MB")
+    print(f"{'word graph (mmap words.bin)':<34}{mapped_heap / 1e6:>11.2f} MB"
+          f"  + {os.path.getsize(dictionary.CACHE_PATH) / 1e6:.2f} MB shared file pages")
+    print(f"graph arrays: {graph.nbytes() / 1e6:.2f} MB ({set_size / graph.nbytes():.0f}x smaller than the set)")
+
+
+if __name__ == "__main__":
+    main()
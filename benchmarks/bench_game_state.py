@@ -0,0 +1,61 @@
+"""
+Bytes per move and encode/decode cost of the binary GAME_STATE opcode
+and of GAME_DELTA against the JSON GAME_STATE sent over DATA.
+
+Usage: python3 benchmarks/bench_game_state.py
+"""
+import sys
+import os
+import json
+import timeit
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+
+PLAYERS = ["Alice", "Bob", "Charlie", "Dominique"]
+
+
+def json_move(frag, scores, active):
+    state = {"type": "GAME_STATE", "frag": frag, "scores": scores, "active_player": active}
+    return protocol.pack_message(protocol.DATA, json.dumps(state).encode('utf-8'))
+
+
+def binary_move(frag, ghosts, active):
+    return protocol.pack_message(protocol.GAME_STATE, protocol.pack_game_state(1, frag, ghosts, active))
+
+
+def delta_move(frag, active):
+    # A typical move: one more letter, turn passes to the next player
+    return protocol.pack_message(protocol.GAME_DELTA, protocol.pack_game_delta(2, frag=frag, active=active))
+
+
+def main():
+    repeat = 20000
+    for count in (2, 4):
+        players = PLAYERS[:count]
+        scores = {p: "GH"[:i % 3] for i, p in enumerate(players)}
+        ghosts = [len(scores[p]) for p in players]
+        frag = "BONJ"
+
+        json_frame = json_move(frag, scores, players[1])
+        binary_frame = binary_move(frag, ghosts, 1)
+        delta_frame = delta_move(frag, 1)
+
+        json_encode = timeit.timeit(lambda: json_move(frag, scores, players[1]), number=repeat) / repeat
+        binary_encode = timeit.timeit(lambda: binary_move(frag, ghosts, 1), number=repeat) / repeat
+        json_decode = timeit.timeit(lambda: json.loads(str(memoryview(json_frame)[5:], 'utf-8')), number=repeat) / repeat
+        binary_decode = timeit.timeit(lambda: protocol.unpack_game_state(memoryview(binary_frame)[5:]), number=repeat) / repeat
+        delta_encode = timeit.timeit(lambda: delta_move(frag, 1), number=repeat) / repeat
+        delta_decode = timeit.timeit(lambda: protocol.unpack_game_delta(memoryview(delta_frame)[5:]), number=repeat) / repeat
+
+        print(f"{count} players")
+        print(f"  {'':<8}{'bytes/move':>12}{'encode':>12}{'decode':>12}")
+        print(f"  {'JSON':<8}{len(json_frame):>12}{json_encode * 1e6:>9.2f} us{json_decode * 1e6:>9.2f} us")
+        print(f"  {'binary':<8}{len(binary_frame):>12}{binary_encode * 1e6:>9.2f} us{binary_decode * 1e6:>9.2f} us")
+        print(f"  {'delta':<8}{len(delta_frame):>12}{delta_encode * 1e6:>9.2f} us{delta_decode * 1e6:>9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Memory and threads of a server holding many idle connections: starts
+server/main.py in a subprocess, opens the connections from this process
+(completing the HELLO handshake) and reads the server's RSS and thread count
+from /proc (Linux).
+
+Usage: python3 benchmarks/bench_idle_connections.py [--connections 10000] [--mode async|threads]
+"""
+import sys
+import os
+import argparse
+import resource
+import socket
+import subprocess
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server", "main.py")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def proc_status(pid):
+    # VmRSS in KB and Threads, from /proc/<pid>/status
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.split()[0] if value.split() else ""
+    return int(fields["VmRSS"]), int(fields["Threads"])
+
+
+def wait_listening(port, process, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit("Server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1.0).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    sys.exit("Server did not start")
+
+
+def connect(port):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(protocol.pack_message(protocol.HELLO, bytes([0])))
+    decoder = protocol.FrameDecoder()
+    while not any(opcode == protocol.HELLO for opcode, _ in decoder.frames()):
+        if not decoder.recv_into(sock):
+            raise ConnectionError("closed during the handshake")
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server memory per idle connection")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--mode", choices=["async", "threads"], default="async")
+    args = parser.parse_args()
+
+    # Client and server sockets both live on this machine
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = args.connections + 100
+    if soft < wanted:
+        if hard != resource.RLIM_INFINITY and hard < wanted:
+            sys.exit(f"Open-file limit too low ({hard}): raise it with ulimit -n")
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    port = free_port()
+    process = subprocess.Popen([sys.executable, SERVER, "--headless", "--lazy-dictionary", "--mode", args.mode,
+                                "--port", str(port), "--max-clients", str(args.connections)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    sockets = []
+    try:
+        wait_listening(port, process)
+        time.sleep(0.5) # Let the startup settle
+        rss_before, threads_before = proc_status(process.pid)
+        start = time.perf_counter()
+        for _ in range(args.connections):
+            sockets.append(connect(port))
+        elapsed = time.perf_counter() - start
+        time.sleep(1.0) # A few heartbeat ticks
+        rss_after, threads_after = proc_status(process.pid)
+    finally:
+        for sock in sockets:
+            sock.close()
+        process.terminate()
+        process.wait()
+
+    print(f"{args.mode} mode, {len(sockets)} idle connections (opened in {elapsed:.1f} s)")
+    print(f"  server RSS: {rss_before / 1024:.1f} MB -> {rss_after / 1024:.1f} MB, "
+          f"{(rss_after - rss_before) / len(sockets):.2f} KB per connection")
+    print(f"  server threads: {threads_before} -> {threads_after}")
+
+
+if __name__ == "__main__":
+    main()
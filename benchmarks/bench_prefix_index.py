@@ -0,0 +1,40 @@
+"""
+Compares the word graph used by GameState.play_letter against
+the previous linear scan over the whole word set.
+
+Usage: python3 benchmarks/bench_prefix_index.py
+"""
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.models.game_state import GameState
+
+FRAGMENTS = ["B", "BO", "BON", "BONJ", "BONJOU", "BONJOUR", "XQZ", "ANTICONSTITUTIONNEL"]
+
+
+def time_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    game = GameState()
+    index = game.dictionary
+    words = set(index)
+
+    print(f"{'fragment':<22}{'linear scan':>14}{'prefix index':>14}{'speedup':>10}")
+    for frag in FRAGMENTS:
+        linear = time_call(lambda: any(w.startswith(frag) for w in words), 5)
+        indexed = time_call(lambda: index.has_prefix(frag), 10000)
+        assert any(w.startswith(frag) for w in words) == index.has_prefix(frag)
+        print(f"{frag:<22}{linear * 1e6:>11.1f} us{indexed * 1e6:>11.2f} us{linear / indexed:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
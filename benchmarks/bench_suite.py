@@ -0,0 +1,197 @@
+"""
+Micro-benchmarks of the hot paths: message packing and parsing, framing,
+GameState.play_letter, dictionary loading, ROOM_LIST encoding and room
+broadcast fan-out. Results are written as JSON, to be compared between two
+commits with benchmarks/compare.py.
+
+Usage: python3 benchmarks/bench_suite.py [--output FILE] [--filter TEXT] [--quick]
+Default output: benchmarks/results/<commit>.json
+"""
+import sys
+import os
+import argparse
+import collections
+import contextlib
+import io
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import timeit
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from common.dictionary import load_dictionary, get_dictionary
+from server.models.game_state import GameState
+from server.models.room_manager import Room, RoomManager
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+CHAT = {"type": "CHAT", "sender": "Alice", "message": "Bien joué, encore une ?"}
+
+
+def bench_messages():
+    frames = {
+        "ping": (protocol.PING, b''),
+        "login": (protocol.REQ_LOGIN, "Dominique"),
+        "chat_json": (protocol.DATA, CHAT),
+        "game_state": (protocol.GAME_STATE, protocol.pack_game_state(42, "BONJ", [0, 2], 1)),
+    }
+    for name, (opcode, payload) in frames.items():
+        yield f"pack_message/{name}", lambda opcode=opcode, payload=payload: protocol.pack_message(opcode, payload)
+    for name, (opcode, payload) in frames.items():
+        body = protocol.pack_message(opcode, payload)[4:]
+        yield f"parse_packet/{name}", lambda body=body: protocol.parse_packet(body)
+
+
+def bench_framing():
+    # A read that completes 100 frames; reported per batch
+    chunk = b"".join(protocol.pack_message(protocol.DATA, CHAT) for _ in range(100))
+
+    def decode():
+        decoder = protocol.FrameDecoder()
+        decoder.feed(chunk)
+        for _ in decoder.frames():
+            pass
+
+    yield "framing/decode_100_frames", decode
+
+    split = [chunk[i:i + 1460] for i in range(0, len(chunk), 1460)] # TCP segment sized reads
+
+    def decode_segments():
+        decoder = protocol.FrameDecoder()
+        for segment in split:
+            decoder.feed(segment)
+            for _ in decoder.frames():
+                pass
+
+    yield "framing/decode_100_frames_segmented", decode_segments
+
+
+def bench_play_letter():
+    dictionary = get_dictionary()
+    # Longest word of the lexicon, so every fragment length is a valid prefix
+    word = max(dictionary, key=len)
+    game = GameState()
+    for length in (1, 4, 8, 16):
+        if length > len(word):
+            continue
+        prefix = word[:length]
+
+        def play(prefix=prefix):
+            game.frag = prefix[:-1]
+            game.play_letter(prefix[-1])
+
+        yield f"play_letter/frag_{length}", play
+
+
+def bench_dictionary():
+    sink = io.StringIO()
+
+    def load():
+        with contextlib.redirect_stdout(sink):
+            load_dictionary()
+        sink.seek(0)
+        sink.truncate()
+
+    yield "dictionary/load_cached", load
+
+
+def bench_room_list():
+    for count in (10, 100, 1000):
+        rooms = RoomManager(min_rooms=count, max_rooms=count)
+        yield f"room_list/cached_{count}", rooms.room_list_frame
+
+        def rebuild(rooms=rooms):
+            rooms.version += 1 # As after any join or leave
+            rooms.room_list_frame()
+
+        yield f"room_list/encode_{count}", rebuild
+
+
+class Sink:
+    # In-memory stand-in for a connection: keeps the last frames
+    def __init__(self):
+        self.caps = protocol.CAP_BINARY_STATE | protocol.CAP_DELTA_STATE
+        self.pseudo = "sink"
+        self.frames = collections.deque(maxlen=64)
+
+    def send_raw(self, data, key=None):
+        self.frames.append(data)
+
+
+def bench_broadcast():
+    message = protocol.pack_message(protocol.DATA, CHAT)
+    state = protocol.pack_message(protocol.GAME_DELTA, protocol.pack_game_delta(7, frag="BON", active=1))
+    for count in (2, 16, 256):
+        room = Room(1, "Bench", max_players=count)
+        room.clients = [Sink() for _ in range(count)]
+        yield f"broadcast/message_{count}", lambda room=room: room.broadcast(message)
+        yield f"broadcast/game_state_{count}", lambda room=room: room.broadcast_game_state(lambda fmt: state)
+
+
+BENCHMARKS = [bench_messages, bench_framing, bench_play_letter, bench_dictionary, bench_room_list, bench_broadcast]
+
+
+def measure(fn, repeat):
+    """
+    Calls per run chosen so that one run takes at least 0.2 s (timeit's
+    autorange), then repeat runs. Returns times per call in nanoseconds.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = timer.repeat(repeat=repeat, number=number)
+    per_call = [run / number * 1e9 for run in runs]
+    return {
+        "median_ns": round(statistics.median(per_call), 1),
+        "min_ns": round(min(per_call), 1),
+        "stdev_ns": round(statistics.stdev(per_call), 1) if len(per_call) > 1 else 0.0,
+        "calls": number * repeat,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the micro-benchmark suite and write the results as JSON")
+    parser.add_argument("--output", help="JSON file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="3 runs per benchmark instead of 7")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO) # Room creation and broadcasts log at INFO
+    commit = git_commit()
+    results = {}
+    for group in BENCHMARKS:
+        for name, fn in group():
+            if args.filter not in name:
+                continue
+            results[name] = measure(fn, 3 if args.quick else 7)
+            print(f"{name:<40}{results[name]['min_ns'] / 1000:>12.3f} us (min){results[name]['median_ns'] / 1000:>12.3f} us (median)")
+
+    report = {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares two result files of benchmarks/bench_suite.py. A benchmark whose
+time grew by more than the threshold is a regression; the exit status is 1
+when there is one. Times are the fastest run by default, the least
+disturbed by other activity on the machine (--stat median_ns for medians).
+
+Usage: python3 benchmarks/compare.py BASE.json HEAD.json [--threshold 10] [--stat min_ns]
+"""
+import sys
+import argparse
+import json
+
+
+def compare(base, head, threshold, stat="min_ns"):
+    """
+    Returns [(name, base_ns, head_ns, change, status)] for every benchmark of
+    either run; change is relative (0.1 = 10 % slower), None when missing.
+    """
+    rows = []
+    for name in sorted(set(base) | set(head)):
+        if name not in base:
+            rows.append((name, None, head[name][stat], None, "new"))
+            continue
+        if name not in head:
+            rows.append((name, base[name][stat], None, None, "removed"))
+            continue
+        before, after = base[name][stat], head[name][stat]
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            status = "REGRESSION"
+        elif change < -threshold:
+            status = "faster"
+        else:
+            status = ""
+        rows.append((name, before, after, change, status))
+    return rows
+
+
+def format_us(ns):
+    return f"{ns / 1000:.3f}" if ns is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change reported as a regression or a speedup")
+    parser.add_argument("--stat", choices=["min_ns", "median_ns"], default="min_ns")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    rows = compare(base["results"], head["results"], args.threshold / 100, args.stat)
+    print(f"{base['commit']} -> {head['commit']} ({args.stat[:-3]}, us)")
+    print(f"{'benchmark':<40}{'base':>12}{'head':>12}{'change':>10}")
+    for name, before, after, change, status in rows:
+        change_text = f"{change:+.1%}" if change is not None else ""
+        print(f"{name:<40}{format_us(before):>12}{format_us(after):>12}{change_text:>10}  {status}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:g} %")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,53 @@ import struct
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from common import protocol
+from common import protocol, utils
+from common.dispatch import Dispatcher
+
+CLIENT_CAPS = protocol.CAP_BINARY_STATE | protocol.CAP_DELTA_STATE | protocol.CAP_COMPRESS
+MAX_REDIRECTS = 3 # Consecutive REDIRECTs followed before giving up
+SNAPSHOT_RETRY = 2.0 # Seconds before a gap asks again for a GAME_STATE that never came
+
+logger = utils.setup_logger("NetworkManager")
+DATA_LOG = utils.EventLog(logger, "received_data") # GHOST_LOG_LEVEL=DEBUG
 
 class NetworkManager(threading.Thread):
+    # Server -> client opcode handlers (common/dispatch.py)
+    dispatcher = Dispatcher({
+        protocol.REDIRECT: "handle_redirect",
+        protocol.RESP_LOGIN: "handle_login_response",
+        protocol.RESP_ROOM: "handle_room",
+        protocol.ROOM_LIST: "handle_room_list",
+        protocol.ROOM_UPDATE: "handle_room_update",
+        protocol.DATA: "handle_data",
+        protocol.GAME_STATE: "handle_game_state",
+        protocol.GAME_DELTA: "handle_game_delta",
+        protocol.HELLO: "handle_hello",
+        protocol.NOTIFY: "handle_notify",
+        protocol.PING: "handle_ping",
+        protocol.REQ_P2P_START: "handle_p2p_start",
+        protocol.RESP_P2P_CONNECT: "handle_p2p_connect",
+        protocol.ERROR: "handle_error",
+    })
+
     def __init__(self, host='127.0.0.1', port=5000):
         super().__init__()
         self.host = host
         self.port = port
         self.sock = None
+        self.decoder = protocol.FrameDecoder()
+        self.decompressor = protocol.FrameDecompressor()
         self.running = False
         self.pseudo = None
         self.room_list_cb = None
+        self.caps = 0 # Capabilities accepted by the server (HELLO)
+        self.room_players = [] # Same order as the server's, to decode binary GAME_STATE
+        self.game_state = None # Last binary state {"seq", "frag", "ghosts", "active"}, deltas apply to it
+        self.awaiting_snapshot = False
+        self.snapshot_deadline = 0 # Monotonic time after which REQ_SNAPSHOT is sent again
+        self.redirects = 0
+        self.rooms = {} # Lobby: room id -> {"id", "name", "players", "max"}, kept current by ROOM_UPDATE
+        self.rooms_version = 0
         
         # Callbacks
         self.on_connect = None
@@ -39,6 +75,8 @@ class NetworkManager(threading.Thread):
             self.sock.connect((self.host, self.port))
             self.running = True
             self.start()
+            # Advertise what we support; an older server ignores it and we keep JSON
+            self.send_request(protocol.HELLO, bytes([CLIENT_CAPS]))
             if self.on_connect: self.on_connect()
             return True
         except Exception as e:
@@ -48,16 +86,14 @@ class NetworkManager(threading.Thread):
     def run(self):
         while self.running:
             try:
-                # Read Header
-                header = self._recv_all(protocol.HEADER_SIZE)
-                if not header: break
-                
-                size = protocol.unpack_header(header)
-                body = self._recv_all(size)
-                if not body: break
-                
-                opcode, payload = protocol.parse_packet(body)
-                self.process_packet(opcode, payload)
+                if not self.decoder.recv_into(self.sock):
+                    break # Connection closed
+
+                decoder = self.decoder
+                for opcode, payload in decoder.frames():
+                    self.process_packet(opcode, payload)
+                    if self.decoder is not decoder:
+                        break # Redirected: the rest came from the old server
                 
             except Exception as e:
                 print(f"Network Loop Error: {e}")
@@ -65,17 +101,6 @@ class NetworkManager(threading.Thread):
         
         self.disconnect()
 
-    def _recv_all(self, n):
-        data = b''
-        while len(data) < n:
-            try:
-                chunk = self.sock.recv(n - len(data))
-                if not chunk: return None
-                data += chunk
-            except:
-                return None
-        return data
-
     def send_request(self, opcode, payload=b''):
         if not self.sock: return
         try:
@@ -83,96 +108,210 @@ class NetworkManager(threading.Thread):
             self.sock.sendall(msg)
         except Exception as e:
             print(f"Send Error: {e}")
-            self.disconnect()
+            # The reader thread reads what the server sent before closing
+            # (e.g. a REDIRECT), then sees the closed connection and disconnects
+            if not self.is_alive():
+                self.disconnect()
 
     def process_packet(self, opcode, payload):
-        if opcode == protocol.RESP_LOGIN:
-            status = payload[0]
-            if self.on_login_response: self.on_login_response(status == 0)
-            
-        elif opcode == protocol.RESP_ROOM:
-            # Payload: [NbPlayer(1)] + [Len][Pseudo]...
-            count = payload[0]
-            offset = 1
-            players = []
-            try:
-                for _ in range(count):
-                    plen = payload[offset]
-                    offset += 1
-                    p_str = payload[offset:offset+plen].decode('utf-8')
-                    players.append(p_str)
-                    offset += plen
-                if self.on_room_response: self.on_room_response(players)
-            except:
-                pass
-
-        elif opcode == protocol.ROOM_LIST:
-            # Payload: [NbRooms(4)] + Loop...
-            # ID(4), NameLen(1), Name, P(1), M(1)
-            try:
-                nb_rooms = struct.unpack('!I', payload[:4])[0]
-                offset = 4
-                rooms = []
-                for _ in range(nb_rooms):
-                    rid = struct.unpack('!I', payload[offset:offset+4])[0]
-                    offset += 4
-                    nlen = payload[offset]
-                    offset += 1
-                    rname = payload[offset:offset+nlen].decode('utf-8')
-                    offset += nlen
-                    rplayers = payload[offset]
-                    offset += 1
-                    rmax = payload[offset]
-                    offset += 1
-                    
-                    rooms.append({"id": rid, "name": rname, "players": rplayers, "max": rmax})
-                
-                if self.on_room_list: self.on_room_list(rooms)
-            except Exception as e:
-                print(f"Room List Parse Error: {e}")
+        if opcode == protocol.COMPRESSED:
+            # Inflated in arrival order: the server keeps one deflate stream per connection
+            opcode, payload = self.decompressor.decompress(payload)
+        self.dispatcher.dispatch(self, opcode, payload)
 
-        elif opcode == protocol.DATA:
-            try:
-                data = json.loads(payload.decode('utf-8'))
-                print(f"DEBUG_CLIENT: Received DATA payload: {data}")
-                if self.on_game_data: self.on_game_data(data)
-            except Exception as e:
-                print(f"DEBUG: Data handling error: {e}")
-                pass
-
-        elif opcode == protocol.NOTIFY:
-            # [Type] + [Pseudo]
-            ntype = payload[0]
-            pseudo = payload[1:].decode('utf-8')
-            if self.on_notify: self.on_notify(ntype, pseudo)
-
-        elif opcode == protocol.PING:
-            self.send_request(protocol.PONG)
-
-        elif opcode == protocol.REQ_P2P_START:
-            # Server tells us: Client A wants to chat. Payload: [RequesterPseudo]
-            requester = payload.decode('utf-8')
-            if self.on_p2p_incoming_request:
-                self.on_p2p_incoming_request(requester)
-
-        elif opcode == protocol.RESP_P2P_CONNECT:
-            # Server tells us: Connect to B at IP:Port. Payload: [IPLen][IP][Port]
-            try:
-                iplen = payload[0]
-                ip = payload[1:1+iplen].decode('utf-8')
-                port = int.from_bytes(payload[1+iplen:1+iplen+4], 'big')
+    def handle_redirect(self, payload):
+        host, port = protocol.unpack_redirect(payload)
+        self.follow_redirect(host, port)
+
+    def handle_login_response(self, payload):
+        self.redirects = 0
+        status = payload[0]
+        if self.on_login_response: self.on_login_response(status == 0)
+
+    def handle_room(self, payload):
+        # Payload: [NbPlayer(1)] + [Len][Pseudo]...
+        count = payload[0]
+        offset = 1
+        players = []
+        try:
+            for _ in range(count):
+                plen = payload[offset]
+                offset += 1
+                p_str = str(payload[offset:offset+plen], 'utf-8')
+                players.append(p_str)
+                offset += plen
+            self.room_players = list(players)
+            if self.on_room_response: self.on_room_response(players)
+        except:
+            pass
+
+    def handle_room_list(self, payload):
+        # Payload: [NbRooms(4)] + Loop...
+        # ID(4), NameLen(1), Name, P(1), M(1)
+        try:
+            nb_rooms = struct.unpack('!I', payload[:4])[0]
+            offset = 4
+            rooms = []
+            for _ in range(nb_rooms):
+                rid = struct.unpack('!I', payload[offset:offset+4])[0]
+                offset += 4
+                nlen = payload[offset]
+                offset += 1
+                rname = str(payload[offset:offset+nlen], 'utf-8')
+                offset += nlen
+                rplayers = payload[offset]
+                offset += 1
+                rmax = payload[offset]
+                offset += 1
                 
-                # Initiate connection in background
-                threading.Thread(target=self._connect_p2p_thread, args=(ip, port), daemon=True).start()
-            except Exception as e:
-                print(f"P2P Connect Parse Error: {e}")
+                rooms.append({"id": rid, "name": rname, "players": rplayers, "max": rmax})
+            
+            self.rooms = {r["id"]: r for r in rooms}
+            if self.on_room_list: self.on_room_list(rooms)
+        except Exception as e:
+            print(f"Room List Parse Error: {e}")
 
-        elif opcode == protocol.ERROR:
-            try:
-                msg = payload.decode('utf-8')
-            except:
-                msg = "Unknown Error"
-            if self.on_error: self.on_error(msg)
+    def handle_room_update(self, payload):
+        try:
+            version, changes = protocol.unpack_room_update(payload)
+            if version <= self.rooms_version:
+                return
+            self.rooms_version = version
+            for rid, rname, rplayers, rmax in changes:
+                if rmax == 0:
+                    self.rooms.pop(rid, None) # Closed
+                else:
+                    self.rooms[rid] = {"id": rid, "name": rname, "players": rplayers, "max": rmax}
+            if self.on_room_list: self.on_room_list(sorted(self.rooms.values(), key=lambda r: r["id"]))
+        except Exception as e:
+            print(f"Room Update Parse Error: {e}")
+
+    def handle_data(self, payload):
+        try:
+            data = json.loads(str(payload, 'utf-8'))
+            DATA_LOG(data=data)
+            if self.on_game_data: self.on_game_data(data)
+        except Exception as e:
+            print(f"Data handling error: {e}")
+
+    def handle_game_state(self, payload):
+        try:
+            state = protocol.unpack_game_state(payload)
+            self.game_state = state
+            self.awaiting_snapshot = False
+            if self.on_game_data: self.on_game_data(self.game_state_dict(state))
+        except Exception as e:
+            print(f"Game State Parse Error: {e}")
+
+    def handle_game_delta(self, payload):
+        try:
+            delta = protocol.unpack_game_delta(payload)
+            state = self.game_state
+            if state is None or delta["seq"] != state["seq"] + 1:
+                # Missed an update (or stale delta): ask for a full GAME_STATE once
+                if (state is None or delta["seq"] > state["seq"]) and \
+                        (not self.awaiting_snapshot or time.monotonic() > self.snapshot_deadline):
+                    # Once, unless the reply was lost (dropped by a full server queue)
+                    self.awaiting_snapshot = True
+                    self.snapshot_deadline = time.monotonic() + SNAPSHOT_RETRY
+                    self.send_request(protocol.REQ_SNAPSHOT)
+                return
+            state["seq"] = delta["seq"]
+            state["event"] = delta["event"]
+            state["event_player"] = delta["event_player"]
+            if "frag" in delta: state["frag"] = delta["frag"]
+            if "active" in delta: state["active"] = delta["active"]
+            for index, count in delta.get("ghosts", {}).items():
+                if index < len(state["ghosts"]): state["ghosts"][index] = count
+            if self.on_game_data: self.on_game_data(self.game_state_dict(state))
+        except Exception as e:
+            print(f"Game Delta Parse Error: {e}")
+
+    def handle_hello(self, payload):
+        self.caps = payload[0] if payload else 0
+
+    def handle_notify(self, payload):
+        # [Type] + [Pseudo]
+        ntype = payload[0]
+        pseudo = str(payload[1:], 'utf-8')
+        if ntype == 0:
+            if pseudo not in self.room_players: self.room_players.append(pseudo)
+        elif pseudo in self.room_players:
+            self.room_players.remove(pseudo)
+        if self.on_notify: self.on_notify(ntype, pseudo)
+
+    def handle_ping(self, payload):
+        self.send_request(protocol.PONG)
+
+    def handle_p2p_start(self, payload):
+        # Server tells us: Client A wants to chat. Payload: [RequesterPseudo]
+        requester = str(payload, 'utf-8')
+        if self.on_p2p_incoming_request:
+            self.on_p2p_incoming_request(requester)
+
+    def handle_p2p_connect(self, payload):
+        # Server tells us: Connect to B at IP:Port. Payload: [IPLen][IP][Port]
+        try:
+            iplen = payload[0]
+            ip = str(payload[1:1+iplen], 'utf-8')
+            port = int.from_bytes(payload[1+iplen:1+iplen+4], 'big')
+            
+            # Initiate connection in background
+            threading.Thread(target=self._connect_p2p_thread, args=(ip, port), daemon=True).start()
+        except Exception as e:
+            print(f"P2P Connect Parse Error: {e}")
+
+    def handle_error(self, payload):
+        try:
+            msg = str(payload, 'utf-8')
+        except:
+            msg = "Unknown Error"
+        if self.on_error: self.on_error(msg)
+
+    def game_state_dict(self, state):
+        # Binary game state -> same dict as the JSON GAME_STATE
+        players = self.room_players
+
+        def name(index):
+            return players[index] if index < len(players) else None
+
+        data = {
+            "type": "GAME_STATE",
+            "frag": state["frag"],
+            "scores": {name(i): "GHOST"[:g] for i, g in enumerate(state["ghosts"]) if name(i)},
+            "active_player": name(state["active"]) or "En attente..."
+        }
+        if state["event"] in protocol.EVENT_TEXT:
+            data["event"] = protocol.EVENT_TEXT[state["event"]].format(player=name(state["event_player"]))
+        return data
+
+    def follow_redirect(self, host, port):
+        # The server is full: reconnect to the node it named, and log in again
+        self.redirects += 1
+        if self.redirects > MAX_REDIRECTS:
+            if self.on_error: self.on_error("Serveur plein")
+            self.running = False
+            return
+        print(f"Redirected to {host}:{port}")
+        try:
+            self.sock.close()
+        except:
+            pass
+        self.host, self.port = host, port
+        self.decoder = protocol.FrameDecoder()
+        self.decompressor = protocol.FrameDecompressor()
+        self.caps = 0
+        self.rooms_version = 0 # Versions are per server
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.connect((host, port))
+        except Exception as e:
+            if self.on_error: self.on_error(f"Connection failed: {e}")
+            self.running = False
+            return
+        self.send_request(protocol.HELLO, bytes([CLIENT_CAPS]))
+        if self.pseudo:
+            self.send_request(protocol.REQ_LOGIN, self.pseudo)
 
     def login(self, pseudo):
         self.pseudo = pseudo
@@ -181,10 +320,24 @@ class NetworkManager(threading.Thread):
     def fetch_room_list(self):
         self.send_request(protocol.REQ_LIST_ROOMS)
 
+    def subscribe_rooms(self, on=True):
+        # ROOM_LIST now, then ROOM_UPDATE on changes until we join a room
+        self.send_request(protocol.REQ_SUBSCRIBE_ROOMS, bytes([1 if on else 0]))
+
     def join_room(self, room_id):
         self.send_request(protocol.REQ_JOIN, int(room_id).to_bytes(4, 'big'))
+
+    def find_match(self):
+        # Queued by the server until a seat is found, then RESP_ROOM arrives
+        self.send_request(protocol.REQ_MATCH)
+
+    def quick_join(self):
+        # The server picks a free seat (or opens a room)
+        self.join_room(protocol.ANY_ROOM)
         
     def leave_room(self):
+        self.room_players = []
+        self.game_state = None
         self.send_request(protocol.REQ_LEAVE)
 
     def send_game_data(self, data_dict):
@@ -0,0 +1,420 @@
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from common.dictionary import get_dictionary
+
+# Same capabilities as the GUI client (client/controllers/network_manager.py)
+BOT_CAPS = protocol.CAP_BINARY_STATE | protocol.CAP_DELTA_STATE | protocol.CAP_COMPRESS
+SNAPSHOT_RETRY = 2.0 # As the GUI client: seconds before a gap asks again for a lost GAME_STATE
+
+class ServerError(Exception):
+    pass
+
+class Stats:
+    """
+    Shared by every bot of the run: operation latencies and errors.
+    """
+    def __init__(self):
+        self.latencies = collections.defaultdict(list) # operation -> [seconds]
+        self.errors = collections.Counter() # kind -> count
+        self.sessions = 0
+        self.completed = 0
+        self.frames_out = 0
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.snapshots = 0 # REQ_SNAPSHOT after a missed GAME_DELTA
+
+    def record(self, operation, seconds):
+        self.latencies[operation].append(seconds)
+
+    def error(self, kind):
+        self.errors[kind] += 1
+
+    @staticmethod
+    def percentile(samples, fraction):
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    def report(self, elapsed):
+        operations = {}
+        for operation, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            operations[operation] = {
+                "count": len(samples),
+                "per_second": round(len(samples) / elapsed, 1),
+                "p50_ms": round(self.percentile(samples, 0.50) * 1000, 2),
+                "p95_ms": round(self.percentile(samples, 0.95) * 1000, 2),
+                "p99_ms": round(self.percentile(samples, 0.99) * 1000, 2),
+                "max_ms": round(samples[-1] * 1000, 2),
+            }
+        requests = sum(len(samples) for samples in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "sessions": self.sessions,
+            "completed": self.completed,
+            "session_error_rate": round(1 - self.completed / self.sessions, 4) if self.sessions else 0.0,
+            "requests": requests,
+            "requests_per_second": round(requests / elapsed, 1),
+            "error_rate": round(errors / (requests + errors), 4) if requests + errors else 0.0,
+            "frames_out": self.frames_out,
+            "frames_in": self.frames_in,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "snapshots": self.snapshots,
+            "operations": operations,
+            "errors": dict(self.errors),
+        }
+
+def print_report(report):
+    print(f"\n{report['sessions']} sessions in {report['elapsed_s']} s, "
+          f"{report['completed']} completed ({report['session_error_rate']:.1%} failed)")
+    print(f"{report['requests']} requests ({report['requests_per_second']}/s), "
+          f"error rate {report['error_rate']:.2%}")
+    print(f"Frames: {report['frames_out']} out, {report['frames_in']} in; "
+          f"bytes: {report['bytes_out']} out, {report['bytes_in']} in; "
+          f"{report['snapshots']} snapshots requested")
+    print(f"\n{'operation':<10} {'count':>8} {'/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for operation, row in report["operations"].items():
+        print(f"{operation:<10} {row['count']:>8} {row['per_second']:>8} {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8}")
+    if report["errors"]:
+        print("\nErrors:")
+        for kind, count in sorted(report["errors"].items(), key=lambda item: -item[1]):
+            print(f"  {count:>6}  {kind}")
+
+class Bot:
+    """
+    One headless player: login, room list, join, play letters (and chat)
+    until the game ends or it has played its moves, leave; --rounds times
+    on the same connection. Frames are decoded with the protocol module,
+    like the GUI client, but no reply is awaited without a timeout.
+    """
+    def __init__(self, index, args, stats, dictionary):
+        self.pseudo = f"{args.prefix}{index}"
+        self.args = args
+        self.stats = stats
+        self.dictionary = dictionary
+        self.reader = None
+        self.writer = None
+        self.decoder = protocol.FrameDecoder()
+        self.decompressor = protocol.FrameDecompressor()
+        self.pending = None # (expected opcodes, future) of the request in flight
+        self.chat_pending = None # (message, future)
+        self.updated = asyncio.Event() # Game state, players or game over changed
+        self.players = []
+        self.state = None # Last binary state, deltas apply to it
+        self.awaiting_snapshot = False # REQ_SNAPSHOT sent, deltas ignored until a GAME_STATE
+        self.snapshot_deadline = 0
+        self.frag = ""
+        self.active = None # Pseudo of the player whose turn it is
+        self.game_over = False
+        self.closed = False
+        self.step = "connect" # For error reports
+
+    async def run(self):
+        self.stats.sessions += 1
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.args.host, self.args.port), self.args.timeout)
+            reader_task = asyncio.create_task(self._read_loop())
+            self.send(protocol.HELLO, bytes([BOT_CAPS]))
+            self.step = "login"
+            await self.request("login", protocol.REQ_LOGIN, self.pseudo, (protocol.RESP_LOGIN,))
+            for _ in range(self.args.rounds):
+                await self.play_round()
+                self.step = "leave"
+                self.send(protocol.REQ_LEAVE)
+            self.stats.completed += 1
+            reader_task.cancel()
+        except asyncio.TimeoutError:
+            self.stats.error(f"timeout ({self.step})")
+        except ServerError as e:
+            self.stats.error(f"server error ({self.step}): {e}")
+        except (ConnectionError, OSError) as e:
+            self.stats.error(f"connection ({self.step}): {type(e).__name__}")
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+    async def play_round(self):
+        self.step = "list"
+        payload = await self.request("list", protocol.REQ_LIST_ROOMS, b'', (protocol.ROOM_LIST,))
+        room_id = self.pick_room(protocol.unpack_room_list(payload))
+        self.game_over = False
+        self.state = None
+        self.awaiting_snapshot = False
+        self.active = None
+        self.frag = ""
+        self.step = "join"
+        try:
+            payload = await self.request("join", protocol.REQ_JOIN, room_id.to_bytes(4, 'big'), (protocol.RESP_ROOM,))
+        except ServerError as e:
+            # Another bot took the last seat first: counted, then the server picks a room
+            self.stats.error(f"join refused: {e}")
+            payload = await self.request("join", protocol.REQ_JOIN, protocol.ANY_ROOM.to_bytes(4, 'big'), (protocol.RESP_ROOM,))
+        self.players = self.parse_players(payload)
+
+        moves = 0
+        deadline = time.monotonic() + self.args.game_timeout
+        self.step = "play"
+        while moves < self.args.moves and not self.game_over:
+            if self.closed:
+                raise ConnectionResetError()
+            if self.active != self.pseudo:
+                # Opponent's turn, or still waiting for one
+                self.updated.clear()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.error("no game progress" if self.active else "no opponent")
+                    return
+                try:
+                    await asyncio.wait_for(self.updated.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if self.args.think:
+                await asyncio.sleep(random.uniform(0, 2 * self.args.think))
+            await self.play_letter()
+            moves += 1
+            if random.random() < self.args.chat:
+                self.step = "chat"
+                await self.chat(moves)
+                self.step = "play"
+
+    def pick_room(self, rooms):
+        # A room someone is waiting in, else any room with a free seat, else the server picks
+        open_rooms = [room for room in rooms if room[2] < room[3]]
+        waiting = [room for room in open_rooms if room[2] > 0]
+        if waiting:
+            return random.choice(waiting)[0]
+        if open_rooms:
+            return random.choice(open_rooms)[0]
+        return protocol.ANY_ROOM
+
+    def choose_letter(self):
+        """
+        A letter that keeps the fragment the start of a word without
+        completing one (the losing moves), when there is such a letter.
+        """
+        letters = self.dictionary.children(self.frag)
+        if not letters:
+            return random.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        safe = [letter for letter in letters
+                if len(self.frag) < 3 or not self.dictionary.contains(self.frag + letter)]
+        return random.choice(safe or letters)
+
+    async def play_letter(self):
+        seq = self.state["seq"] if self.state else -1
+        self.updated.clear()
+        start = time.perf_counter()
+        self.send(protocol.DATA, {"type": "PLAY_LETTER", "letter": self.choose_letter()})
+        # Answered by the next game state (or GAME_OVER) sent to the room
+        deadline = time.monotonic() + self.args.timeout
+        while not self.game_over and (self.state["seq"] if self.state else -1) == seq:
+            self.updated.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.closed:
+                raise asyncio.TimeoutError()
+            await asyncio.wait_for(self.updated.wait(), remaining)
+        self.stats.record("play", time.perf_counter() - start)
+
+    async def chat(self, n):
+        message = f"gl hf #{n}"
+        future = asyncio.get_running_loop().create_future()
+        self.chat_pending = (message, future)
+        start = time.perf_counter()
+        self.send(protocol.DATA, {"type": "CHAT", "sender": self.pseudo, "message": message})
+        await asyncio.wait_for(future, self.args.timeout)
+        self.stats.record("chat", time.perf_counter() - start)
+
+    async def request(self, operation, opcode, payload, expect):
+        future = asyncio.get_running_loop().create_future()
+        self.pending = (expect, future)
+        start = time.perf_counter()
+        self.send(opcode, payload)
+        try:
+            result = await asyncio.wait_for(future, self.args.timeout)
+        finally:
+            self.pending = None
+        self.stats.record(operation, time.perf_counter() - start)
+        return result
+
+    def send(self, opcode, payload=b''):
+        msg = protocol.pack_message(opcode, payload)
+        self.stats.frames_out += 1
+        self.stats.bytes_out += len(msg)
+        self.writer.write(msg)
+
+    def resolve(self, opcode, payload):
+        if self.pending and opcode in self.pending[0] and not self.pending[1].done():
+            self.pending[1].set_result(payload)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                self.stats.bytes_in += len(data)
+                self.decoder.feed(data)
+                for opcode, payload in self.decoder.frames():
+                    self.stats.frames_in += 1
+                    self.on_frame(opcode, bytes(payload))
+        except (ConnectionError, OSError, ValueError):
+            pass
+        self.closed = True
+        self.updated.set()
+        for waiter in (self.pending, self.chat_pending):
+            if waiter and not waiter[1].done():
+                waiter[1].set_exception(ConnectionResetError())
+
+    def on_frame(self, opcode, payload):
+        if opcode == protocol.COMPRESSED:
+            opcode, payload = self.decompressor.decompress(payload)
+            payload = bytes(payload)
+
+        if opcode == protocol.PING:
+            self.send(protocol.PONG)
+        elif opcode == protocol.RESP_LOGIN:
+            if payload[0] != 0:
+                self.fail("pseudo refusé")
+            self.resolve(opcode, payload)
+        elif opcode in (protocol.ROOM_LIST, protocol.RESP_ROOM):
+            self.resolve(opcode, payload)
+        elif opcode == protocol.NOTIFY:
+            pseudo = str(payload[1:], 'utf-8')
+            if payload[0] == 0:
+                if pseudo not in self.players:
+                    self.players.append(pseudo)
+            elif pseudo in self.players:
+                self.players.remove(pseudo)
+            self.updated.set()
+        elif opcode == protocol.GAME_STATE:
+            self.awaiting_snapshot = False
+            self.set_state(protocol.unpack_game_state(payload))
+        elif opcode == protocol.GAME_DELTA:
+            self.apply_delta(protocol.unpack_game_delta(payload))
+        elif opcode == protocol.DATA:
+            self.on_data(json.loads(str(payload, 'utf-8')))
+        elif opcode == protocol.REDIRECT:
+            self.fail("serveur plein (REDIRECT)")
+        elif opcode == protocol.ERROR:
+            self.fail(str(payload, 'utf-8', errors='replace'))
+
+    def fail(self, message):
+        # An ERROR ends the request in flight; outside of one it is only counted
+        if self.pending and not self.pending[1].done():
+            self.pending[1].set_exception(ServerError(message))
+        else:
+            self.stats.error(f"server error: {message}")
+
+    def set_state(self, state):
+        self.state = state
+        self.frag = state["frag"]
+        index = state["active"]
+        self.active = self.players[index] if index < len(self.players) else None
+        self.updated.set()
+
+    def apply_delta(self, delta):
+        state = self.state
+        if state is None or delta["seq"] != state["seq"] + 1:
+            # Once per gap, like the GUI client, not once per delta behind it
+            if (state is None or delta["seq"] > state["seq"]) and \
+                    (not self.awaiting_snapshot or time.monotonic() > self.snapshot_deadline):
+                self.awaiting_snapshot = True
+                self.snapshot_deadline = time.monotonic() + SNAPSHOT_RETRY
+                self.stats.snapshots += 1
+                self.send(protocol.REQ_SNAPSHOT)
+            return
+        state = dict(state, seq=delta["seq"])
+        if "frag" in delta:
+            state["frag"] = delta["frag"]
+        if "active" in delta:
+            state["active"] = delta["active"]
+        self.set_state(state)
+
+    def on_data(self, data):
+        dtype = data.get("type")
+        if dtype == "GAME_STATE":
+            # JSON state: the server did not accept the binary formats
+            seq = self.state["seq"] + 1 if self.state else 0
+            self.state = {"seq": seq}
+            self.frag = data.get("frag", "")
+            active = data.get("active_player")
+            self.active = active if active in self.players else None
+            self.updated.set()
+        elif dtype == "GAME_OVER":
+            self.game_over = True
+            self.updated.set()
+        elif dtype == "CHAT" and data.get("sender") == self.pseudo and self.chat_pending:
+            message, future = self.chat_pending
+            if data.get("message") == message and not future.done():
+                future.set_result(None)
+
+    @staticmethod
+    def parse_players(payload):
+        # RESP_ROOM: [NbPlayer(1)] + N * [Len(1)][Pseudo]
+        players = []
+        offset = 1
+        for _ in range(payload[0]):
+            length = payload[offset]
+            players.append(str(payload[offset + 1:offset + 1 + length], 'utf-8'))
+            offset += 1 + length
+        return players
+
+
+async def run_load(args):
+    stats = Stats()
+    dictionary = get_dictionary()
+    bots = [Bot(i, args, stats, dictionary) for i in range(args.bots)]
+    start = time.monotonic()
+    tasks = []
+    for i, bot in enumerate(bots):
+        # Bots are started evenly over the ramp-up period
+        delay = start + args.ramp * i / max(len(bots), 1) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(bot.run()))
+    await asyncio.gather(*tasks)
+    return stats.report(time.monotonic() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless Ghost bots: login, room list, join, play, chat and leave against a server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--bots", type=int, default=100, help="concurrent bot sessions")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which the bots connect")
+    parser.add_argument("--rounds", type=int, default=1, help="games (join, play, leave) per bot")
+    parser.add_argument("--moves", type=int, default=20, help="letters each bot plays per game at most")
+    parser.add_argument("--think", type=float, default=0.05, help="mean delay (s) before playing a letter")
+    parser.add_argument("--chat", type=float, default=0.1, help="chance of a chat message after each move")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a reply")
+    parser.add_argument("--game-timeout", type=float, default=30.0,
+                        help="seconds a bot waits for an opponent or its turn before leaving")
+    parser.add_argument("--prefix", default="bot", help="pseudo prefix (pseudos must be unique on the server)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -84,7 +84,7 @@ class GameClientApp:
             success = data
             if success:
                 self.show_lobby()
-                self.network.fetch_room_list()
+                self.network.subscribe_rooms()
             else:
                 self.show_error("Pseudo refusé")
         elif evt_type == "ROOM_LIST":
@@ -172,9 +172,10 @@ class GameClientApp:
     def show_lobby(self):
         self.room_list_col = ft.Column(scroll=ft.ScrollMode.AUTO, expand=True)
         refresh_btn = ft.IconButton(ft.Icons.REFRESH, on_click=lambda e: self.network.fetch_room_list())
+        quick_btn = ft.ElevatedButton("Partie rapide", on_click=lambda e: self.network.find_match())
         
         self.main_container.controls = [
-            ft.Row([ft.Text("Salon", size=25), refresh_btn], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+            ft.Row([ft.Text("Salon", size=25), ft.Row([quick_btn, refresh_btn])], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
             ft.Divider(),
             self.room_list_col
         ]
@@ -258,7 +259,7 @@ class GameClientApp:
     def do_leave_room(self, e):
         self.network.leave_room()
         self.show_lobby()
-        self.network.fetch_room_list()
+        self.network.subscribe_rooms()
 
     def do_play_letter(self, e):
         let = self.input_letter.value
@@ -0,0 +1,294 @@
+import array
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+import unicodedata
+
+WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words.txt")
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words.bin")
+
+# Used when words.txt cannot be read
+FALLBACK_WORDS = {
+    "BONJOUR", "MONDE", "PYTHON", "RESEAU", "SOCKET", "GHOST", "TEST",
+    "MANGER", "TABLE", "CHAISE", "MAISON", "APPLE", "BANANA", "ORANGE"
+}
+
+# Binary cache layout (native byte order, the file is a local build artifact):
+# [Header (64)] [FirstEdge ((nodes + 1) * 4)] [Labels (edges * 4)] [Targets (edges * 4)] [Final (nodes)]
+# Header: magic, version, sha256(words.txt), word count, node count, edge count, padding.
+CACHE_MAGIC = b"GHDC"
+CACHE_VERSION = 2
+_HEADER = struct.Struct("=4sH32sIII")
+_HEADER_SIZE = 64
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+class Dictionary:
+    """
+    Immutable lexicon stored as a minimized acyclic word graph (DAWG).
+
+    The graph lives in flat typed arrays: the outgoing edges of node n are
+    labels[first_edge[n]:first_edge[n + 1]] (sorted code points) with their
+    destination nodes in targets; final[n] marks the end of a word. Node 0 is
+    the root. A lookup walks one edge per character, so its cost depends on
+    the fragment length only.
+    """
+
+    def __init__(self, words):
+        self._count, first_edge, labels, targets, final = build_graph(sorted(set(words)))
+        self._first_edge = first_edge
+        self._labels = labels
+        self._targets = targets
+        self._final = final
+
+    @classmethod
+    def from_arrays(cls, count, first_edge, labels, targets, final):
+        # Wraps arrays produced by build_graph (or memoryviews over a cache)
+        self = cls.__new__(cls)
+        self._count = count
+        self._first_edge = first_edge
+        self._labels = labels
+        self._targets = targets
+        self._final = final
+        return self
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        return self.contains(word)
+
+    def __iter__(self):
+        # Words in sorted order (depth-first walk of the graph)
+        stack = [(0, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if self._final[node]:
+                yield prefix
+            for i in range(self._first_edge[node + 1] - 1, self._first_edge[node] - 1, -1):
+                stack.append((self._targets[i], prefix + chr(self._labels[i])))
+
+    def _walk(self, frag):
+        node = 0
+        for ch in frag:
+            lo = self._first_edge[node]
+            hi = self._first_edge[node + 1]
+            c = ord(ch)
+            i = bisect.bisect_left(self._labels, c, lo, hi)
+            if i == hi or self._labels[i] != c:
+                return -1
+            node = self._targets[i]
+        return node
+
+    def contains(self, word):
+        node = self._walk(word)
+        return node >= 0 and bool(self._final[node])
+
+    def has_prefix(self, frag):
+        # Every node of the graph leads to at least one word
+        return self._walk(frag) >= 0
+
+    def children(self, frag):
+        """
+        Letters that can follow frag while still spelling the start of a word.
+        """
+        node = self._walk(frag)
+        if node < 0:
+            return []
+        return [chr(self._labels[i]) for i in range(self._first_edge[node], self._first_edge[node + 1])]
+
+    def nbytes(self):
+        # Size of the graph arrays (the whole lexicon)
+        return sum(memoryview(a).nbytes for a in (self._first_edge, self._labels, self._targets, self._final))
+
+
+class _Node:
+    __slots__ = ("edges", "final", "id")
+
+    def __init__(self):
+        self.edges = {}
+        self.final = False
+        self.id = -1
+
+
+def build_graph(sorted_words):
+    """
+    Builds the minimized DAWG of sorted_words (incremental construction,
+    Daciuk et al.) and flattens it into arrays.
+    Returns (word_count, first_edge, labels, targets, final).
+    """
+    root = _Node()
+    register = {}
+    unchecked = [] # (parent, letter, child) along the path of the previous word
+    previous = ""
+
+    def minimize(down_to):
+        # Replace each unchecked child by an equivalent registered node, if any
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            key = (child.final,) + tuple((l, c.id) for l, c in child.edges.items())
+            existing = register.get(key)
+            if existing is not None:
+                parent.edges[letter] = existing
+            else:
+                child.id = len(register) + 1
+                register[key] = child
+
+    for word in sorted_words:
+        common = 0
+        limit = min(len(word), len(previous))
+        while common < limit and word[common] == previous[common]:
+            common += 1
+        minimize(common)
+
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = _Node()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+
+    # Flatten breadth-first, root first
+    root.id = 0
+    order = [root]
+    index = {id(root): 0}
+    for node in order:
+        for child in node.edges.values():
+            if id(child) not in index:
+                index[id(child)] = len(order)
+                order.append(child)
+
+    first_edge = array.array("I", [0])
+    labels = array.array("I")
+    targets = array.array("I")
+    final = array.array("B")
+    for node in order:
+        for letter, child in node.edges.items():
+            labels.append(ord(letter))
+            targets.append(index[id(child)])
+        first_edge.append(len(labels))
+        final.append(1 if node.final else 0)
+    return len(sorted_words), first_edge, labels, targets, final
+
+
+def remove_accents(input_str):
+    nfkd_form = unicodedata.normalize('NFKD', input_str)
+    return "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+
+
+def read_words(path=WORDS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        # Read all lines, strip whitespace, remove accents and convert to uppercase
+        words = set()
+        for line in f:
+            if line.strip():
+                words.add(remove_accents(line.strip()).upper())
+    return words
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").digest()
+
+
+def build_cache(words_path=WORDS_PATH, cache_path=CACHE_PATH):
+    """
+    Normalizes words.txt once and writes its word graph to cache_path.
+    The file is replaced atomically.
+    """
+    digest = file_digest(words_path)
+    count, first_edge, labels, targets, final = build_graph(sorted(read_words(words_path)))
+
+    header = _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest, count, len(final), len(labels))
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(_HEADER_SIZE, b"\0"))
+        for a in (first_edge, labels, targets, final):
+            f.write(a.tobytes())
+    os.replace(tmp_path, cache_path)
+    return count
+
+
+def open_cache(cache_path=CACHE_PATH, digest=None):
+    """
+    Memory-maps a cache built by build_cache. Returns None if the file is
+    missing, malformed or was built from a different words.txt.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buf) < _HEADER_SIZE:
+        buf.close()
+        return None
+    magic, version, cached_digest, count, nodes, edges = _HEADER.unpack_from(buf)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or (digest is not None and cached_digest != digest):
+        buf.close()
+        return None
+    if len(buf) != _HEADER_SIZE + (nodes + 1) * 4 + edges * 8 + nodes:
+        buf.close()
+        return None
+
+    view = memoryview(buf)
+    start = _HEADER_SIZE
+    first_edge = view[start:start + (nodes + 1) * 4].cast("I")
+    start += (nodes + 1) * 4
+    labels = view[start:start + edges * 4].cast("I")
+    start += edges * 4
+    targets = view[start:start + edges * 4].cast("I")
+    start += edges * 4
+    final = view[start:start + nodes]
+    return Dictionary.from_arrays(count, first_edge, labels, targets, final)
+
+
+def load_dictionary(path=WORDS_PATH, cache_path=CACHE_PATH):
+    try:
+        digest = file_digest(path)
+        dictionary = open_cache(cache_path, digest)
+        if dictionary is None:
+            # Missing or stale cache: rebuild it from words.txt
+            try:
+                build_cache(path, cache_path)
+                dictionary = open_cache(cache_path, digest)
+            except OSError as e:
+                print(f"Could not write dictionary cache: {e}")
+        if dictionary is None:
+            dictionary = Dictionary(read_words(path))
+
+        print(f"Dictionary loaded: {len(dictionary)} words.")
+        return dictionary
+    except Exception as e:
+        print(f"Error loading dictionary: {e}")
+        return Dictionary(FALLBACK_WORDS)
+
+
+def get_dictionary():
+    """
+    Returns the process-wide Dictionary, loading it on first use.
+    Every GameState shares this instance.
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = load_dictionary()
+    return _shared
+
+
+if __name__ == "__main__":
+    # Build step: python3 common/dictionary.py [words.txt] [words.bin]
+    words_path = sys.argv[1] if len(sys.argv) > 1 else WORDS_PATH
+    cache_path = sys.argv[2] if len(sys.argv) > 2 else CACHE_PATH
+    count = build_cache(words_path, cache_path)
+    print(f"Dictionary cache written: {cache_path} ({count} words)")
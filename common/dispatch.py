@@ -0,0 +1,49 @@
+class Dispatcher:
+    """
+    Opcode -> handler registry with a middleware chain, shared by every
+    connection of a class. Handlers are method names, called as
+    getattr(conn, name)(payload) so that subclasses can override them.
+
+    A middleware is called as middleware(conn, opcode, payload, call_next)
+    and runs the rest of the chain with call_next(conn, opcode, payload);
+    the first one added is the outermost. Middleware can be added and
+    removed while packets are being dispatched (e.g. a profiler turned on at
+    runtime): the chain is rebuilt and swapped in one assignment.
+    """
+    def __init__(self, handlers=None):
+        self.handlers = dict(handlers or {})
+        self.middleware = ()
+        self._entry = self._call
+
+    def register(self, opcode, name):
+        self.handlers[opcode] = name
+
+    def use(self, middleware):
+        self.middleware += (middleware,)
+        self._build()
+
+    def remove(self, middleware):
+        self.middleware = tuple(m for m in self.middleware if m is not middleware)
+        self._build()
+
+    def _build(self):
+        entry = self._call
+        for middleware in reversed(self.middleware):
+            entry = _link(middleware, entry)
+        self._entry = entry
+
+    def _call(self, conn, opcode, payload):
+        getattr(conn, self.handlers[opcode])(payload)
+
+    def dispatch(self, conn, opcode, payload):
+        # False when no handler is registered for opcode
+        if opcode not in self.handlers:
+            return False
+        self._entry(conn, opcode, payload)
+        return True
+
+
+def _link(middleware, call_next):
+    def entry(conn, opcode, payload):
+        middleware(conn, opcode, payload, call_next)
+    return entry
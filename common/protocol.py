@@ -12,6 +12,15 @@ REQ_LEAVE = 0x06
 NOTIFY = 0x07
 DATA = 0x08
 REQ_LIST_ROOMS = 0x09
+HELLO = 0x0E              # Bilateral: capability negotiation [Caps(1)]
+GAME_STATE = 0x0F         # Server -> Client: binary game state (CAP_BINARY_STATE)
+GAME_DELTA = 0x10         # Server -> Client: changed game state fields (CAP_DELTA_STATE)
+REQ_SNAPSHOT = 0x11       # Client -> Server: sequence gap detected, send a full GAME_STATE
+COMPRESSED = 0x12         # Server -> Client: deflated frame body (CAP_COMPRESS)
+REQ_MATCH = 0x13          # Client -> Server: seat me in any game (answered by RESP_ROOM)
+REDIRECT = 0x14           # Server -> Client: full, reconnect to [Port(2)][HostLen(1)][Host]
+REQ_SUBSCRIBE_ROOMS = 0x15 # Client -> Server: [On(1)] receive ROOM_UPDATE while in the lobby
+ROOM_UPDATE = 0x16        # Server -> Client: rooms changed since the last update
 
 # P2P OpCodes
 REQ_P2P_INIT = 0x0A       # Client A -> Server: I want to chat with B
@@ -29,7 +38,34 @@ ERR_AUTH = 0x02
 ERR_GAME = 0x03
 ERR_UNKNOWN = 0xFF
 
+# Capabilities (HELLO bitmask). A client without HELLO gets none of them.
+CAP_BINARY_STATE = 0x01   # GAME_STATE opcode instead of JSON over DATA
+CAP_DELTA_STATE = 0x02    # GAME_DELTA between snapshots (requires CAP_BINARY_STATE)
+CAP_COMPRESS = 0x04       # Large frames wrapped in COMPRESSED
+
+# GAME_DELTA field mask
+FIELD_FRAG = 0x01
+FIELD_ACTIVE = 0x02
+FIELD_GHOSTS = 0x04
+
+# Game state events
+EVENT_NONE = 0x00
+EVENT_WORD_COMPLETED = 0x01
+EVENT_INVALID_LETTER = 0x02
+EVENT_TEXT = {
+    EVENT_WORD_COMPLETED: "{player} a complete un mot valide !",
+    EVENT_INVALID_LETTER: "{player} a joue une lettre invalide (mot impossible) !",
+}
+NO_PLAYER = 0xFF # Active/event player index when there is none ("En attente...")
+ANY_ROOM = 0 # REQ_JOIN room id: any free seat (quick join)
+
+# COMPRESSED frames
+COMPRESS_THRESHOLD = 256  # Frame bodies up to this size are sent as is
+COMPRESS_RESET = 0x01     # Flag: first frame of a new deflate stream
+_SYNC_TAIL = b'\x00\x00\xff\xff' # Ends every sync flush, stripped on the wire
+
 HEADER_SIZE = 4
+MAX_FRAME_SIZE = 10 * 1024 * 1024 # Safety limit on the announced size
 
 def pack_message(opcode, payload=b''):
     """
@@ -68,3 +104,292 @@ def parse_packet(data):
     opcode = data[0]
     payload = data[1:]
     return opcode, payload
+
+
+def pack_room_list(rooms):
+    """
+    ROOM_LIST payload from (id, name, players, max) tuples:
+    [NbRooms(4)] + N * [ID(4)][NameLen(1)][Name][Players(1)][Max(1)]
+    """
+    parts = [b'']
+    for room_id, name, players, max_players in rooms:
+        name_bytes = name.encode('utf-8')
+        parts.append(struct.pack('!IB', room_id, len(name_bytes)))
+        parts.append(name_bytes)
+        parts.append(struct.pack('BB', players, max_players))
+    parts[0] = struct.pack('!I', (len(parts) - 1) // 3)
+    return b''.join(parts)
+
+def unpack_room_list(payload):
+    # Returns [(id, name, players, max)]
+    count = struct.unpack_from('!I', payload)[0]
+    offset = 4
+    rooms = []
+    for _ in range(count):
+        room_id, name_len = struct.unpack_from('!IB', payload, offset)
+        offset += 5
+        name = str(payload[offset:offset + name_len], 'utf-8')
+        offset += name_len
+        rooms.append((room_id, name, payload[offset], payload[offset + 1]))
+        offset += 2
+    return rooms
+
+def pack_room_update(version, rooms):
+    """
+    ROOM_UPDATE payload: [Version(4)][NbRooms(2)] + N * [ID(4)][Players(1)][Max(1)][NameLen(1)][Name]
+    rooms are (id, name, players, max) tuples, Max 0 means the room was closed.
+    """
+    parts = [struct.pack('!IH', version, len(rooms))]
+    for room_id, name, players, max_players in rooms:
+        name_bytes = name.encode('utf-8')
+        parts.append(struct.pack('!IBBB', room_id, players, max_players, len(name_bytes)))
+        parts.append(name_bytes)
+    return b''.join(parts)
+
+def unpack_room_update(payload):
+    # Returns (version, [(id, name, players, max)])
+    version, count = struct.unpack_from('!IH', payload)
+    offset = 6
+    rooms = []
+    for _ in range(count):
+        room_id, players, max_players, name_len = struct.unpack_from('!IBBB', payload, offset)
+        offset += 7
+        rooms.append((room_id, str(payload[offset:offset + name_len], 'utf-8'), players, max_players))
+        offset += name_len
+    return version, rooms
+
+def pack_redirect(host, port):
+    host_bytes = host.encode('utf-8')
+    return struct.pack('!HB', port, len(host_bytes)) + host_bytes
+
+def unpack_redirect(payload):
+    # Returns (host, port)
+    port, host_len = struct.unpack_from('!HB', payload)
+    return str(payload[3:3 + host_len], 'utf-8'), port
+
+
+def state_format(caps):
+    # Game state encoding for a connection's negotiated capabilities
+    if caps & CAP_DELTA_STATE:
+        return "delta"
+    if caps & CAP_BINARY_STATE:
+        return "binary"
+    return "json"
+
+_GAME_STATE_HEADER = struct.Struct('!IBBBB') # Seq, Event, EventPlayer, Active, NbPlayers
+_GAME_DELTA_HEADER = struct.Struct('!IBBB')  # Seq, Mask, Event, EventPlayer
+
+def pack_game_state(seq, frag, ghosts, active=NO_PLAYER, event=EVENT_NONE, event_player=NO_PLAYER):
+    """
+    Packs a GAME_STATE payload:
+    [Seq(4)][Event(1)][EventPlayer(1)][Active(1)][NbPlayers(1)] + N * [Ghost(1)] + [FragLen(1)][Frag]
+    Players are indexes into the room's player list, ghosts are the number
+    of GHOST letters of each player.
+    """
+    frag_bytes = frag.encode('utf-8')
+    return (_GAME_STATE_HEADER.pack(seq, event, event_player, active, len(ghosts))
+            + bytes(ghosts) + struct.pack('B', len(frag_bytes)) + frag_bytes)
+
+def unpack_game_state(payload):
+    """
+    Unpacks a GAME_STATE payload.
+    Returns {"seq", "frag", "ghosts", "active", "event", "event_player"}
+    """
+    seq, event, event_player, active, count = _GAME_STATE_HEADER.unpack_from(payload)
+    offset = _GAME_STATE_HEADER.size
+    ghosts = list(payload[offset:offset + count])
+    offset += count
+    frag_len = payload[offset]
+    frag = str(payload[offset + 1:offset + 1 + frag_len], 'utf-8')
+    return {"seq": seq, "frag": frag, "ghosts": ghosts, "active": active,
+            "event": event, "event_player": event_player}
+
+def pack_game_delta(seq, frag=None, active=None, ghosts=None, event=EVENT_NONE, event_player=NO_PLAYER):
+    """
+    Packs a GAME_DELTA payload, only the given fields are included:
+    [Seq(4)][Mask(1)][Event(1)][EventPlayer(1)]
+    + FIELD_FRAG:   [FragLen(1)][Frag]
+    + FIELD_ACTIVE: [Active(1)]
+    + FIELD_GHOSTS: [NbChanged(1)] + N * [Index(1)][Ghost(1)]   (ghosts: {index: count})
+    """
+    mask = 0
+    body = b''
+    if frag is not None:
+        mask |= FIELD_FRAG
+        frag_bytes = frag.encode('utf-8')
+        body += struct.pack('B', len(frag_bytes)) + frag_bytes
+    if active is not None:
+        mask |= FIELD_ACTIVE
+        body += struct.pack('B', active)
+    if ghosts:
+        mask |= FIELD_GHOSTS
+        body += struct.pack('B', len(ghosts))
+        for index, count in ghosts.items():
+            body += struct.pack('BB', index, count)
+    return _GAME_DELTA_HEADER.pack(seq, mask, event, event_player) + body
+
+def unpack_game_delta(payload):
+    """
+    Unpacks a GAME_DELTA payload. Returns {"seq", "event", "event_player"}
+    plus "frag", "active" and "ghosts" ({index: count}) when present.
+    """
+    seq, mask, event, event_player = _GAME_DELTA_HEADER.unpack_from(payload)
+    delta = {"seq": seq, "event": event, "event_player": event_player}
+    offset = _GAME_DELTA_HEADER.size
+    if mask & FIELD_FRAG:
+        frag_len = payload[offset]
+        delta["frag"] = str(payload[offset + 1:offset + 1 + frag_len], 'utf-8')
+        offset += 1 + frag_len
+    if mask & FIELD_ACTIVE:
+        delta["active"] = payload[offset]
+        offset += 1
+    if mask & FIELD_GHOSTS:
+        count = payload[offset]
+        offset += 1
+        delta["ghosts"] = {payload[offset + 2 * i]: payload[offset + 2 * i + 1] for i in range(count)}
+    return delta
+
+class FrameDecoder:
+    """
+    Incremental (sans-IO) frame decoder.
+    Bytes are written into a reusable bytearray, either directly with
+    recv_into()/get_buffer()+commit() or copied with feed(). frames() then
+    yields (opcode, payload) for every complete frame, where payload is a
+    memoryview into the buffer: it is only valid until the buffer is written
+    again, so copy it (bytes(payload)) to keep it.
+    """
+    def __init__(self, buffer_size=4096, max_frame_size=MAX_FRAME_SIZE):
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0 # First unconsumed byte
+        self.end = 0   # End of received data
+        self.max_frame_size = max_frame_size
+
+    def get_buffer(self, min_free=1):
+        """
+        Returns a writable memoryview over the free space, making room first:
+        unconsumed bytes are moved to the front when the free space is too
+        small, and the buffer is replaced by a larger one when a frame does
+        not fit.
+        """
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.start:
+            remaining = self.end - self.start
+            free = max(min_free, self._pending_frame_size() - remaining)
+            if self.end + free > len(self.buffer):
+                # Through a copy: source and destination overlap in the same buffer
+                self.buffer[:remaining] = bytes(self.view[self.start:self.end])
+                self.start = 0
+                self.end = remaining
+        needed = max(self.end + min_free, self.start + self._pending_frame_size())
+        if needed > len(self.buffer):
+            # Never resized in place: payload views may still reference it
+            size = len(self.buffer)
+            while size < needed:
+                size *= 2
+            grown = bytearray(size)
+            grown[:self.end] = self.view[:self.end]
+            self.buffer = grown
+            self.view = memoryview(grown)
+        return self.view[self.end:]
+
+    def commit(self, n):
+        # n bytes were written into the view returned by get_buffer()
+        self.end += n
+
+    def feed(self, data):
+        self.get_buffer(len(data))[:len(data)] = data
+        self.commit(len(data))
+
+    def recv_into(self, sock):
+        """
+        One recv_into() on sock. Returns the number of bytes read (0 on EOF).
+        """
+        n = sock.recv_into(self.get_buffer())
+        self.commit(n)
+        return n
+
+    def _pending_frame_size(self):
+        if self.end - self.start < HEADER_SIZE:
+            return 0
+        size = struct.unpack_from('!I', self.buffer, self.start)[0]
+        if size > self.max_frame_size:
+            # Before the buffer grows to a size announced by the peer
+            raise ValueError(f"Frame too large ({size} bytes)")
+        return HEADER_SIZE + size
+
+    def frames(self):
+        while self.end - self.start >= HEADER_SIZE:
+            size = struct.unpack_from('!I', self.buffer, self.start)[0]
+            if size > self.max_frame_size:
+                raise ValueError(f"Frame too large ({size} bytes)")
+            if size == 0:
+                raise ValueError("Empty data")
+            frame_end = self.start + HEADER_SIZE + size
+            if frame_end > self.end:
+                break
+            opcode = self.buffer[self.start + HEADER_SIZE]
+            payload = self.view[self.start + HEADER_SIZE + 1:frame_end]
+            self.start = frame_end
+            yield opcode, payload
+
+    def pending(self):
+        # Received bytes not consumed by frames() yet
+        return bytes(self.view[self.start:self.end])
+
+
+class FrameCompressor:
+    """
+    Streaming compressor for the frames sent on one connection (CAP_COMPRESS).
+    Frames whose body is larger than threshold are replaced by a COMPRESSED
+    frame: [Flags(1)] + deflate([OpCode][Payload]). A single deflate stream
+    spans the connection, sync-flushed after each frame, so repeated JSON keys
+    and pseudos compress against earlier frames. compress() must be called in
+    the order frames are written to the socket.
+    The zlib context is only allocated for the first large frame, with a
+    small window to bound memory per connection.
+    """
+    def __init__(self, threshold=COMPRESS_THRESHOLD, level=6, wbits=13, mem_level=6):
+        self.threshold = threshold
+        self.level = level
+        self.wbits = wbits
+        self.mem_level = mem_level
+        self.stream = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def compress(self, frame):
+        if len(frame) - HEADER_SIZE <= self.threshold:
+            return frame
+        flags = 0
+        if self.stream is None:
+            self.stream = zlib.compressobj(self.level, zlib.DEFLATED, -self.wbits, self.mem_level)
+            flags = COMPRESS_RESET
+        data = self.stream.compress(memoryview(frame)[HEADER_SIZE:]) + self.stream.flush(zlib.Z_SYNC_FLUSH)
+        packed = pack_message(COMPRESSED, bytes([flags]) + data[:-len(_SYNC_TAIL)])
+        self.bytes_in += len(frame)
+        self.bytes_out += len(packed)
+        return packed
+
+
+class FrameDecompressor:
+    """
+    Receiving side of FrameCompressor, one per connection.
+    """
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        self.stream = None
+        self.max_frame_size = max_frame_size
+
+    def decompress(self, payload):
+        """
+        Inflates a COMPRESSED payload. Returns the (opcode, payload) it carries.
+        """
+        if payload[0] & COMPRESS_RESET:
+            self.stream = zlib.decompressobj(-zlib.MAX_WBITS)
+        elif self.stream is None:
+            raise ValueError("Compressed frame before the start of the stream")
+        body = self.stream.decompress(bytes(payload[1:]) + _SYNC_TAIL, self.max_frame_size)
+        if self.stream.unconsumed_tail:
+            raise ValueError("Compressed frame too large")
+        return parse_packet(body)
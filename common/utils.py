@@ -1,17 +1,90 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
 
+# GHOST_LOG_LEVEL=DEBUG turns on the hot-path logs (broadcasts, received messages)
+LOG_LEVEL = getattr(logging, os.environ.get("GHOST_LOG_LEVEL", "INFO").upper(), logging.INFO)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The record is formatted by the listener thread, not by the caller
+    def prepare(self, record):
+        return record
+
+_queue_handler = None
+_listener = None
+
+def _start_listener():
+    """
+    Every logger writes to one queue; a background thread formats the records
+    and writes them to stdout. Restarted in forked children (--workers), which
+    do not inherit the thread.
+    """
+    global _listener
+    records = queue.SimpleQueue()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    _queue_handler.queue = records
+    _listener = logging.handlers.QueueListener(records, console)
+    _listener.start()
+
+def _stop_listener():
+    # Flushes what is still queued at exit
+    if _listener is not None:
+        _listener.stop()
+
 def setup_logger(name="GhostApp"):
+    global _queue_handler
     logger = logging.getLogger(name)
     if not logger.handlers:
-        logger.setLevel(logging.DEBUG)
-        
-        # Console Handler
-        ch = logging.StreamHandler(sys.stdout)
-        ch.setLevel(logging.DEBUG)
-        
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        ch.setFormatter(formatter)
-        
-        logger.addHandler(ch)
+        if _queue_handler is None:
+            _queue_handler = _DeferredQueueHandler(None)
+            _start_listener()
+            atexit.register(_stop_listener)
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=_start_listener)
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(_queue_handler)
     return logger
+
+class _Event:
+    # Rendered only when a handler formats the record
+    __slots__ = ("name", "fields", "skipped")
+
+    def __init__(self, name, fields, skipped):
+        self.name = name
+        self.fields = fields
+        self.skipped = skipped
+
+    def __str__(self):
+        text = " ".join([self.name] + [f"{key}={value!r}" for key, value in self.fields.items()])
+        if self.skipped:
+            text += f" ({self.skipped} skipped)"
+        return text
+
+class EventLog:
+    """
+    Structured log of one hot-path event: name followed by key=value fields,
+    e.g. EventLog(logger, "broadcast", every=100)(room=name, state=state)
+    logs one call in 100. Costs a level check when the level is disabled.
+    Fields are formatted later by the logging thread: pass values that are not
+    modified afterwards.
+    """
+    def __init__(self, logger, name, level=logging.DEBUG, every=1):
+        self.logger = logger
+        self.name = name
+        self.level = level
+        self.every = every
+        self.count = 0
+
+    def __call__(self, **fields):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self.count += 1
+        if self.count < self.every:
+            return
+        skipped = self.count - 1
+        self.count = 0
+        self.logger.log(self.level, "%s", _Event(self.name, fields, skipped))
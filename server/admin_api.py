@@ -0,0 +1,183 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+
+from common import utils
+
+logger = utils.setup_logger("AdminAPI")
+
+SNAPSHOT_INTERVAL = 1.0
+ADMIN_PORT_OFFSET = 1000 # Default admin port: game port + 1000
+
+class AdminServer:
+    """
+    Local admin API (127.0.0.1 only) used by the dashboard process.
+    One JSON object per line in both directions:
+      {"cmd": "snapshot"}                      -> the latest snapshot
+      {"cmd": "kick", "addr": [ip, port]}      -> {"ok": bool}
+      {"cmd": "broadcast", "message": text}    -> {"ok": true}
+      {"cmd": "profile_start", "opcodes": [names], "clients": [pseudos], "interval": s, "duration": s}
+      {"cmd": "profile_dump"} / {"cmd": "profile_stop"} -> server/profiler.py report
+    The snapshot is built once per SNAPSHOT_INTERVAL by this module's own
+    thread, however many dashboards ask for it.
+    """
+    def __init__(self, server, port, host="127.0.0.1"):
+        self.server = server
+        self.started = time.time()
+        self.snapshot = b'{}\n'
+        self.profiler = None # profiler.SamplingProfiler while profiling
+        self.tcp = socketserver.ThreadingTCPServer((host, port), self._handler_class(), bind_and_activate=False)
+        self.tcp.daemon_threads = True
+        self.tcp.allow_reuse_address = True
+        self.tcp.server_bind()
+        self.tcp.server_activate()
+
+    def start(self):
+        self.snapshot = self.build_snapshot()
+        threading.Thread(target=self._snapshot_loop, daemon=True).start()
+        threading.Thread(target=self.tcp.serve_forever, daemon=True).start()
+        host, port = self.tcp.server_address
+        logger.info(f"Admin API on {host}:{port}")
+
+    def stop(self):
+        self.tcp.shutdown()
+        self.tcp.server_close()
+
+    def _snapshot_loop(self):
+        while self.server.running:
+            time.sleep(SNAPSHOT_INTERVAL)
+            try:
+                self.snapshot = self.build_snapshot()
+            except Exception as e:
+                logger.error(f"Snapshot error: {e}")
+
+    def build_snapshot(self):
+        """
+        Encoded snapshot: compact rows instead of one object per client.
+        clients: [ip, port, pseudo, room name or "", idle seconds, queued frames]
+        rooms: [id, name, players, max] of the rooms with players
+        """
+        server = self.server
+        now = time.time()
+        clients = []
+        for c in server.get_all_clients():
+            room = c.current_room
+            clients.append([c.addr[0], c.addr[1], c.pseudo, room.name if room else "",
+                            round(now - c.last_packet, 1), len(c.outbound)])
+        rooms = [[r["id"], r["name"], r["players"], r["max"]]
+                 for r in server.room_manager.list_rooms() if r["players"]]
+        snapshot = {
+            "time": now,
+            "uptime": round(now - self.started),
+            "port": server.port,
+            "mode": server.mode,
+            "max_clients": server.max_clients,
+            "clients": clients,
+            "rooms": rooms,
+            "rooms_open": len(server.room_manager.rooms),
+            "matchmaking": server.matchmaker.metrics(),
+        }
+        return json.dumps(snapshot, separators=(",", ":")).encode('utf-8') + b'\n'
+
+    def execute(self, request):
+        cmd = request.get("cmd")
+        if cmd == "snapshot":
+            return self.snapshot
+        if cmd == "kick":
+            ok = self.server.kick_client(tuple(request.get("addr", ())))
+            return self.reply({"ok": ok})
+        if cmd == "broadcast":
+            message = request.get("message")
+            if message:
+                self.server.broadcast_admin_message(message)
+            return self.reply({"ok": bool(message)})
+        if cmd == "profile_start":
+            return self.start_profiler(request)
+        if cmd in ("profile_dump", "profile_stop"):
+            profiler = self.profiler
+            if profiler is None:
+                return self.reply({"ok": False, "error": "not profiling"})
+            if cmd == "profile_stop":
+                self.profiler = None
+                profiler.stop()
+            return self.reply(dict(profiler.dump(reset=cmd == "profile_dump"), ok=True))
+        return self.reply({"ok": False, "error": f"unknown command: {cmd}"})
+
+    def start_profiler(self, request):
+        from server.controllers.client_handler import BaseClientHandler
+        from server.profiler import SamplingProfiler, SAMPLE_INTERVAL, MAX_DURATION, parse_opcode
+        opcodes = [parse_opcode(str(name)) for name in request.get("opcodes") or ()]
+        profiler = SamplingProfiler(BaseClientHandler.dispatcher, opcodes, request.get("clients"),
+                                    request.get("interval") or SAMPLE_INTERVAL,
+                                    request.get("duration") or MAX_DURATION)
+        if self.profiler is not None:
+            self.profiler.stop() # Replaced
+        self.profiler = profiler
+        profiler.start()
+        return self.reply({"ok": True, "profiling": profiler.describe()})
+
+    @staticmethod
+    def reply(data):
+        return json.dumps(data).encode('utf-8') + b'\n'
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = api.execute(json.loads(line))
+                    except Exception as e:
+                        response = api.reply({"ok": False, "error": str(e)})
+                    self.wfile.write(response)
+
+        return Handler
+
+
+class AdminClient:
+    """
+    Dashboard side of the admin API. Reconnects on the next call after an
+    error; calls raise OSError while the server is unreachable.
+    """
+    def __init__(self, port, host="127.0.0.1", timeout=2.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+
+    def call(self, request):
+        with self.lock:
+            try:
+                if self.sock is None:
+                    self.sock = socket.create_connection(self.address, self.timeout)
+                    self.reader = self.sock.makefile('rb')
+                self.sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+                line = self.reader.readline()
+                if not line:
+                    raise ConnectionError("admin API closed the connection")
+                return json.loads(line)
+            except (OSError, ValueError):
+                self.close()
+                raise
+
+    def snapshot(self):
+        return self.call({"cmd": "snapshot"})
+
+    def kick(self, addr):
+        return self.call({"cmd": "kick", "addr": list(addr)})["ok"]
+
+    def broadcast(self, message):
+        return self.call({"cmd": "broadcast", "message": message})["ok"]
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.reader = None
@@ -0,0 +1,115 @@
+import json
+import socket
+import threading
+import time
+
+from common import utils
+
+logger = utils.setup_logger("Cluster")
+
+REPORT_INTERVAL = 1.0
+REPORT_TTL = 3.5 # A peer silent for longer is considered down
+OVERLOAD_CPU = 0.9 # Fraction of one core (the GIL keeps a server on about one)
+
+def parse_node(text):
+    # "host:port" -> (host, port)
+    host, _, port = text.rpartition(':')
+    return (host or "127.0.0.1", int(port))
+
+class PeerMonitor:
+    """
+    --peers: load sharing between several GhostServer nodes.
+    Each node sends its load (connections, active rooms, CPU) to every peer
+    once per REPORT_INTERVAL, as a JSON datagram on the UDP port with the
+    same number as its game port. A full or overloaded node sends new
+    clients a REDIRECT to the least loaded peer.
+    """
+    def __init__(self, server, advertise, peers):
+        self.server = server
+        self.node = (advertise, server.port) # Address clients are redirected to
+        self.peers = peers # [(host, port)]
+        self.loads = {} # (host, port) -> last report, with "seen" (monotonic)
+        self.lock = threading.Lock()
+        self.cpu = 0.0
+        self._cpu_sample = (time.monotonic(), time.process_time())
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def start(self):
+        self.sock.bind(('0.0.0.0', self.server.port))
+        threading.Thread(target=self._receive_loop, daemon=True).start()
+        threading.Thread(target=self._report_loop, daemon=True).start()
+        logger.info(f"Sharing load with {len(self.peers)} peer(s)")
+
+    def local_load(self):
+        server = self.server
+        return {
+            "node": list(self.node),
+            "connections": len(server.clients),
+            "max": server.max_clients,
+            "rooms": server.room_manager.active_rooms(),
+            "cpu": round(self.cpu, 3),
+        }
+
+    def _sample_cpu(self):
+        # Process CPU time over wall time since the previous sample
+        wall, cpu = time.monotonic(), time.process_time()
+        last_wall, last_cpu = self._cpu_sample
+        if wall > last_wall:
+            self.cpu = min(1.0, (cpu - last_cpu) / (wall - last_wall))
+        self._cpu_sample = (wall, cpu)
+
+    def _report_loop(self):
+        while self.server.running:
+            self._sample_cpu()
+            data = json.dumps(self.local_load()).encode('utf-8')
+            for peer in self.peers:
+                try:
+                    self.sock.sendto(data, peer)
+                except OSError as e:
+                    logger.warning(f"Load report to {peer} failed: {e}")
+            time.sleep(REPORT_INTERVAL)
+
+    def _receive_loop(self):
+        while self.server.running:
+            try:
+                data, _ = self.sock.recvfrom(4096)
+                report = json.loads(data.decode('utf-8'))
+                node = tuple(report["node"])
+            except OSError:
+                break
+            except Exception as e:
+                logger.warning(f"Invalid load report: {e}")
+                continue
+            report["seen"] = time.monotonic()
+            with self.lock:
+                self.loads[node] = report
+
+    @staticmethod
+    def score(load):
+        # 0 (idle) .. 1 (full): whichever of connections and CPU is the tighter
+        return max(load["connections"] / max(load["max"], 1), load["cpu"])
+
+    def overloaded(self):
+        return self.cpu >= OVERLOAD_CPU
+
+    def least_loaded(self):
+        """
+        Returns the (host, port) of the peer with the lowest load that still
+        accepts clients and is less loaded than this node, or None.
+        """
+        now = time.monotonic()
+        own = self.score(self.local_load())
+        with self.lock:
+            candidates = [load for load in self.loads.values()
+                          if now - load["seen"] < REPORT_TTL and load["connections"] < load["max"]]
+        candidates = [load for load in candidates if self.score(load) < own or self.server.is_full()]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda load: (self.score(load), load["rooms"]))
+        return tuple(best["node"])
+
+    def stop(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
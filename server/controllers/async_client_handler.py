@@ -0,0 +1,188 @@
+import asyncio
+import threading
+from common import protocol, utils
+from server.controllers.client_handler import BaseClientHandler
+from server import metrics
+
+logger = utils.setup_logger("AsyncClientHandler")
+
+class AsyncClientHandler(BaseClientHandler, asyncio.BufferedProtocol):
+    """
+    Event-loop connection handler: one Protocol object per socket, no thread.
+    Runs the same opcode handlers as ClientHandler.
+    """
+    def __init__(self, server, core):
+        BaseClientHandler.__init__(self, None, server)
+        self.core = core
+        self.transport = None
+        self.decoder = protocol.FrameDecoder()
+        self.paused = False # Transport buffer above its high-water mark
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.addr = transport.get_extra_info('peername')
+        if self.server.should_redirect():
+            logger.info(f"Server full, redirecting {self.addr}")
+            transport.write(self.server.full_message())
+            transport.close()
+            self.running = False
+            return
+        logger.info(f"New connection from {self.addr}")
+        self.server.connection_accepted()
+        transport.set_write_buffer_limits(high=self.core.WRITE_BUFFER_HIGH)
+        self.server.heartbeat.watch(self)
+
+    def get_buffer(self, sizehint):
+        # The event loop reads straight into the decoder's buffer
+        return self.decoder.get_buffer()
+
+    def buffer_updated(self, nbytes):
+        self.decoder.commit(nbytes)
+        metrics.BYTES_IN.inc(nbytes)
+        self.process_frames()
+
+    def data_received(self, data):
+        # Bytes that did not come from the transport (worker handoff)
+        self.decoder.feed(data)
+        self.process_frames()
+
+    def process_frames(self):
+        try:
+            for opcode, payload in self.decoder.frames():
+                self.on_packet(opcode, payload)
+                if not self.running:
+                    break
+        except Exception as e:
+            logger.error(f"Error handling client {self.addr}: {e}")
+            self.disconnect()
+
+    def connection_lost(self, exc):
+        if self.running:
+            self.disconnect()
+
+    def send_raw(self, data, key=None):
+        # May be called from other threads (admin dashboard)
+        if self.transport is None or self.transport.is_closing():
+            return
+        if not self.core.in_loop():
+            self.core.loop.call_soon_threadsafe(self.send_raw, data, key)
+        elif not self.paused:
+            data = self.compress(data)
+            self.transport.write(data)
+            metrics.BYTES_OUT.inc(len(data))
+        elif not self.outbound.push(data, key):
+            # Peer is not reading: the transport buffer and our queue are both full
+            logger.warning(f"Slow consumer {self.pseudo or self.addr}: send queue full, disconnecting")
+            self.disconnect()
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        self._write_queued()
+
+    def _write_queued(self):
+        frames = self.outbound.pop_all(block=False)
+        if frames:
+            data = b"".join([self.compress(frame) for frame in frames])
+            self.transport.write(data)
+            metrics.BYTES_OUT.inc(len(data))
+
+    def flush(self, callback, timeout=1.0):
+        """
+        From the event loop: stops reading and processing frames, then calls
+        callback once the queued frames and the transport buffer are written
+        to the socket (or after timeout). The loop keeps running meanwhile.
+        """
+        self.running = False
+        self.transport.pause_reading()
+        self.core.loop.create_task(self._drain(callback, timeout))
+
+    async def _drain(self, callback, timeout):
+        deadline = self.core.loop.time() + timeout
+        while not self.transport.is_closing() and self.core.loop.time() < deadline:
+            self._write_queued()
+            if not self.transport.get_write_buffer_size():
+                break
+            await asyncio.sleep(self.core.DRAIN_INTERVAL)
+        callback()
+
+    def fileno(self):
+        return self.transport.get_extra_info('socket').fileno()
+
+    def pending_bytes(self):
+        return self.decoder.pending()
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    def disconnect(self):
+        if not self.core.in_loop():
+            self.core.loop.call_soon_threadsafe(self.disconnect)
+            return
+        if not self.running and self.transport is not None and self.transport.is_closing():
+            return
+        BaseClientHandler.disconnect(self)
+
+class AsyncServerCore:
+    """
+    asyncio alternative to the thread-per-client accept loop. Serves the
+    already bound listening socket of GhostServer from a single event loop.
+    """
+    WRITE_BUFFER_HIGH = 64 * 1024 # Bytes buffered by a transport before frames are queued instead
+    DRAIN_INTERVAL = 0.005 # Seconds between two checks of a transport being flushed (handoff)
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.loop = None
+        self.loop_thread = None
+        self.ready = threading.Event()
+
+    def in_loop(self):
+        return threading.get_ident() == self.loop_thread
+
+    def run(self):
+        asyncio.run(self._serve())
+
+    def adopt(self, sock, pseudo, caps, join_payload, pending):
+        # Connection handed off by another worker (may be called from any thread)
+        self.ready.wait()
+        asyncio.run_coroutine_threadsafe(self._adopt(sock, pseudo, caps, join_payload, pending), self.loop)
+
+    async def _adopt(self, sock, pseudo, caps, join_payload, pending):
+        _, handler = await self.loop.connect_accepted_socket(
+            lambda: AsyncClientHandler(self.server, self), sock)
+        if not handler.running:
+            return
+        handler.caps = caps
+        if not self.server.register_client(handler, pseudo):
+            logger.warning(f"Refusing {pseudo} from another worker: pseudo already used here")
+            handler.send_message(protocol.ERROR, "Pseudo déjà utilisé".encode('utf-8'))
+            handler.disconnect()
+            return
+        handler.on_packet(protocol.REQ_JOIN, join_payload)
+        if pending:
+            handler.data_received(pending)
+
+    async def _tick(self):
+        # Same thread as the handlers, so seating a player or a heartbeat
+        # timeout never races with its packets
+        while self.server.running:
+            await asyncio.sleep(self.server.TICK_INTERVAL)
+            try:
+                self.server.tick()
+            except Exception as e:
+                logger.error(f"Tick error: {e}")
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        srv = await self.loop.create_server(
+            lambda: AsyncClientHandler(self.server, self), sock=self.sock)
+        logger.info("Async server core running")
+        self.ready.set()
+        async with srv:
+            await self._tick() # Until the server stops
@@ -0,0 +1,83 @@
+import collections
+import threading
+
+# What to do with a new frame once a connection's queue reaches its high-water mark
+POLICY_DROP = "drop"           # Discard the new frame
+POLICY_COALESCE = "coalesce"   # Replace the queued frame with the same key (e.g. GAME_STATE), else drop
+POLICY_DISCONNECT = "disconnect" # Give up on the connection
+POLICIES = (POLICY_DROP, POLICY_COALESCE, POLICY_DISCONNECT)
+
+class OutboundQueue:
+    """
+    Bounded queue of pre-encoded frames waiting to be written to one
+    connection. Producers (broadcasts from other players' threads) never
+    block: push() applies the slow-consumer policy instead.
+    """
+    def __init__(self, high_water=256, policy=POLICY_DROP):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.high_water = high_water
+        self.policy = policy
+        self.entries = collections.deque() # [key, frame]
+        self.keyed = {} # key -> queued entry, for coalescing
+        self.cond = threading.Condition()
+        self.closed = False
+        self.sending = False
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, frame, key=None):
+        """
+        Queues frame. Returns False when the policy says the connection
+        should be disconnected.
+        """
+        with self.cond:
+            if self.closed:
+                return True
+            if len(self.entries) >= self.high_water:
+                if self.policy == POLICY_DISCONNECT:
+                    return False
+                entry = self.keyed.get(key) if key is not None else None
+                if self.policy == POLICY_COALESCE and entry is not None:
+                    entry[1] = frame
+                    self.coalesced += 1
+                else:
+                    self.dropped += 1
+                return True
+            entry = [key, frame]
+            self.entries.append(entry)
+            if key is not None:
+                self.keyed[key] = entry
+            self.cond.notify()
+            return True
+
+    def pop_all(self, block=True):
+        """
+        Takes every queued frame (blocking until there is one if block).
+        Returns None once the queue is closed and empty.
+        """
+        with self.cond:
+            self.sending = False
+            self.cond.notify_all()
+            while block and not self.entries and not self.closed:
+                self.cond.wait()
+            if not self.entries:
+                return None if self.closed else []
+            frames = [frame for _, frame in self.entries]
+            self.entries.clear()
+            self.keyed.clear()
+            self.sending = True
+            return frames
+
+    def wait_idle(self, timeout=None):
+        # Until everything queued has been handed to the socket
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.entries and not self.sending, timeout)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from common import protocol, utils
+
+logger = utils.setup_logger("Heartbeat")
+
+PING_INTERVAL = 30 # Seconds without traffic before a PING
+PONG_TIMEOUT = 5   # Seconds to answer a PING
+
+class TimerWheel:
+    """
+    Hashed timer wheel. A timer lands in the slot of its deadline tick
+    (tick = resolution seconds, slots wrap around); advance() only visits
+    the slots of the ticks that have elapsed, so its cost depends on the
+    timers that are due, not on how many are scheduled.
+    Timers cannot be cancelled: callbacks check whether they still apply.
+    """
+    def __init__(self, resolution=1.0, slots=64, clock=time.monotonic):
+        self.resolution = resolution
+        self.slots = slots
+        self.clock = clock
+        self.buckets = [[] for _ in range(slots)]
+        self.current = int(clock() / resolution) # Next tick to process
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, delay, callback, arg):
+        # callback(arg) runs from advance() once delay seconds have passed
+        with self.lock:
+            tick = max(int((self.clock() + delay) / self.resolution), self.current)
+            self.buckets[tick % self.slots].append((tick, callback, arg))
+            self.count += 1
+
+    def advance(self):
+        """
+        Runs every timer whose tick has elapsed. Returns how many ran.
+        """
+        now_tick = int(self.clock() / self.resolution)
+        due = []
+        with self.lock:
+            if now_tick < self.current:
+                return 0
+            # After a stall longer than a turn, every slot is visited once
+            for tick in range(self.current, min(now_tick, self.current + self.slots - 1) + 1):
+                bucket = self.buckets[tick % self.slots]
+                if not bucket:
+                    continue
+                keep = []
+                for entry in bucket:
+                    (due if entry[0] <= now_tick else keep).append(entry)
+                self.buckets[tick % self.slots] = keep
+            self.current = now_tick + 1
+            self.count -= len(due)
+
+        for _, callback, arg in due:
+            try:
+                callback(arg)
+            except Exception as e:
+                logger.error(f"Timer error: {e}")
+        return len(due)
+
+
+class Heartbeat:
+    """
+    PING/PONG for every connection from one timer wheel, advanced by the
+    server tick. Each connection has a single pending timer: at its
+    deadline a connection that received anything in the last PING_INTERVAL
+    is simply rescheduled, an idle one gets a PING, and one that did not
+    answer within PONG_TIMEOUT is dropped.
+    """
+    def __init__(self, wheel=None):
+        self.wheel = wheel if wheel is not None else TimerWheel()
+
+    def watch(self, handler):
+        self.wheel.schedule(PING_INTERVAL, self.check, handler)
+
+    def advance(self):
+        return self.wheel.advance()
+
+    def check(self, handler):
+        if not handler.running:
+            return # The timer dies with the connection
+        now = time.time()
+        if handler.waiting_pong:
+            if now >= handler.pong_deadline:
+                logger.warning(f"Client {handler.pseudo} timed out (Heartbeat)")
+                handler.heartbeat_expired()
+                return
+            delay = handler.pong_deadline - now
+        else:
+            idle = now - handler.last_packet
+            if idle < PING_INTERVAL:
+                delay = PING_INTERVAL - idle # Recent traffic: no PING needed
+            else:
+                handler.send_message(protocol.PING)
+                handler.waiting_pong = True
+                handler.pong_deadline = now + PONG_TIMEOUT
+                delay = PONG_TIMEOUT
+        self.wheel.schedule(delay, self.check, handler)
@@ -1,63 +1,149 @@
+import time
+LAUNCHED = time.perf_counter() # Startup report: imports are timed from here
+
 import socket
 import threading
 import sys
 import os
-import flet as ft
-import time
+import argparse
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from common import utils, protocol
-from server.controllers.client_handler import ClientHandler
+from common.dictionary import get_dictionary
+from server.controllers.client_handler import ClientHandler, SERVER_CAPS
 from server.models.room_manager import RoomManager
-from server.views.admin_dashboard import AdminDashboard
+from server.models.client_registry import ClientRegistry
+from server.models.matchmaker import Matchmaker
+from server.models.lobby import Lobby
+from server.heartbeat import Heartbeat
+from server.admin_api import AdminServer, ADMIN_PORT_OFFSET
+
+IMPORTED = time.perf_counter()
 
 HOST = '0.0.0.0'
 PORT = 5000
 
 logger = utils.setup_logger("GhostServer")
 
+MAX_CLIENTS = 5 # Default limit (Story #B01), --max-clients
+
 class GhostServer:
-    def __init__(self):
+    TICK_INTERVAL = 0.2 # Matchmaking, lobby updates and idle room collection
+
+    def __init__(self, mode="threads", worker_index=0, worker_count=1, handoff=None,
+                 send_queue_limit=256, slow_consumer_policy="drop", compress=True,
+                 room_size=2, max_rooms=1000, port=None, max_clients=MAX_CLIENTS, metrics_port=None,
+                 admin_port=None, preload_dictionary=True):
+        self.created = time.perf_counter()
+        self.mode = mode # "threads" (one ClientHandler thread per client) or "async"
+        self.port = port or PORT
+        self.max_clients = max_clients
+        self.peers = None # cluster.PeerMonitor when started with --peers
+        # Prometheus endpoint (--metrics-port); worker i listens on metrics_port + i
+        self.metrics_port = metrics_port + worker_index if metrics_port else None
+        self.admin_port = admin_port # Local admin API for the dashboard process (admin_api.py)
+        self.dashboard = None # Dashboard subprocess
+        # Per-connection outbound queue: high-water mark (frames) and what to do past it
+        self.send_queue_limit = send_queue_limit
+        self.slow_consumer_policy = slow_consumer_policy
+        # Capabilities offered in HELLO
+        self.caps = SERVER_CAPS if compress else SERVER_CAPS & ~protocol.CAP_COMPRESS
+        # Multi-process mode (--workers): rooms and logged-in pseudos are sharded between workers
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.handoff = handoff
+        self.async_core = None
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.clients = [] # List of ClientHandler
-        self.room_manager = RoomManager()
+        if worker_count > 1:
+            # Every worker listens on the same port, the kernel spreads connections
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.clients = ClientRegistry() # Logged-in ClientHandlers
+        # Rooms are opened on demand; each worker allocates the ids it owns
+        self.room_manager = RoomManager(max_rooms=max_rooms, max_players=room_size,
+                                        first_id=worker_index + 1, id_step=worker_count)
+        self.matchmaker = Matchmaker(self.room_manager)
+        self.lobby = Lobby(self.room_manager)
+        self.heartbeat = Heartbeat()
+        # Loaded in the background once listening, otherwise by the first letter played
+        self.preload_dictionary = preload_dictionary
+        self.startup = {} # Startup report, milliseconds since launch
         self.running = True
 
-    def start(self):
+    def start(self, dashboard=True):
         try:
-            self.server_socket.bind((HOST, PORT))
-            self.server_socket.listen(5)
-            logger.info(f"Server started on {HOST}:{PORT}")
+            self.server_socket.bind((HOST, self.port))
+            self.server_socket.listen(socket.SOMAXCONN)
+            logger.info(f"Server started on {HOST}:{self.port} ({self.mode} mode)")
         except Exception as e:
             logger.error(f"Failed to bind: {e}")
             sys.exit(1)
+        if self.peers:
+            self.peers.start()
+        if self.metrics_port:
+            from server.metrics import MetricsServer
+            try:
+                MetricsServer(self, self.metrics_port).start()
+            except OSError as e:
+                logger.error(f"Failed to start metrics endpoint: {e}")
+        if self.admin_port:
+            try:
+                AdminServer(self, self.admin_port).start()
+            except OSError as e:
+                logger.error(f"Failed to start admin API: {e}")
+                dashboard = False
 
         # Accept thread
-        accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        if self.mode == "async":
+            from server.controllers.async_client_handler import AsyncServerCore
+            self.async_core = AsyncServerCore(self, self.server_socket)
+            accept_thread = threading.Thread(target=self.async_core.run, daemon=True)
+        else:
+            accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+            # The async core ticks from its event loop instead
+            threading.Thread(target=self._tick_loop, daemon=True).start()
         accept_thread.start()
-        
-        # Start Admin Dashboard (Main Thread)
-        dashboard = AdminDashboard(self)
-        ft.run(dashboard.main)
+        self.startup_report()
+        if self.preload_dictionary:
+            threading.Thread(target=self._preload_dictionary, daemon=True).start()
+
+        if dashboard and self.admin_port:
+            # Separate process: UI rendering never holds this process's GIL
+            import subprocess
+            script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "views", "admin_dashboard.py")
+            self.dashboard = subprocess.Popen([sys.executable, script, "--admin-port", str(self.admin_port)])
+        accept_thread.join()
+
+    def startup_report(self):
+        ms = lambda t: round((t - LAUNCHED) * 1000, 1)
+        self.startup = {"imports": ms(IMPORTED), "init": ms(self.created), "listening": ms(time.perf_counter())}
+        logger.info(f"Startup: imports {self.startup['imports']} ms, server created at {self.startup['init']} ms, "
+                    f"accepting at {self.startup['listening']} ms")
+
+    def _preload_dictionary(self):
+        started = time.perf_counter()
+        get_dictionary()
+        logger.info(f"Dictionary preloaded in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def connection_accepted(self):
+        if "first_connection" not in self.startup:
+            self.startup["first_connection"] = round((time.perf_counter() - LAUNCHED) * 1000, 1)
+            logger.info(f"First connection accepted {self.startup['first_connection']} ms after launch")
 
     def _accept_loop(self):
         while self.running:
             try:
                 client_sock, addr = self.server_socket.accept()
+                self.connection_accepted()
                 
                 # Story #B01: Load Balancer simplified logic
                 # "Si plus de 5 clients sont connectés, refuse... et redirige"
-                if len(self.clients) >= 5: # Limit for test
-                    logger.info(f"Server full, rejecting {addr}")
-                    # Send specific error or redirect (Not fully spec'd how to redirect protocol-wise efficiently without custom opcode or just ERROR msg)
-                    # "redirige ... via un message ERROR ... vers un serveur secondaire"
-                    # Sending ERROR 0xFF + "REDIRECT:5001"
+                if self.should_redirect():
+                    logger.info(f"Server full, redirecting {addr}")
                     try:
-                        err_msg = protocol.pack_message(protocol.ERROR, b"FULL: Redirect to 5001")
-                        client_sock.sendall(err_msg)
+                        client_sock.sendall(self.full_message())
                         client_sock.close()
                     except:
                         pass
@@ -68,23 +154,122 @@ class GhostServer:
             except Exception as e:
                 logger.error(f"Accept error: {e}")
 
-    def register_client(self, handler):
-        self.clients.append(handler)
-        logger.info(f"Client registered: {handler.pseudo}")
+    def tick(self):
+        self.matchmaker.tick()
+        self.room_manager.collect_idle()
+        self.lobby.publish()
+        self.heartbeat.advance()
+
+    def _tick_loop(self):
+        while self.running:
+            time.sleep(self.TICK_INTERVAL)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Tick error: {e}")
+
+    def owns_room(self, room_id):
+        if self.worker_count <= 1:
+            return True
+        return (room_id - 1) % self.worker_count == self.worker_index
+
+    def hand_off(self, handler, join_payload):
+        # Pass the client socket to the worker owning the room, which replays the REQ_JOIN
+        room_id = int.from_bytes(join_payload, 'big')
+        target = (room_id - 1) % self.worker_count
+        state = {
+            "pseudo": handler.pseudo,
+            "addr": list(handler.addr),
+            "caps": handler.caps, # The target starts a new compression stream (COMPRESS_RESET)
+            "join": room_id,
+            "pending": handler.pending_bytes().hex()
+        }
+        logger.info(f"Handing {handler.pseudo} off to worker {target} (room {room_id})")
+        handler.flush(lambda: self._pass_connection(handler, target, state))
+
+    def _pass_connection(self, handler, target, state):
+        try:
+            self.handoff.send(target, handler.fileno(), state)
+        except (OSError, ValueError) as e: # Closed by the client meanwhile
+            logger.error(f"Handoff of {handler.pseudo} to worker {target} failed: {e}")
+        # Our copy of the socket is closed, the connection lives on in the target worker.
+        # The reader loop's own disconnect() when it ends is then a no-op
+        handler.disconnect()
+
+    def adopt_connection(self, sock, state):
+        addr = tuple(state["addr"])
+        pseudo = state["pseudo"]
+        caps = state["caps"]
+        join_payload = state["join"].to_bytes(4, 'big')
+        pending = bytes.fromhex(state["pending"])
+        logger.info(f"Adopting {pseudo} from another worker")
+        if self.async_core:
+            self.async_core.adopt(sock, pseudo, caps, join_payload, pending)
+            return
+        handler = ClientHandler(sock, addr, self)
+        handler.caps = caps
+        if not self.register_client(handler, pseudo):
+            # Pseudos are only unique within a worker: another client took it here
+            logger.warning(f"Refusing {pseudo} from another worker: pseudo already used here")
+            try:
+                sock.sendall(protocol.pack_message(protocol.ERROR, "Pseudo déjà utilisé".encode('utf-8')))
+            except OSError:
+                pass
+            sock.close()
+            return
+        handler.on_packet(protocol.REQ_JOIN, join_payload)
+        # Frames the client sent after REQ_JOIN: run() only reads frames() after its next recv
+        handler.decoder.feed(pending)
+        for opcode, payload in handler.decoder.frames():
+            handler.on_packet(opcode, payload)
+        handler.start()
+
+    def is_full(self):
+        return len(self.clients) >= self.max_clients
+
+    def should_redirect(self):
+        # New connections are turned away when full, or when overloaded while a peer has room
+        if self.is_full():
+            return True
+        return self.peers is not None and self.peers.overloaded() and self.peers.least_loaded() is not None
+
+    def full_message(self):
+        # REDIRECT to the least loaded peer, ERROR when no peer can take the client
+        target = self.peers.least_loaded() if self.peers else None
+        if target:
+            return protocol.pack_message(protocol.REDIRECT, protocol.pack_redirect(*target))
+        return protocol.pack_message(protocol.ERROR, b"Serveur plein")
+
+    def register_client(self, handler, pseudo):
+        # Atomic check-and-claim: False if another client already uses pseudo
+        if not self.clients.claim(pseudo, handler):
+            return False
+        handler.pseudo = pseudo
+        logger.info(f"Client registered: {pseudo}")
+        return True
 
     def unregister_client(self, handler):
-        if handler in self.clients:
-            self.clients.remove(handler)
+        if self.clients.release(handler):
             logger.info(f"Client unregistered: {handler.pseudo}")
 
     def is_pseudo_taken(self, pseudo):
-        for c in self.clients:
-            if c.pseudo == pseudo:
-                return True
-        return False
+        return pseudo in self.clients
+
+    def find_client(self, pseudo):
+        return self.clients.get(pseudo)
 
     def get_all_clients(self):
-        return list(self.clients)
+        return self.clients.all()
+
+    def kick_client(self, addr):
+        # Story #10: the other clients are told who was kicked
+        handler = self.clients.get_by_addr(addr)
+        if handler is None:
+            return False
+        logger.info(f"Kicking {handler.pseudo}")
+        self.broadcast_admin_message(f"{handler.pseudo or 'Un invité'} a été expulsé")
+        handler.disconnect()
+        return True
 
     def broadcast_admin_message(self, text):
         # Broadcast to all clients (in rooms or lobby?)
@@ -98,12 +283,70 @@ class GhostServer:
         }
         json_bytes = json.dumps(payload).encode('utf-8')
         msg = protocol.pack_message(protocol.DATA, json_bytes)
-        for c in self.clients:
+        for c in self.clients.all():
             try:
                 c.send_raw(msg)
             except:
                 pass
 
 if __name__ == "__main__":
-    server = GhostServer()
-    server.start()
+    parser = argparse.ArgumentParser(description="Ghost game server")
+    parser.add_argument("--mode", choices=["threads", "async"], default="threads",
+                        help="threads: one thread per client, async: single asyncio event loop")
+    parser.add_argument("--send-queue", type=int, default=256,
+                        help="outbound frames queued per client before the slow consumer policy applies")
+    parser.add_argument("--slow-consumer", choices=["drop", "coalesce", "disconnect"], default="drop",
+                        help="policy for clients whose send queue is full")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="do not offer compression of large frames to clients")
+    parser.add_argument("--room-size", type=int, default=2,
+                        help="players per room")
+    parser.add_argument("--max-rooms", type=int, default=1000,
+                        help="rooms opened on demand, at most (per worker)")
+    parser.add_argument("--port", type=int, default=PORT,
+                        help="TCP port (the UDP port with the same number receives peer load reports)")
+    parser.add_argument("--max-clients", type=int, default=MAX_CLIENTS,
+                        help="logged-in clients before new connections are redirected")
+    parser.add_argument("--peers", default="",
+                        help="comma-separated host:port of the other nodes to share load with")
+    parser.add_argument("--advertise", default="127.0.0.1",
+                        help="host name or IP peers give to the clients they redirect here")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics (worker i: PORT + i)")
+    parser.add_argument("--admin-port", type=int, default=None,
+                        help="local admin API port used by the dashboard (default: game port + 1000)")
+    parser.add_argument("--no-dashboard", action="store_true",
+                        help="do not start the dashboard process (the admin API still runs)")
+    parser.add_argument("--headless", action="store_true",
+                        help="no dashboard process and no admin API (production, test harnesses)")
+    parser.add_argument("--lazy-dictionary", action="store_true",
+                        help="load the dictionary when the first letter is played instead of in the background")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes sharing the port (SO_REUSEPORT), runs without dashboard")
+    args = parser.parse_args()
+    if not 2 <= args.room_size <= 254:
+        parser.error("--room-size must be between 2 and 254")
+    if args.peers and args.workers > 1:
+        parser.error("--peers cannot be combined with --workers")
+
+    if args.workers > 1:
+        from server.workers import WorkerPool
+        pool = WorkerPool(args.workers, args.mode,
+                          lambda mode, index, count, handoff: GhostServer(
+                              mode, index, count, handoff, args.send_queue, args.slow_consumer,
+                              not args.no_compress, args.room_size, args.max_rooms,
+                              args.port, args.max_clients, args.metrics_port))
+        pool.run()
+    else:
+        server = GhostServer(mode=args.mode, send_queue_limit=args.send_queue,
+                             slow_consumer_policy=args.slow_consumer, compress=not args.no_compress,
+                             room_size=args.room_size, max_rooms=args.max_rooms,
+                             port=args.port, max_clients=args.max_clients,
+                             metrics_port=args.metrics_port,
+                             admin_port=None if args.headless else args.admin_port or args.port + ADMIN_PORT_OFFSET,
+                             preload_dictionary=not args.lazy_dictionary)
+        if args.peers:
+            from server.cluster import PeerMonitor, parse_node
+            peers = [parse_node(p) for p in args.peers.split(",") if p]
+            server.peers = PeerMonitor(server, args.advertise, peers)
+        server.start(dashboard=not (args.no_dashboard or args.headless))
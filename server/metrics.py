@@ -0,0 +1,183 @@
+import bisect
+import threading
+
+from common import protocol, utils
+
+logger = utils.setup_logger("Metrics")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+# Client -> server opcodes, labelled by name
+OPCODE_NAMES = {getattr(protocol, name): name for name in (
+    "REQ_LOGIN", "REQ_JOIN", "REQ_LEAVE", "DATA", "REQ_LIST_ROOMS", "HELLO",
+    "REQ_SNAPSHOT", "REQ_MATCH", "REQ_SUBSCRIBE_ROOMS", "PING", "PONG")}
+
+def opcode_name(opcode):
+    return OPCODE_NAMES.get(opcode) or f"0x{opcode:02X}"
+
+def _labels(label, value, extra=""):
+    parts = [f'{label}="{value}"'] if label else []
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = {} # label value (None without label) -> total
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, value=None):
+        with self.lock:
+            self.values[value] = self.values.get(value, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = sorted(self.values.items(), key=lambda item: str(item[0]))
+        for value, total in items:
+            lines.append(f"{self.name}{_labels(self.label, value)} {total}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, label=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self.series = {} # label value -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, amount, value=None):
+        index = bisect.bisect_left(self.buckets, amount)
+        with self.lock:
+            series = self.series.get(value)
+            if series is None:
+                series = self.series[value] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted((value, list(series)) for value, series in self.series.items())
+        for value, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label, value, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, value)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label, value)} {cumulative}")
+        return lines
+
+class Gauge:
+    """
+    Read when scraped: fn() returns a number, or {label value: number}.
+    """
+    def __init__(self, name, help, fn, label=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.label = label
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            result = self.fn()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {e}")
+            return lines
+        if isinstance(result, dict):
+            for value, number in sorted(result.items()):
+                lines.append(f"{self.name}{_labels(self.label, value)} {number}")
+        else:
+            lines.append(f"{self.name} {result}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = {} # name -> metric, in registration order
+
+    def counter(self, name, help, label=None):
+        return self.metrics.setdefault(name, Counter(name, help, label))
+
+    def histogram(self, name, help, label=None, buckets=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, help, label, buckets))
+
+    def gauge(self, name, help, fn, label=None):
+        # Registering again replaces the callback (a new server in the same process)
+        self.metrics[name] = Gauge(name, help, fn, label)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry: each --workers process has its own
+REGISTRY = Registry()
+
+PACKETS = REGISTRY.counter("ghost_packets_total", "Frames received, by opcode", "opcode")
+HANDLER_SECONDS = REGISTRY.histogram("ghost_handler_seconds", "Time spent handling a frame, by opcode", "opcode")
+BYTES_IN = REGISTRY.counter("ghost_bytes_received_total", "Bytes read from client sockets")
+BYTES_OUT = REGISTRY.counter("ghost_bytes_sent_total", "Bytes written to client sockets, after compression")
+BROADCAST_SECONDS = REGISTRY.histogram("ghost_broadcast_seconds", "Time spent queueing a room broadcast, by kind", "kind")
+DICTIONARY_SECONDS = REGISTRY.histogram("ghost_dictionary_lookup_seconds", "Dictionary lookup time, by operation", "op")
+
+def register_server(server):
+    """
+    Gauges read from a GhostServer when the endpoint is scraped.
+    """
+    def queues():
+        depths = [len(handler.outbound) for handler in server.clients.all()]
+        return {"total": sum(depths), "max": max(depths, default=0)}
+
+    REGISTRY.gauge("ghost_clients", "Logged-in clients", lambda: len(server.clients))
+    REGISTRY.gauge("ghost_rooms_active", "Rooms with at least one player", server.room_manager.active_rooms)
+    REGISTRY.gauge("ghost_send_queue_frames", "Frames waiting in client send queues", queues, "stat")
+    REGISTRY.gauge("ghost_heartbeat_timers", "Pending heartbeat timers", lambda: len(server.heartbeat.wheel))
+    REGISTRY.gauge("ghost_matchmaking", "Matchmaking metrics (times in seconds)", server.matchmaker.metrics, "stat")
+
+def _handler_class():
+    # http.server is imported only when the endpoint is enabled (server startup time)
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # One request per scrape, not worth a log line
+
+    return Handler
+
+class MetricsServer:
+    """
+    --metrics-port: Prometheus text format on http://127.0.0.1:<port>/metrics.
+    """
+    def __init__(self, server, port, host="127.0.0.1"):
+        from http.server import ThreadingHTTPServer
+        register_server(server)
+        self.httpd = ThreadingHTTPServer((host, port), _handler_class())
+        self.httpd.daemon_threads = True
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        host, port = self.httpd.server_address
+        logger.info(f"Metrics on http://{host}:{port}/metrics")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,61 @@
+import threading
+
+class ClientRegistry:
+    """
+    Logged-in clients, indexed by pseudo and by address.
+    Every method takes the lock, so handlers on different threads (or the
+    event loop and the dashboard) can log in and out concurrently; lookups
+    are dictionary accesses whatever the number of connections.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_pseudo = {} # pseudo -> handler
+        self.by_addr = {}   # addr -> handler
+        self.pseudos = {}   # handler -> pseudo
+
+    def __len__(self):
+        return len(self.pseudos)
+
+    def __contains__(self, pseudo):
+        return pseudo in self.by_pseudo
+
+    def claim(self, pseudo, handler):
+        """
+        Registers handler under pseudo unless another client holds it.
+        Check and insert happen under one lock, so two logins racing for the
+        same pseudo cannot both succeed. Returns True on success.
+        """
+        with self.lock:
+            owner = self.by_pseudo.get(pseudo)
+            if owner is not None and owner is not handler:
+                return False
+            previous = self.pseudos.get(handler)
+            if previous is not None and previous != pseudo:
+                del self.by_pseudo[previous] # Logging in again under a new pseudo
+            self.by_pseudo[pseudo] = handler
+            self.pseudos[handler] = pseudo
+            if handler.addr is not None:
+                self.by_addr[tuple(handler.addr)] = handler
+            return True
+
+    def release(self, handler):
+        # Only removes the entries that still point to this handler
+        with self.lock:
+            pseudo = self.pseudos.pop(handler, None)
+            if pseudo is None:
+                return False
+            if self.by_pseudo.get(pseudo) is handler:
+                del self.by_pseudo[pseudo]
+            if handler.addr is not None and self.by_addr.get(tuple(handler.addr)) is handler:
+                del self.by_addr[tuple(handler.addr)]
+            return True
+
+    def get(self, pseudo):
+        return self.by_pseudo.get(pseudo)
+
+    def get_by_addr(self, addr):
+        return self.by_addr.get(tuple(addr))
+
+    def all(self):
+        with self.lock:
+            return list(self.pseudos)
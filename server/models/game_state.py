@@ -1,42 +1,25 @@
-import os
-
-import unicodedata
+import time
+from common.dictionary import get_dictionary
+from server import metrics
 
 class GameState:
     def __init__(self):
+        self.reset()
+
+    @property
+    def dictionary(self):
+        # Shared by every room, loaded on the first lookup (or preloaded by the server)
+        return get_dictionary()
+
+    def reset(self):
+        # Fresh game (the room is empty or recycled)
         self.frag = ""
         self.players = [] # List of pseudos
         self.scores = {} # pseudo -> letters (e.g. "G", "GH")
         self.current_player_idx = 0
-        self.dictionary = self.load_dictionary()
-
-    def remove_accents(self, input_str):
-        nfkd_form = unicodedata.normalize('NFKD', input_str)
-        return "".join([c for c in nfkd_form if not unicodedata.combining(c)])
-
-    def load_dictionary(self):
-        try:
-            # Construct absolute path to common/words.txt
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            words_path = os.path.join(current_dir, "..", "..", "common", "words.txt")
-            
-            with open(words_path, "r", encoding="utf-8") as f:
-                # Read all lines, strip whitespace, remove accents and convert to uppercase
-                words = set()
-                for line in f:
-                    if line.strip():
-                        normalized = self.remove_accents(line.strip()).upper()
-                        words.add(normalized)
-            
-            print(f"Dictionary loaded: {len(words)} words.")
-            return words
-        except Exception as e:
-            print(f"Error loading dictionary: {e}")
-            # Fallback to a small set if file fails
-            return {
-            "BONJOUR", "MONDE", "PYTHON", "RESEAU", "SOCKET", "GHOST", "TEST",
-            "MANGER", "TABLE", "CHAISE", "MAISON", "APPLE", "BANANA", "ORANGE"
-        }
+        # Versioned view of what was last broadcast (see publish)
+        self.seq = 0
+        self.published = None
 
     def add_player(self, pseudo):
         if pseudo not in self.players:
@@ -68,13 +51,19 @@ class GameState:
         self.frag += letter.upper()
         
         # Rule 1: If completes a valid word > 3 letters -> LOSE
-        if len(self.frag) > 3 and self.frag in self.dictionary:
-            return "LOSE_WORD"
+        if len(self.frag) > 3:
+            start = time.perf_counter()
+            is_word = self.dictionary.contains(self.frag)
+            metrics.DICTIONARY_SECONDS.observe(time.perf_counter() - start, "contains")
+            if is_word:
+                return "LOSE_WORD"
             
         # Rule 2: If the fragment is NOT a valid prefix (no word starts with it) -> LOSE
         # (This replaces the manual challenge)
-        is_valid_prefix = any(w.startswith(self.frag) for w in self.dictionary)
-        if not is_valid_prefix:
+        start = time.perf_counter()
+        is_prefix = self.dictionary.has_prefix(self.frag)
+        metrics.DICTIONARY_SECONDS.observe(time.perf_counter() - start, "has_prefix")
+        if not is_prefix:
             return "LOSE_INVALID"
             
         return "CONTINUE"
@@ -96,3 +85,35 @@ class GameState:
         if len(self.scores[pseudo]) >= 5:
             return "ELIMINATED"
         return "PUNISHED"
+
+    def publish(self, frag, active):
+        """
+        Records the state about to be broadcast (frag, active pseudo or None
+        while waiting) as a new version.
+        Returns (seq, changes): changes holds only the fields that differ
+        from the previous version ("frag", "active", "ghosts" as
+        {index: count}), or is None when a full snapshot is required (first
+        version, or players joined/left).
+        """
+        active_idx = self.players.index(active) if active in self.players else None
+        view = {
+            "frag": frag,
+            "active": active_idx,
+            "players": tuple(self.players),
+            "ghosts": tuple(len(self.scores[p]) for p in self.players)
+        }
+        previous = self.published
+        self.published = view
+        self.seq += 1
+
+        if previous is None or previous["players"] != view["players"]:
+            return self.seq, None
+        changes = {}
+        if previous["frag"] != frag:
+            changes["frag"] = frag
+        if previous["active"] != active_idx:
+            changes["active"] = active_idx
+        ghosts = {i: g for i, (old, g) in enumerate(zip(previous["ghosts"], view["ghosts"])) if old != g}
+        if ghosts:
+            changes["ghosts"] = ghosts
+        return self.seq, changes
@@ -0,0 +1,46 @@
+import threading
+from common import protocol, utils
+
+logger = utils.setup_logger("Lobby")
+
+class Lobby:
+    """
+    Clients subscribed to room changes (REQ_SUBSCRIBE_ROOMS) while they
+    are not in a room. publish() runs on the server tick: the rooms changed
+    since the previous tick are encoded once into a ROOM_UPDATE shared by
+    every subscriber, so the lobby costs one frame per tick with changes
+    instead of one ROOM_LIST per poll.
+    """
+    def __init__(self, room_manager):
+        self.room_manager = room_manager
+        self.subscribers = {} # handler -> None (insertion ordered set)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, handler):
+        # The current list first; updates follow from the next tick
+        with self.lock:
+            self.subscribers[handler] = None
+        handler.send_raw(self.room_manager.room_list_frame())
+
+    def unsubscribe(self, handler):
+        with self.lock:
+            self.subscribers.pop(handler, None)
+
+    def publish(self):
+        version, changes = self.room_manager.pop_changes()
+        if not changes:
+            return 0
+        with self.lock:
+            subscribers = list(self.subscribers)
+        if not subscribers:
+            return 0
+        frame = protocol.pack_message(protocol.ROOM_UPDATE, protocol.pack_room_update(version, changes))
+        for handler in subscribers:
+            try:
+                handler.send_raw(frame)
+            except Exception as e:
+                logger.error(f"Failed to send room update to {handler.pseudo}: {e}")
+        return len(subscribers)
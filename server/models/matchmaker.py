@@ -0,0 +1,89 @@
+import collections
+import threading
+import time
+from common import utils
+
+logger = utils.setup_logger("Matchmaker")
+
+class Matchmaker:
+    """
+    Players waiting for a game (REQ_MATCH). Every server tick the whole
+    queue is seated at once, filling open rooms before opening new ones, and
+    each player gets RESP_ROOM directly: no ROOM_LIST round trip and no race
+    between clients for the same room id.
+    Also keeps the matchmaking metrics (time to game, join failures).
+    """
+    SAMPLES = 1000 # Recent time-to-game samples kept for the percentiles
+
+    def __init__(self, room_manager):
+        self.room_manager = room_manager
+        self.queue = {} # handler -> enqueue time (monotonic), in arrival order
+        self.lock = threading.Lock()
+        self.matched = 0
+        self.time_to_game = collections.deque(maxlen=self.SAMPLES)
+        self.joins = 0 # REQ_JOIN requests
+        self.join_failures = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def enqueue(self, handler):
+        with self.lock:
+            if handler in self.queue:
+                return False
+            self.queue[handler] = time.monotonic()
+            return True
+
+    def cancel(self, handler):
+        with self.lock:
+            return self.queue.pop(handler, None) is not None
+
+    def record_join(self, ok):
+        with self.lock:
+            self.joins += 1
+            if not ok:
+                self.join_failures += 1
+
+    def tick(self, now=None):
+        """
+        Seats the queued players in arrival order. Returns how many were
+        seated; the others stay queued when max_rooms are all full.
+        """
+        now = time.monotonic() if now is None else now
+        placed = []
+        # Under the lock, so cancel() (disconnect) either removes a player
+        # before it is seated or finds current_room set and leaves the room;
+        # enter_room skips players that disconnected since
+        with self.lock:
+            for handler, since in list(self.queue.items()):
+                if not handler.running or handler.current_room:
+                    del self.queue[handler]
+                    continue
+                room = self.room_manager.join_any(handler)
+                if room is None:
+                    break
+                del self.queue[handler]
+                handler.current_room = room
+                placed.append((handler, room))
+                self.matched += 1
+                self.time_to_game.append(now - since)
+
+        for handler, room in placed:
+            handler.enter_room(room)
+        return len(placed)
+
+    def metrics(self):
+        with self.lock:
+            samples = sorted(self.time_to_game)
+            joins = self.joins
+            failures = self.join_failures
+            result = {
+                "queued": len(self.queue),
+                "matched": self.matched,
+                "joins": joins,
+                "join_failures": failures,
+            }
+        result["join_failure_rate"] = failures / joins if joins else 0.0
+        result["time_to_game_avg"] = sum(samples) / len(samples) if samples else 0.0
+        result["time_to_game_p95"] = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+        return result
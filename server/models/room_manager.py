@@ -1,15 +1,22 @@
+import threading
+import time
 from .game_state import GameState
-from common import utils
+from common import protocol, utils
+from server import metrics
 
 logger = utils.setup_logger("RoomManager")
 
 class Room:
-    def __init__(self, room_id, name):
+    def __init__(self, room_id, name, max_players=2):
         self.id = room_id
         self.name = name
         self.clients = [] # List of ClientHandler
         self.game_state = GameState()
-        self.max_players = 2
+        self.max_players = max_players
+        self.empty_since = time.monotonic()
+
+    def free_seats(self):
+        return self.max_players - len(self.clients)
 
     def add_client(self, client):
         if len(self.clients) >= self.max_players:
@@ -22,40 +29,229 @@ class Room:
         if client in self.clients:
             self.clients.remove(client)
             self.game_state.remove_player(client.pseudo)
+            if not self.clients:
+                self.empty_since = time.monotonic()
+                self.game_state.reset()
             return True
         return False
 
-    def broadcast(self, message, exclude=None):
+    def broadcast(self, message, exclude=None, key=None):
+        # message is encoded once and shared; send_raw only enqueues it
+        start = time.perf_counter()
         for client in self.clients:
             if client != exclude:
                 try:
-                    client.send_raw(message)
+                    client.send_raw(message, key)
                 except Exception as e:
                     logger.error(f"Failed to broadcast to {client.pseudo}: {e}")
+        metrics.BROADCAST_SECONDS.observe(time.perf_counter() - start, key or "message")
+
+    def broadcast_game_state(self, encode):
+        """
+        encode(fmt) builds the frame for one state format ("json", "binary"
+        or "delta"); each format is encoded at most once per broadcast.
+        """
+        start = time.perf_counter()
+        frames = {}
+        for client in self.clients:
+            fmt = protocol.state_format(client.caps)
+            if fmt not in frames:
+                frames[fmt] = encode(fmt)
+            try:
+                client.send_raw(frames[fmt], "GAME_STATE")
+            except Exception as e:
+                logger.error(f"Failed to broadcast to {client.pseudo}: {e}")
+        metrics.BROADCAST_SECONDS.observe(time.perf_counter() - start, "GAME_STATE")
 
 class RoomManager:
-    def __init__(self):
+    """
+    Elastic set of rooms. A new room is opened whenever the last free seat
+    is taken (up to max_rooms), rooms left empty for idle_timeout seconds
+    are closed (keeping at least min_rooms), and closed rooms go to a pool
+    to be reused instead of allocated.
+    Rooms are also indexed by number of free seats, so join_any() finds a
+    seat without scanning the rooms.
+    Room ids start at first_id and advance by id_step, so that each worker
+    (--workers) allocates the ids it owns.
+    Every change bumps version: the encoded ROOM_LIST is cached until the
+    next change, and the changed rooms are kept for the lobby's ROOM_UPDATE.
+    """
+    def __init__(self, min_rooms=3, max_rooms=1000, max_players=2, idle_timeout=60,
+                 pool_size=32, first_id=1, id_step=1):
+        self.min_rooms = min_rooms
+        self.max_rooms = max_rooms
+        self.max_players = max_players # Default room size
+        self.idle_timeout = idle_timeout
+        self.pool_size = pool_size
+        self.next_id = first_id
+        self.id_step = id_step
         self.rooms = {}
+        self.by_free_seats = {} # free seats -> {room_id: Room} (insertion ordered)
+        self.empty = {} # room_id -> Room, in the order they became empty
+        self.pool = [] # Closed rooms, reused by create_room
+        self.lock = threading.RLock()
+        self.version = 0
+        self.changed = {} # room_id -> Room (None once closed), since the last pop_changes()
+        self._list_frame = None
+        self._list_version = -1
         # Pre-create rooms (Story #03)
-        self.create_room(1, "Table 1")
-        self.create_room(2, "Table 2")
-        self.create_room(3, "Table 3")
+        for _ in range(min_rooms):
+            self.create_room()
 
-    def create_room(self, room_id, name):
-        self.rooms[room_id] = Room(room_id, name)
+    def create_room(self, name=None, max_players=None):
+        with self.lock:
+            room_id = self.next_id
+            self.next_id += self.id_step
+            name = name or f"Table {room_id}"
+            max_players = max_players or self.max_players
+            if self.pool:
+                room = self.pool.pop()
+                room.id = room_id
+                room.name = name
+                room.max_players = max_players
+                room.empty_since = time.monotonic()
+            else:
+                room = Room(room_id, name, max_players)
+            self.rooms[room_id] = room
+            self.empty[room_id] = room
+            self._index(room)
+            self._touch(room_id, room)
         logger.info(f"Room created: {name} (ID: {room_id})")
+        return room
+
+    def close_room(self, room):
+        with self.lock:
+            if room.clients or self.rooms.get(room.id) is not room:
+                return False
+            del self.rooms[room.id]
+            self.empty.pop(room.id, None)
+            self._unindex(room)
+            self._touch(room.id, None)
+            if len(self.pool) < self.pool_size:
+                self.pool.append(room)
+        logger.info(f"Room closed: {room.name} (ID: {room.id})")
+        return True
 
     def get_room(self, room_id):
         return self.rooms.get(room_id)
-    
+
+    def join(self, room, client):
+        # Seats client in room and keeps the free-seat index up to date
+        with self.lock:
+            if self.rooms.get(room.id) is not room:
+                return False
+            self._unindex(room)
+            added = room.add_client(client)
+            if added:
+                self.empty.pop(room.id, None)
+                self._touch(room.id, room)
+            self._index(room)
+            if added and room.free_seats() == 0 and not self._has_free_seat() and len(self.rooms) < self.max_rooms:
+                # Every room is full: open a new one for the next players
+                self.create_room()
+            return added
+
+    def join_any(self, client):
+        """
+        Seats client in the open room closest to full (so games start
+        sooner), opening a room if none has a free seat.
+        Returns the room, or None when max_rooms are all full.
+        """
+        with self.lock:
+            room = self.find_free_room()
+            if room is None:
+                if len(self.rooms) >= self.max_rooms:
+                    return None
+                room = self.create_room()
+            return room if self.join(room, client) else None
+
+    def leave(self, room, client):
+        with self.lock:
+            self._unindex(room)
+            removed = room.remove_client(client)
+            if self.rooms.get(room.id) is room:
+                self._index(room)
+                if removed:
+                    self._touch(room.id, room)
+                    if not room.clients:
+                        self.empty[room.id] = room
+        return removed
+
+    def active_rooms(self):
+        # Rooms with at least one player
+        return len(self.rooms) - len(self.empty)
+
+    def find_free_room(self):
+        # Bounded by the room size, not by the number of rooms
+        with self.lock:
+            for seats in sorted(self.by_free_seats):
+                if seats > 0:
+                    return next(iter(self.by_free_seats[seats].values()))
+            return None
+
+    def collect_idle(self, now=None):
+        """
+        Closes rooms that stayed empty for idle_timeout seconds, keeping
+        min_rooms open. Returns the number of rooms closed.
+        """
+        now = time.monotonic() if now is None else now
+        closed = 0
+        with self.lock:
+            # Oldest first: stop at the first room that has not been idle long enough
+            while self.empty and len(self.rooms) > self.min_rooms:
+                room = next(iter(self.empty.values()))
+                if now - room.empty_since < self.idle_timeout:
+                    break
+                self.close_room(room)
+                closed += 1
+        return closed
+
+    def room_list_frame(self):
+        # Encoded ROOM_LIST message, rebuilt only when a room changed since the last call
+        with self.lock:
+            if self._list_version != self.version:
+                self._list_frame = protocol.pack_message(protocol.ROOM_LIST, protocol.pack_room_list(
+                    (r.id, r.name, len(r.clients), r.max_players) for r in self.rooms.values()))
+                self._list_version = self.version
+            return self._list_frame
+
+    def pop_changes(self):
+        """
+        Returns (version, [(id, name, players, max)]) for the rooms changed
+        since the previous call; closed rooms have max 0.
+        """
+        with self.lock:
+            changes = [(room_id, room.name, len(room.clients), room.max_players) if room else (room_id, "", 0, 0)
+                       for room_id, room in self.changed.items()]
+            self.changed.clear()
+            return self.version, changes
+
     def list_rooms(self):
         # Returns list of dict info
         res = []
-        for r in self.rooms.values():
-            res.append({
-                "id": r.id,
-                "name": r.name,
-                "players": len(r.clients),
-                "max": r.max_players
-            })
+        with self.lock:
+            for r in self.rooms.values():
+                res.append({
+                    "id": r.id,
+                    "name": r.name,
+                    "players": len(r.clients),
+                    "max": r.max_players
+                })
         return res
+
+    def _has_free_seat(self):
+        return any(seats > 0 for seats in self.by_free_seats)
+
+    def _touch(self, room_id, room):
+        self.version += 1
+        self.changed[room_id] = room
+
+    def _index(self, room):
+        self.by_free_seats.setdefault(room.free_seats(), {})[room.id] = room
+
+    def _unindex(self, room):
+        bucket = self.by_free_seats.get(room.free_seats())
+        if bucket is not None:
+            bucket.pop(room.id, None)
+            if not bucket:
+                del self.by_free_seats[room.free_seats()]
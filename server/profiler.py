@@ -0,0 +1,217 @@
+"""
+Wall-clock sampling profiler of the opcode handlers, turned on and off at
+runtime through the admin API (no restart). Samples are folded stacks, one
+per line ("DATA;client_handler.py:handle_game_data;... 42"), the input
+format of flamegraph.pl and speedscope.
+
+Usage: python3 server/profiler.py [--admin-port 6000] start [--opcodes DATA,REQ_JOIN] [--clients Alice,127.0.0.1:40312]
+       python3 server/profiler.py [--admin-port 6000] dump|stop [--output handlers.folded]
+"""
+import sys
+import os
+import argparse
+import collections
+import threading
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import dispatch, protocol, utils
+from server import metrics
+
+logger = utils.setup_logger("Profiler")
+
+SAMPLE_INTERVAL = 0.001 # Seconds between two samples
+MAX_DURATION = 300 # Seconds before a profiler left running stops by itself
+
+def parse_opcode(name):
+    # "DATA", "data" or a number
+    if name.isdigit():
+        return int(name)
+    opcode = getattr(protocol, name.upper(), None)
+    if not isinstance(opcode, int):
+        raise ValueError(f"unknown opcode: {name}")
+    return opcode
+
+class SamplingProfiler:
+    """
+    Dispatcher middleware. While a selected handler runs, a sampling thread
+    records its thread's stack every interval, labelled with the opcode.
+    opcodes: opcode numbers, clients: pseudos or "ip:port"; None selects all.
+    Costs nothing once removed; while installed, unselected packets pay one
+    set lookup.
+    Handlers usually run for less than the GIL switch interval (5 ms): the
+    sampler would only get the GIL once they are done. The interval is
+    lowered while profiling so that it can interrupt them, and restored by
+    the sampling thread whenever it ends: stop(), a failed start() or after
+    duration seconds.
+    """
+    def __init__(self, dispatcher, opcodes=None, clients=None, interval=SAMPLE_INTERVAL,
+                 duration=MAX_DURATION):
+        self.dispatcher = dispatcher
+        self.opcodes = set(opcodes) if opcodes else None
+        self.clients = set(clients) if clients else None
+        self.interval = interval
+        self.duration = duration
+        self.active = {} # Thread id -> label of the profiled handler it runs
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.switch_interval = None # Interpreter setting to restore when sampling ends
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stacks = collections.Counter() # Folded stack -> samples
+            self.calls = collections.Counter()
+            self.seconds = collections.Counter()
+            self.started = time.time()
+
+    def start(self):
+        self.switch_interval = sys.getswitchinterval()
+        self.running = True
+        try:
+            sys.setswitchinterval(min(self.switch_interval, self.interval / 20))
+            self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self.thread.start()
+            self.dispatcher.use(self)
+        except BaseException:
+            self.stop()
+            raise
+        logger.info(f"Profiling {self.describe()}")
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self._restore()
+
+    def _restore(self):
+        # Idempotent: from stop() and from the sampling thread
+        with self.lock:
+            self.dispatcher.remove(self)
+            if self.switch_interval is None:
+                return
+            sys.setswitchinterval(self.switch_interval)
+            self.switch_interval = None
+        logger.info("Profiling stopped")
+
+    def describe(self):
+        opcodes = ",".join(sorted(metrics.opcode_name(o) for o in self.opcodes)) if self.opcodes else "all opcodes"
+        clients = ",".join(sorted(self.clients)) if self.clients else "all clients"
+        return f"{opcodes} from {clients}"
+
+    def selected(self, conn, opcode):
+        if self.opcodes is not None and opcode not in self.opcodes:
+            return False
+        if self.clients is not None:
+            addr = f"{conn.addr[0]}:{conn.addr[1]}" if conn.addr else None
+            return conn.pseudo in self.clients or addr in self.clients
+        return True
+
+    def __call__(self, conn, opcode, payload, call_next):
+        if not self.selected(conn, opcode):
+            call_next(conn, opcode, payload)
+            return
+        label = metrics.opcode_name(opcode)
+        thread = threading.get_ident()
+        outer = self.active.get(thread) # A handler may dispatch another packet (handoff)
+        self.active[thread] = label
+        start = time.perf_counter()
+        try:
+            call_next(conn, opcode, payload)
+        finally:
+            elapsed = time.perf_counter() - start
+            if outer is None:
+                del self.active[thread]
+            else:
+                self.active[thread] = outer
+            with self.lock:
+                self.calls[label] += 1
+                self.seconds[label] += elapsed
+
+    def _sample_loop(self):
+        deadline = time.monotonic() + self.duration
+        try:
+            while self.running and time.monotonic() < deadline:
+                time.sleep(self.interval)
+                if not self.active:
+                    continue
+                frames = sys._current_frames()
+                for thread, label in list(self.active.items()):
+                    frame = frames.get(thread)
+                    if frame is not None:
+                        stack = self.fold(label, frame)
+                        with self.lock:
+                            self.stacks[stack] += 1
+        finally:
+            self.running = False
+            self._restore()
+
+    def fold(self, label, frame):
+        # Frames from the handler down to frame, under the opcode label
+        names = []
+        while frame is not None and frame.f_code is not _MIDDLEWARE_CODE:
+            code = frame.f_code
+            if code.co_filename != dispatch.__file__: # Chain plumbing
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        names.append(label)
+        return ";".join(reversed(names))
+
+    def dump(self, reset=False):
+        with self.lock:
+            report = {
+                "profiling": self.describe(),
+                "seconds": round(time.time() - self.started, 1),
+                "samples": sum(self.stacks.values()),
+                "handlers": {label: {"calls": self.calls[label], "seconds": round(self.seconds[label], 6)}
+                             for label in sorted(self.calls)},
+                "folded": "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items())),
+            }
+        if reset:
+            self.reset()
+        return report
+
+_MIDDLEWARE_CODE = SamplingProfiler.__call__.__code__
+
+
+def main():
+    from server.admin_api import AdminClient, ADMIN_PORT_OFFSET
+    parser = argparse.ArgumentParser(description="Profile the opcode handlers of a running server")
+    parser.add_argument("--admin-port", type=int, default=5000 + ADMIN_PORT_OFFSET)
+    parser.add_argument("command", choices=["start", "dump", "stop"])
+    parser.add_argument("--opcodes", default="", help="comma-separated opcode names (default: all)")
+    parser.add_argument("--clients", default="", help="comma-separated pseudos or ip:port (default: all)")
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=MAX_DURATION, help="seconds before profiling stops by itself")
+    parser.add_argument("--output", help="write the folded stacks to this file (default: stdout)")
+    args = parser.parse_args()
+
+    api = AdminClient(args.admin_port)
+    if args.command == "start":
+        reply = api.call({"cmd": "profile_start", "interval": args.interval, "duration": args.duration,
+                          "opcodes": [o for o in args.opcodes.split(",") if o],
+                          "clients": [c for c in args.clients.split(",") if c]})
+    else:
+        reply = api.call({"cmd": f"profile_{args.command}"})
+    if not reply.get("ok"):
+        sys.exit(f"Error: {reply.get('error')}")
+    if args.command == "start":
+        print(f"Profiling {reply['profiling']}")
+        return
+
+    print(f"{reply['profiling']}: {reply['samples']} samples in {reply['seconds']} s", file=sys.stderr)
+    for label, stats in reply["handlers"].items():
+        print(f"  {label:<20}{stats['calls']:>8} calls{stats['seconds'] * 1000:>12.1f} ms", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(reply["folded"])
+        print(f"Folded stacks written to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(reply["folded"])
+
+
+if __name__ == "__main__":
+    main()
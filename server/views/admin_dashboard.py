@@ -1,13 +1,31 @@
 import socket
+import sys
+import os
+import argparse
 import flet as ft
 import asyncio
-import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from server.admin_api import AdminClient, ADMIN_PORT_OFFSET
 
 class AdminDashboard:
-    def __init__(self, server_app):
-        self.server = server_app
+    """
+    Runs in its own process (started by server/main.py) and reads the
+    server's state from the admin API snapshot; kick and broadcast are
+    admin API commands.
+    """
+    PAGE_SIZE = 50 # Clients shown at once
+
+    def __init__(self, api):
+        self.api = api # admin_api.AdminClient
+        self.snapshot = None
         self.page = None
         self.client_to_kick = None
+        self.rows = {} # addr -> (DataRow, [cell Text]), kept across refreshes
+        self.visible = [] # addrs of the rows in the table, in order
+        self.client_page = 0
 
     def get_local_ip(self):
         try:
@@ -27,6 +45,8 @@ class AdminDashboard:
         page.theme_mode = ft.ThemeMode.DARK
         
         local_ip = self.get_local_ip()
+        self.port_text = ft.Text("Port: -", size=20, color=ft.Colors.GREEN)
+        self.status_text = ft.Text("", size=12, color=ft.Colors.RED)
         
         self.client_list = ft.DataTable(
             columns=[
@@ -41,6 +61,10 @@ class AdminDashboard:
         )
         
         self.broadcast_input = ft.TextField(label="Message Diffusé", expand=True)
+        self.matchmaking_text = ft.Text("", size=12, color=ft.Colors.GREY)
+        self.page_text = ft.Text("", size=12)
+        self.prev_button = ft.TextButton("Précédent", on_click=lambda e: self.change_page(-1))
+        self.next_button = ft.TextButton("Suivant", on_click=lambda e: self.change_page(1))
         
         # Confirmation Dialog
         self.confirm_dialog = ft.AlertDialog(
@@ -57,8 +81,11 @@ class AdminDashboard:
         def send_broadcast(e):
             msg = self.broadcast_input.value
             if msg:
-                self.server.broadcast_admin_message(msg)
-                self.broadcast_input.value = ""
+                try:
+                    self.api.broadcast(msg)
+                    self.broadcast_input.value = ""
+                except (OSError, ValueError) as ex:
+                    self.status_text.value = f"Diffusion impossible: {ex}"
                 page.update()
 
         page.add(
@@ -66,7 +93,7 @@ class AdminDashboard:
             ft.Container(
                 content=ft.Column([
                     ft.Text(f"Server IP: {local_ip}", size=20, color=ft.Colors.GREEN),
-                    ft.Text(f"Port: 5000", size=20, color=ft.Colors.GREEN),
+                    self.port_text,
                     ft.Text("Partagez cette IP avec les clients pour qu'ils se connectent.", size=12, color=ft.Colors.GREY),
                 ]),
                 padding=10,
@@ -78,6 +105,9 @@ class AdminDashboard:
             ft.Row([self.broadcast_input, ft.ElevatedButton("Envoyer", on_click=send_broadcast)]),
             ft.Divider(),
             ft.Text("Clients Connectés"),
+            self.status_text,
+            self.matchmaking_text,
+            ft.Row([self.prev_button, self.page_text, self.next_button]),
             self.client_list
         )
         
@@ -93,41 +123,105 @@ class AdminDashboard:
             try:
                 # Only refresh if dialog is not open to avoid UI conflicts
                 if not self.confirm_dialog.open:
+                    await self.fetch_snapshot()
                     self.refresh_data()
                 await asyncio.sleep(1)
             except Exception as e:
                 print(f"Admin Loop Error: {e}")
                 await asyncio.sleep(1)
 
+    async def fetch_snapshot(self):
+        # In a worker thread, so a slow server does not freeze the UI
+        try:
+            self.snapshot = await asyncio.to_thread(self.api.snapshot)
+            self.set_text(self.status_text, "")
+        except (OSError, ValueError) as e:
+            self.set_text(self.status_text, f"Serveur injoignable: {e}")
+            if self.page: self.page.update()
+
     def refresh_data(self):
-        if not self.page: return
-        
-        rows = []
-        clients = self.server.get_all_clients()
-        
-        for c in clients:
-            # Story #10: Kick
-            kick_btn = ft.ElevatedButton(
-                "Ejecter", 
-                on_click=lambda e, client=c: self.prepare_kick(client),
-                bgcolor=ft.Colors.RED, color=ft.Colors.WHITE
-            )
-            
-            rows.append(ft.DataRow(cells=[
-                ft.DataCell(ft.Text(c.addr[0])),
-                ft.DataCell(ft.Text(str(c.addr[1]))),
-                ft.DataCell(ft.Text(c.pseudo or "Invité")),
-                ft.DataCell(ft.Text(c.current_room.name if c.current_room else "-")),
-                ft.DataCell(ft.Text(f"il y a {time.time() - c.last_packet:.1f}s")),
-                ft.DataCell(kick_btn),
-            ]))
-        
-        self.client_list.rows = rows
-        self.page.update()
+        """
+        Updates the table in place: rows are kept per connection and only
+        the cells whose text changed are modified, so page.update() sends
+        the differences to the front end. Only the current page is built.
+        """
+        if not self.page or not self.snapshot: return
+
+        snapshot = self.snapshot
+        clients = snapshot["clients"]
+        pages = max(1, -(-len(clients) // self.PAGE_SIZE))
+        self.client_page = min(self.client_page, pages - 1)
+        first = self.client_page * self.PAGE_SIZE
+        shown = clients[first:first + self.PAGE_SIZE]
+        changed = self.set_text(self.port_text, f"Port: {snapshot['port']}")
+
+        visible = []
+        for c in shown:
+            addr = (c[0], c[1])
+            values = self.row_values(c)
+            row = self.rows.get(addr)
+            if row is None:
+                self.rows[addr] = self.build_row(addr, values)
+                changed = True
+            else:
+                for text, value in zip(row[1], values):
+                    changed |= self.set_text(text, value)
+            visible.append(addr)
 
-    def prepare_kick(self, client):
-        print(f"Preparing to kick {client.pseudo}")
-        self.client_to_kick = client
+        if visible != self.visible:
+            self.visible = visible
+            self.client_list.rows = [self.rows[addr][0] for addr in visible]
+            # Rows of clients gone or on other pages are dropped, rebuilt if they come back
+            self.rows = {addr: self.rows[addr] for addr in visible}
+            changed = True
+
+        changed |= self.set_text(self.page_text, f"Page {self.client_page + 1}/{pages} ({len(clients)} clients)")
+        for button, disabled in ((self.prev_button, self.client_page == 0),
+                                 (self.next_button, self.client_page >= pages - 1)):
+            if button.disabled != disabled:
+                button.disabled = disabled
+                changed = True
+
+        m = snapshot["matchmaking"]
+        changed |= self.set_text(self.matchmaking_text, (
+            f"File d'attente: {m['queued']} | Parties trouvées: {m['matched']} | "
+            f"Temps moyen: {m['time_to_game_avg']:.2f}s (p95 {m['time_to_game_p95']:.2f}s) | "
+            f"Echecs de REQ_JOIN: {m['join_failure_rate']:.1%}"
+        ))
+        if changed:
+            self.page.update()
+
+    @staticmethod
+    def row_values(c):
+        # Snapshot row: [ip, port, pseudo, room, idle seconds, queued frames]
+        ip, port, pseudo, room, idle, _ = c
+        return [ip, str(port), pseudo or "Invité", room or "-", f"il y a {idle:.1f}s"]
+
+    @staticmethod
+    def set_text(text, value):
+        if text.value == value:
+            return False
+        text.value = value
+        return True
+
+    def build_row(self, addr, values):
+        texts = [ft.Text(value) for value in values]
+        # Story #10: Kick
+        kick_btn = ft.ElevatedButton(
+            "Ejecter",
+            on_click=lambda e: self.prepare_kick(addr, texts[2].value),
+            bgcolor=ft.Colors.RED, color=ft.Colors.WHITE
+        )
+        row = ft.DataRow(cells=[ft.DataCell(text) for text in texts] + [ft.DataCell(kick_btn)])
+        return (row, texts)
+
+    def change_page(self, step):
+        self.client_page = max(0, self.client_page + step)
+        self.refresh_data()
+
+    def prepare_kick(self, addr, pseudo):
+        print(f"Preparing to kick {pseudo}")
+        self.client_to_kick = addr
         
         # Ensure we don't duplicate
         if self.confirm_dialog not in self.page.overlay:
@@ -139,12 +233,11 @@ class AdminDashboard:
     def confirm_kick(self, e):
         print("Confirmed Kick")
         if self.client_to_kick:
-            print(f"Kicking {self.client_to_kick.pseudo}")
-            # Story #10: Message aux autres clients
-            pseudo = self.client_to_kick.pseudo or "Un invité"
-            self.server.broadcast_admin_message(f"{pseudo} a été expulsé")
-            
-            self.client_to_kick.disconnect()
+            # Story #10: the server tells the other clients
+            try:
+                self.api.kick(self.client_to_kick)
+            except (OSError, ValueError) as ex:
+                self.status_text.value = f"Expulsion impossible: {ex}"
             self.client_to_kick = None
             
         self.close_dialog()
@@ -158,3 +251,11 @@ class AdminDashboard:
         self.confirm_dialog.open = False
         self.page.update()
 
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ghost server admin dashboard")
+    parser.add_argument("--admin-port", type=int, default=5000 + ADMIN_PORT_OFFSET,
+                        help="admin API port of the server (default: 6000, for a server on port 5000)")
+    args = parser.parse_args()
+    dashboard = AdminDashboard(AdminClient(args.admin_port))
+    ft.run(dashboard.main)
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import signal
+import socket
+import threading
+
+from common import dictionary, utils
+
+logger = utils.setup_logger("Workers")
+
+# Handoff datagram: JSON state + the client socket passed with SCM_RIGHTS
+HANDOFF_MAX_SIZE = 64 * 1024
+
+class HandoffChannel:
+    """
+    Unix datagram sockets connecting the workers. A worker that receives a
+    REQ_JOIN for a room owned by another worker sends the client socket and
+    its session state to the owner, which adopts the connection.
+    """
+    def __init__(self, count):
+        self.count = count
+        pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM) for _ in range(count)]
+        self.inboxes = [recv for recv, _ in pairs]
+        self.outboxes = [send for _, send in pairs]
+        self.index = None
+
+    def bind_worker(self, index):
+        # Keep only our inbox (and every outbox) in this worker
+        self.index = index
+        for i, inbox in enumerate(self.inboxes):
+            if i != index:
+                inbox.close()
+
+    def send(self, target, fd, state):
+        data = json.dumps(state).encode('utf-8')
+        socket.send_fds(self.outboxes[target], [data], [fd])
+
+    def receive_loop(self, server):
+        inbox = self.inboxes[self.index]
+        while server.running:
+            try:
+                data, fds, _, _ = socket.recv_fds(inbox, HANDOFF_MAX_SIZE, 1)
+            except OSError as e:
+                logger.error(f"Handoff receive error: {e}")
+                break
+            if not fds:
+                continue
+            try:
+                state = json.loads(data.decode('utf-8'))
+                sock = socket.socket(fileno=fds[0])
+                server.adopt_connection(sock, state)
+            except Exception as e:
+                logger.error(f"Handoff adopt error: {e}")
+
+class WorkerPool:
+    """
+    --workers N: forks N server processes that all accept on the same port
+    (SO_REUSEPORT). The dictionary is loaded before forking so its pages are
+    shared copy-on-write. Room r is owned by worker (r - 1) % N.
+    """
+    def __init__(self, count, mode, server_factory):
+        self.count = count
+        self.mode = mode
+        self.server_factory = server_factory # (mode, worker_index, worker_count, handoff) -> GhostServer
+        self.pids = []
+
+    def run(self):
+        dictionary.get_dictionary() # Preload once, shared by every worker
+        handoff = HandoffChannel(self.count)
+
+        for index in range(self.count):
+            pid = os.fork()
+            if pid == 0:
+                self._run_worker(index, handoff)
+                os._exit(0)
+            self.pids.append(pid)
+            logger.info(f"Worker {index} started (pid {pid})")
+
+        for inbox in handoff.inboxes:
+            inbox.close()
+        for outbox in handoff.outboxes:
+            outbox.close()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        self._wait()
+
+    def _run_worker(self, index, handoff):
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        handoff.bind_worker(index)
+        server = self.server_factory(self.mode, index, self.count, handoff)
+        threading.Thread(target=handoff.receive_loop, args=(server,), daemon=True).start()
+        try:
+            server.start(dashboard=False)
+        except KeyboardInterrupt:
+            pass
+
+    def _wait(self):
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            if pid in self.pids:
+                self.pids.remove(pid)
+                logger.info(f"Worker pid {pid} exited ({status})")
+
+    def _stop(self, signum, frame):
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
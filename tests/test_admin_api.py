@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.admin_api import AdminServer, AdminClient
+from server.models.matchmaker import Matchmaker
+from server.models.room_manager import RoomManager
+from server.controllers.outbound import OutboundQueue
+
+class FakeHandler:
+    def __init__(self, pseudo, port):
+        self.pseudo = pseudo
+        self.addr = ("127.0.0.1", port)
+        self.current_room = None
+        self.last_packet = time.time()
+        self.outbound = OutboundQueue()
+        self.disconnected = False
+
+    def disconnect(self):
+        self.disconnected = True
+
+class FakeServer:
+    def __init__(self):
+        self.port = 5000
+        self.mode = "threads"
+        self.max_clients = 10
+        self.running = True
+        self.room_manager = RoomManager(min_rooms=2)
+        self.matchmaker = Matchmaker(self.room_manager)
+        self.clients = [FakeHandler("alice", 4001), FakeHandler("bob", 4002)]
+        self.broadcasts = []
+
+    def get_all_clients(self):
+        return list(self.clients)
+
+    def kick_client(self, addr):
+        for c in self.clients:
+            if c.addr == addr:
+                c.disconnect()
+                return True
+        return False
+
+    def broadcast_admin_message(self, text):
+        self.broadcasts.append(text)
+
+class TestAdminAPI(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.server.room_manager.join(self.server.room_manager.get_room(1), self.server.clients[0])
+        self.server.clients[0].current_room = self.server.room_manager.get_room(1)
+        self.api = AdminServer(self.server, 0)
+        self.api.start()
+        self.client = AdminClient(self.api.tcp.server_address[1])
+        self.addCleanup(self.api.stop)
+        self.addCleanup(self.client.close)
+
+    def test_snapshot(self):
+        snapshot = self.client.snapshot()
+        self.assertEqual(snapshot["port"], 5000)
+        self.assertEqual([c[2] for c in snapshot["clients"]], ["alice", "bob"])
+        self.assertEqual(snapshot["clients"][0][3], "Table 1")
+        self.assertEqual(snapshot["rooms"], [[1, "Table 1", 1, 2]])
+        self.assertIn("queued", snapshot["matchmaking"])
+
+    def test_kick_and_broadcast(self):
+        self.assertTrue(self.client.kick(("127.0.0.1", 4002)))
+        self.assertTrue(self.server.clients[1].disconnected)
+        self.assertFalse(self.client.kick(("127.0.0.1", 9999)))
+        self.assertTrue(self.client.broadcast("Bonjour"))
+        self.assertEqual(self.server.broadcasts, ["Bonjour"])
+
+    def test_unknown_command(self):
+        reply = self.client.call({"cmd": "reboot"})
+        self.assertFalse(reply["ok"])
+
+if __name__ == '__main__':
+    unittest.main()
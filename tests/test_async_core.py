@@ -0,0 +1,126 @@
+import unittest
+import socket
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server.cluster import PeerMonitor
+from server.controllers.async_client_handler import AsyncServerCore
+from server.main import GhostServer
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+class AsyncServerTest(unittest.TestCase):
+    """
+    Runs a GhostServer in async mode on an ephemeral port, without the
+    dashboard or the blocking start().
+    """
+    server_options = {}
+
+    def setUp(self):
+        self.server = GhostServer(mode="async", port=0, **self.server_options)
+        self.addCleanup(self.server.server_socket.close)
+        self.server.server_socket.bind(("127.0.0.1", 0))
+        self.server.server_socket.listen()
+        self.port = self.server.server_socket.getsockname()[1]
+        self.server.async_core = AsyncServerCore(self.server, self.server.server_socket)
+        threading.Thread(target=self.server.async_core.run, daemon=True).start()
+        self.assertTrue(self.server.async_core.ready.wait(2.0))
+        self.addCleanup(setattr, self.server, "running", False)
+
+    def connect(self):
+        sock = socket.create_connection(("127.0.0.1", self.port))
+        sock.settimeout(2.0)
+        self.addCleanup(sock.close)
+        return sock
+
+    def read_frame(self, sock, decoder):
+        # Next (opcode, payload) sent by the server, None on EOF
+        while True:
+            for opcode, payload in decoder.frames():
+                return opcode, bytes(payload)
+            if not decoder.recv_into(sock):
+                return None
+
+    def login(self, pseudo):
+        sock = self.connect()
+        decoder = protocol.FrameDecoder()
+        sock.sendall(protocol.pack_message(protocol.REQ_LOGIN, pseudo))
+        return sock, self.read_frame(sock, decoder)
+
+class TestLogin(AsyncServerTest):
+    def test_login_and_duplicate_pseudo(self):
+        sock, reply = self.login("Alice")
+        self.assertEqual(reply, (protocol.RESP_LOGIN, b'\x00'))
+        self.assertIsNotNone(self.server.find_client("Alice"))
+        _, reply = self.login("Alice")
+        self.assertEqual(reply, (protocol.RESP_LOGIN, b'\x01'))
+
+    def test_hello_then_room_list(self):
+        sock = self.connect()
+        decoder = protocol.FrameDecoder()
+        sock.sendall(protocol.pack_message(protocol.HELLO, bytes([protocol.CAP_BINARY_STATE]))
+                     + protocol.pack_message(protocol.REQ_LOGIN, "Bob")
+                     + protocol.pack_message(protocol.REQ_LIST_ROOMS))
+        self.assertEqual(self.read_frame(sock, decoder), (protocol.HELLO, bytes([protocol.CAP_BINARY_STATE])))
+        self.assertEqual(self.read_frame(sock, decoder), (protocol.RESP_LOGIN, b'\x00'))
+        opcode, payload = self.read_frame(sock, decoder)
+        self.assertEqual(opcode, protocol.ROOM_LIST)
+        self.assertEqual([room[0] for room in protocol.unpack_room_list(payload)], [1, 2, 3])
+
+class TestFullServer(AsyncServerTest):
+    server_options = {"max_clients": 1}
+
+    def setUp(self):
+        super().setUp()
+        _, reply = self.login("Alice")
+        self.assertEqual(reply, (protocol.RESP_LOGIN, b'\x00'))
+
+    def test_error_without_peers(self):
+        sock = self.connect()
+        decoder = protocol.FrameDecoder()
+        self.assertEqual(self.read_frame(sock, decoder), (protocol.ERROR, b"Serveur plein"))
+        self.assertIsNone(self.read_frame(sock, decoder))
+
+    def test_redirect_to_peer(self):
+        monitor = PeerMonitor(self.server, "127.0.0.1", [("127.0.0.1", 5001)])
+        self.addCleanup(monitor.stop)
+        monitor.loads[("127.0.0.1", 5001)] = {"node": ["127.0.0.1", 5001], "connections": 0, "max": 10,
+                                               "rooms": 0, "cpu": 0.0, "seen": time.monotonic()}
+        self.server.peers = monitor
+        sock = self.connect()
+        decoder = protocol.FrameDecoder()
+        opcode, payload = self.read_frame(sock, decoder)
+        self.assertEqual(opcode, protocol.REDIRECT)
+        self.assertEqual(protocol.unpack_redirect(payload), ("127.0.0.1", 5001))
+        self.assertIsNone(self.read_frame(sock, decoder))
+
+class TestSlowConsumer(AsyncServerTest):
+    server_options = {"send_queue_limit": 4, "slow_consumer_policy": "disconnect"}
+
+    def test_client_that_stops_reading_is_evicted(self):
+        sock, reply = self.login("Alice")
+        self.assertEqual(reply, (protocol.RESP_LOGIN, b'\x00'))
+        handler = self.server.find_client("Alice")
+        # Small kernel buffers: the transport buffer fills after a few frames
+        handler.transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        frame = protocol.pack_message(protocol.DATA, b"x" * 4096)
+        for _ in range(200): # 800 KB, never read by Alice
+            handler.send_raw(frame)
+        self.assertTrue(wait_for(lambda: self.server.find_client("Alice") is None))
+        self.assertFalse(handler.running)
+        # The event loop still serves the others
+        _, reply = self.login("Bob")
+        self.assertEqual(reply, (protocol.RESP_LOGIN, b'\x00'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.models.client_registry import ClientRegistry
+
+class FakeHandler:
+    def __init__(self, port):
+        self.addr = ("127.0.0.1", port)
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ClientRegistry()
+
+    def test_claim_and_lookup(self):
+        alice = FakeHandler(1000)
+        self.assertTrue(self.registry.claim("Alice", alice))
+        self.assertIs(self.registry.get("Alice"), alice)
+        self.assertIs(self.registry.get_by_addr(["127.0.0.1", 1000]), alice)
+        self.assertIn("Alice", self.registry)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_pseudo_taken(self):
+        self.assertTrue(self.registry.claim("Alice", FakeHandler(1000)))
+        self.assertFalse(self.registry.claim("Alice", FakeHandler(1001)))
+        self.assertEqual(len(self.registry), 1)
+
+    def test_release(self):
+        alice = FakeHandler(1000)
+        self.registry.claim("Alice", alice)
+        self.assertFalse(self.registry.release(FakeHandler(1000)))
+        self.assertTrue(self.registry.release(alice))
+        self.assertIsNone(self.registry.get("Alice"))
+        self.assertIsNone(self.registry.get_by_addr(("127.0.0.1", 1000)))
+        self.assertTrue(self.registry.claim("Alice", FakeHandler(1001)))
+
+    def test_new_pseudo_frees_the_old_one(self):
+        alice = FakeHandler(1000)
+        self.registry.claim("Alice", alice)
+        self.registry.claim("Alicia", alice)
+        self.assertNotIn("Alice", self.registry)
+        self.assertEqual(self.registry.all(), [alice])
+
+    def test_concurrent_claims(self):
+        handlers = [FakeHandler(2000 + i) for i in range(32)]
+        barrier = threading.Barrier(len(handlers))
+        won = []
+
+        def login(handler):
+            barrier.wait()
+            if self.registry.claim("Alice", handler):
+                won.append(handler)
+
+        threads = [threading.Thread(target=login, args=(h,)) for h in handlers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(won), 1)
+        self.assertIs(self.registry.get("Alice"), won[0])
+
+if __name__ == '__main__':
+    unittest.main()
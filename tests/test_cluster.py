@@ -0,0 +1,183 @@
+import unittest
+import sys
+import os
+import socket
+import subprocess
+import threading
+import time
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server import cluster
+from server.cluster import PeerMonitor, parse_node
+from client.controllers.network_manager import NetworkManager
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class FakeRooms:
+    def active_rooms(self):
+        return 1
+
+class FakeServer:
+    def __init__(self, connections, max_clients=10, port=5000):
+        self.port = port
+        self.clients = [None] * connections
+        self.max_clients = max_clients
+        self.room_manager = FakeRooms()
+        self.running = True
+
+    def is_full(self):
+        return len(self.clients) >= self.max_clients
+
+class TestPeerMonitor(unittest.TestCase):
+    def monitor(self, connections, peers):
+        monitor = PeerMonitor(FakeServer(connections), "127.0.0.1", [])
+        self.addCleanup(monitor.stop)
+        now = time.monotonic()
+        for port, conns, cpu, seen in peers:
+            monitor.loads[("127.0.0.1", port)] = {
+                "node": ["127.0.0.1", port], "connections": conns, "max": 10,
+                "rooms": 0, "cpu": cpu, "seen": now - seen}
+        return monitor
+
+    def test_parse_node(self):
+        self.assertEqual(parse_node("10.0.0.2:5001"), ("10.0.0.2", 5001))
+        self.assertEqual(parse_node(":5001"), ("127.0.0.1", 5001))
+
+    def test_least_loaded(self):
+        monitor = self.monitor(8, [(5001, 5, 0.1, 0), (5002, 2, 0.1, 0), (5003, 1, 0.95, 0)])
+        self.assertEqual(monitor.least_loaded(), ("127.0.0.1", 5002))
+
+    def test_ignores_full_and_silent_peers(self):
+        monitor = self.monitor(10, [(5001, 10, 0.0, 0), (5002, 0, 0.0, 10)])
+        self.assertIsNone(monitor.least_loaded())
+
+    def test_no_redirect_to_busier_peer(self):
+        monitor = self.monitor(2, [(5001, 5, 0.1, 0)])
+        self.assertIsNone(monitor.least_loaded())
+        monitor.server.clients = [None] * 10 # Full: any peer with room will do
+        self.assertEqual(monitor.least_loaded(), ("127.0.0.1", 5001))
+
+    def test_redirect_payload(self):
+        payload = protocol.pack_redirect("127.0.0.1", 5002)
+        self.assertEqual(protocol.unpack_redirect(memoryview(payload)), ("127.0.0.1", 5002))
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+@mock.patch.object(cluster, "REPORT_INTERVAL", 0.05)
+@mock.patch.object(cluster, "REPORT_TTL", 0.3)
+class TestPeerReports(unittest.TestCase):
+    # Two monitors exchanging load reports over real UDP sockets
+    def start(self, connections, port, peer_port):
+        monitor = PeerMonitor(FakeServer(connections, port=port), "127.0.0.1", [("127.0.0.1", peer_port)])
+        monitor.start()
+        self.addCleanup(self.stop, monitor)
+        return monitor
+
+    def stop(self, monitor):
+        monitor.server.running = False
+        monitor.stop()
+
+    def test_report_then_expiry(self):
+        full_port, idle_port = free_udp_port(), free_udp_port()
+        full = self.start(10, full_port, idle_port)
+        idle = self.start(2, idle_port, full_port)
+
+        self.assertTrue(wait_for(lambda: full.least_loaded() == ("127.0.0.1", idle_port)))
+        report = full.loads[("127.0.0.1", idle_port)]
+        self.assertEqual((report["connections"], report["max"], report["rooms"]), (2, 10, 1))
+        self.assertIsNone(idle.least_loaded()) # The full node takes no clients
+
+        self.stop(idle) # Silent from now on
+        self.assertTrue(wait_for(lambda: full.least_loaded() is None))
+
+def free_node_port():
+    # Free for TCP (game) and UDP (load reports) alike
+    while True:
+        with socket.socket() as tcp:
+            tcp.bind(('127.0.0.1', 0))
+            port = tcp.getsockname()[1]
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                try:
+                    udp.bind(('127.0.0.1', port))
+                except OSError:
+                    continue
+        return port
+
+class TestRedirectBetweenNodes(unittest.TestCase):
+    # Real server/main.py nodes sharing the load with --peers
+    def start_node(self, port, max_clients, peers):
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server", "main.py"), "--headless", "--lazy-dictionary",
+             "--port", str(port), "--max-clients", str(max_clients),
+             "--peers", ",".join(f"127.0.0.1:{peer}" for peer in peers)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.addCleanup(process.wait)
+        self.addCleanup(process.terminate)
+        self.assertTrue(wait_for(lambda: self.reachable(port), timeout=10.0), f"node {port} did not start")
+
+    def reachable(self, port):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1.0).close()
+            return True
+        except OSError:
+            return False
+
+    def first_frame(self, port, pseudo=None):
+        # (opcode, payload) of the first frame a new connection gets, after REQ_LOGIN if pseudo
+        sock = socket.create_connection(('127.0.0.1', port), timeout=2.0)
+        self.addCleanup(sock.close)
+        if pseudo:
+            sock.sendall(protocol.pack_message(protocol.REQ_LOGIN, pseudo))
+        decoder = protocol.FrameDecoder()
+        while decoder.recv_into(sock):
+            for opcode, payload in decoder.frames():
+                return opcode, bytes(payload)
+        return None, b''
+
+    def logs_in(self, port, pseudo, timeout):
+        # Retried: a node busy starting up may redirect even with free seats
+        deadline = time.monotonic() + timeout
+        while self.first_frame(port, pseudo) != (protocol.RESP_LOGIN, b'\x00'):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def redirects_to(self, port):
+        opcode, payload = self.first_frame(port)
+        return protocol.unpack_redirect(payload)[1] if opcode == protocol.REDIRECT else None
+
+    def test_client_is_redirected_to_least_loaded_peer(self):
+        full, busy, idle = ports = [free_node_port() for _ in range(3)]
+        for port, max_clients in ((full, 1), (busy, 2), (idle, 2)):
+            self.start_node(port, max_clients, [p for p in ports if p != port])
+        timeout = cluster.REPORT_INTERVAL * 5
+        self.assertTrue(self.logs_in(full, "Alice", timeout)) # full is now full
+        self.assertTrue(self.logs_in(busy, "Bob", timeout))   # busy is half full
+        # ERROR "Serveur plein", or a REDIRECT to busy, until full has the latest load reports
+        self.assertTrue(wait_for(lambda: self.redirects_to(full) == idle, timeout))
+
+        client = NetworkManager(port=full)
+        logged_in = threading.Event()
+        client.on_login_response = lambda ok: ok and logged_in.set()
+        self.assertTrue(client.connect())
+        self.addCleanup(client.disconnect)
+        client.login("Charlie")
+        self.assertTrue(logged_in.wait(5.0))
+        self.assertEqual((client.host, client.port), ('127.0.0.1', idle))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import dictionary
+from common.dictionary import Dictionary
+from server.models.game_state import GameState
+
+class TestDictionary(unittest.TestCase):
+    def setUp(self):
+        self.dictionary = Dictionary(["BONJOUR", "BOL", "BOLIDE", "TABLE", "BOL"])
+
+    def test_contains(self):
+        self.assertTrue(self.dictionary.contains("BOL"))
+        self.assertTrue(self.dictionary.contains("BOLIDE"))
+        self.assertFalse(self.dictionary.contains("BO"))
+        self.assertFalse(self.dictionary.contains("ZZZ"))
+        self.assertIn("TABLE", self.dictionary)
+
+    def test_has_prefix(self):
+        self.assertTrue(self.dictionary.has_prefix("B"))
+        self.assertTrue(self.dictionary.has_prefix("BOLI"))
+        self.assertTrue(self.dictionary.has_prefix("TABLE"))
+        self.assertFalse(self.dictionary.has_prefix("BOLX"))
+        self.assertFalse(self.dictionary.has_prefix("TABLES"))
+        self.assertFalse(self.dictionary.has_prefix("Z"))
+
+    def test_children(self):
+        self.assertEqual(self.dictionary.children("BO"), ["L", "N"])
+        self.assertEqual(self.dictionary.children("BOL"), ["I"])
+        self.assertEqual(self.dictionary.children("TABLE"), [])
+        self.assertEqual(self.dictionary.children("Z"), [])
+
+    def test_iterates_sorted_words(self):
+        self.assertEqual(list(self.dictionary), ["BOL", "BOLIDE", "BONJOUR", "TABLE"])
+
+    def test_deduplicated(self):
+        self.assertEqual(len(self.dictionary), 4)
+
+class TestDictionaryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.words_path = os.path.join(self.tmp.name, "words.txt")
+        self.cache_path = os.path.join(self.tmp.name, "words.bin")
+        with open(self.words_path, "w", encoding="utf-8") as f:
+            f.write("bol\nbolide\nétoile\ntable\nBol\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_and_map(self):
+        self.assertEqual(dictionary.build_cache(self.words_path, self.cache_path), 4)
+        mapped = dictionary.open_cache(self.cache_path, dictionary.file_digest(self.words_path))
+        self.assertEqual(list(mapped), ["BOL", "BOLIDE", "ETOILE", "TABLE"])
+        self.assertTrue(mapped.contains("ETOILE"))
+        self.assertTrue(mapped.has_prefix("BOLI"))
+        self.assertFalse(mapped.has_prefix("TAC"))
+        self.assertFalse(mapped.contains("A"))
+
+    def test_stale_cache_is_rebuilt(self):
+        dictionary.build_cache(self.words_path, self.cache_path)
+        with open(self.words_path, "a", encoding="utf-8") as f:
+            f.write("zebre\n")
+        self.assertIsNone(dictionary.open_cache(self.cache_path, dictionary.file_digest(self.words_path)))
+
+        loaded = dictionary.load_dictionary(self.words_path, self.cache_path)
+        self.assertTrue(loaded.contains("ZEBRE"))
+        self.assertIsNotNone(dictionary.open_cache(self.cache_path, dictionary.file_digest(self.words_path)))
+
+class TestSharedDictionary(unittest.TestCase):
+    def test_game_states_share_one_dictionary(self):
+        first = GameState()
+        second = GameState()
+        self.assertIs(first.dictionary, second.dictionary)
+        self.assertIs(first.dictionary, dictionary.get_dictionary())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import unittest.mock
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from common.dispatch import Dispatcher
+from server.profiler import SamplingProfiler, parse_opcode
+
+class Conn:
+    def __init__(self, pseudo="Alice"):
+        self.pseudo = pseudo
+        self.addr = ("127.0.0.1", 40000)
+        self.received = []
+
+    def handle_data(self, payload):
+        self.received.append(payload)
+
+    def handle_slow(self, payload):
+        time.sleep(0.05)
+
+class TestDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = Dispatcher({protocol.DATA: "handle_data"})
+
+    def test_dispatch(self):
+        conn = Conn()
+        self.assertTrue(self.dispatcher.dispatch(conn, protocol.DATA, b"x"))
+        self.assertFalse(self.dispatcher.dispatch(conn, protocol.PING, b""))
+        self.assertEqual(conn.received, [b"x"])
+
+    def test_middleware_order_and_removal(self):
+        calls = []
+
+        def outer(conn, opcode, payload, call_next):
+            calls.append("outer")
+            call_next(conn, opcode, payload + b"o")
+
+        def inner(conn, opcode, payload, call_next):
+            calls.append("inner")
+            call_next(conn, opcode, payload + b"i")
+
+        self.dispatcher.use(outer)
+        self.dispatcher.use(inner)
+        conn = Conn()
+        self.dispatcher.dispatch(conn, protocol.DATA, b"")
+        self.assertEqual(calls, ["outer", "inner"])
+        self.assertEqual(conn.received, [b"oi"])
+
+        self.dispatcher.remove(outer)
+        self.dispatcher.dispatch(conn, protocol.DATA, b"")
+        self.assertEqual(conn.received[-1], b"i")
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_samples_selected_handlers(self):
+        dispatcher = Dispatcher({protocol.DATA: "handle_data", protocol.REQ_JOIN: "handle_slow"})
+        profiler = SamplingProfiler(dispatcher, opcodes=[protocol.REQ_JOIN], clients=["Alice"])
+        profiler.start()
+        try:
+            dispatcher.dispatch(Conn("Alice"), protocol.REQ_JOIN, b"")
+            dispatcher.dispatch(Conn("Bob"), protocol.REQ_JOIN, b"")
+            dispatcher.dispatch(Conn("Alice"), protocol.DATA, b"")
+        finally:
+            profiler.stop()
+        self.assertEqual(dispatcher.middleware, ())
+        report = profiler.dump()
+        self.assertEqual(list(report["handlers"]), ["REQ_JOIN"])
+        self.assertEqual(report["handlers"]["REQ_JOIN"]["calls"], 1)
+        self.assertGreater(report["samples"], 0)
+        first = report["folded"].splitlines()[0]
+        self.assertTrue(first.startswith("REQ_JOIN;test_dispatch.py:handle_slow"), first)
+
+    def test_restores_switch_interval(self):
+        interval = sys.getswitchinterval()
+        dispatcher = Dispatcher({protocol.DATA: "handle_data"})
+        profiler = SamplingProfiler(dispatcher)
+        profiler.start()
+        self.assertLess(sys.getswitchinterval(), interval)
+        profiler.stop()
+        self.assertEqual(sys.getswitchinterval(), interval)
+        profiler.stop() # Idempotent
+        self.assertEqual(sys.getswitchinterval(), interval)
+
+    def test_stops_by_itself_after_duration(self):
+        interval = sys.getswitchinterval()
+        dispatcher = Dispatcher({protocol.DATA: "handle_data"})
+        profiler = SamplingProfiler(dispatcher, duration=0.05)
+        profiler.start()
+        profiler.thread.join(2)
+        self.assertFalse(profiler.thread.is_alive())
+        self.assertEqual(sys.getswitchinterval(), interval)
+        self.assertEqual(dispatcher.middleware, ())
+
+    def test_failed_start_restores_switch_interval(self):
+        interval = sys.getswitchinterval()
+        dispatcher = Dispatcher({protocol.DATA: "handle_data"})
+        profiler = SamplingProfiler(dispatcher)
+        with unittest.mock.patch.object(dispatcher, "use", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                profiler.start()
+        self.assertFalse(profiler.thread.is_alive())
+        self.assertEqual(sys.getswitchinterval(), interval)
+
+    def test_parse_opcode(self):
+        self.assertEqual(parse_opcode("data"), protocol.DATA)
+        self.assertEqual(parse_opcode("8"), 8)
+        with self.assertRaises(ValueError):
+            parse_opcode("NOPE")
+
+if __name__ == '__main__':
+    unittest.main()
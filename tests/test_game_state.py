@@ -0,0 +1,105 @@
+import unittest
+import types
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server.models.game_state import GameState
+from server.models.room_manager import Room
+from server.controllers.client_handler import BaseClientHandler
+from client.controllers.network_manager import NetworkManager
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.game = GameState()
+        self.game.add_player("Alice")
+        self.game.add_player("Bob")
+
+    def test_first_version_is_a_snapshot(self):
+        self.assertEqual(self.game.publish("", "Alice"), (1, None))
+
+    def test_only_changed_fields(self):
+        self.game.publish("", "Alice")
+        self.game.play_letter("B")
+        self.game.next_turn()
+        self.assertEqual(self.game.publish(self.game.frag, "Bob"), (2, {"frag": "B", "active": 1}))
+
+        self.game.punish_player("Bob")
+        self.assertEqual(self.game.publish(self.game.frag, "Bob"), (3, {"ghosts": {1: 1}}))
+
+    def test_players_change_requires_snapshot(self):
+        self.game.publish("", "Alice")
+        self.game.add_player("Charlie")
+        self.assertEqual(self.game.publish("", "Alice"), (2, None))
+
+class TestGameDelta(unittest.TestCase):
+    def test_roundtrip(self):
+        payload = protocol.pack_game_delta(7, frag="BO", active=1, ghosts={0: 2},
+                                           event=protocol.EVENT_WORD_COMPLETED, event_player=0)
+        self.assertEqual(protocol.unpack_game_delta(memoryview(payload)), {
+            "seq": 7, "frag": "BO", "active": 1, "ghosts": {0: 2},
+            "event": protocol.EVENT_WORD_COMPLETED, "event_player": 0})
+
+    def test_empty_delta(self):
+        payload = protocol.pack_game_delta(3)
+        self.assertEqual(len(payload), 7)
+        self.assertEqual(protocol.unpack_game_delta(payload),
+                         {"seq": 3, "event": protocol.EVENT_NONE, "event_player": protocol.NO_PLAYER})
+
+class TestClientDeltas(unittest.TestCase):
+    def setUp(self):
+        self.network = NetworkManager()
+        self.sent = []
+        self.received = []
+        self.network.send_request = lambda opcode, payload=b'': self.sent.append(opcode)
+        self.network.on_game_data = self.received.append
+        self.network.room_players = ["Alice", "Bob"]
+
+    def test_applies_deltas_in_sequence(self):
+        self.network.process_packet(protocol.GAME_STATE, protocol.pack_game_state(1, "", [0, 0], 0))
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(2, frag="B", active=1))
+        self.assertEqual(self.received[-1]["frag"], "B")
+        self.assertEqual(self.received[-1]["active_player"], "Bob")
+        self.assertEqual(self.sent, [])
+
+    def test_gap_requests_snapshot_once(self):
+        self.network.process_packet(protocol.GAME_STATE, protocol.pack_game_state(1, "", [0, 0], 0))
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(3, frag="BO"))
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(4, frag="BON"))
+        self.assertEqual(self.sent, [protocol.REQ_SNAPSHOT])
+        self.assertEqual(len(self.received), 1)
+
+        self.network.process_packet(protocol.GAME_STATE, protocol.pack_game_state(4, "BON", [0, 0], 1))
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(5, frag="BONJ"))
+        self.assertEqual(self.received[-1]["frag"], "BONJ")
+
+    def test_lost_snapshot_requested_again(self):
+        self.network.process_packet(protocol.GAME_STATE, protocol.pack_game_state(1, "", [0, 0], 0))
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(3, frag="BO"))
+        self.network.snapshot_deadline = 0 # No GAME_STATE within SNAPSHOT_RETRY
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(4, frag="BON"))
+        self.network.process_packet(protocol.GAME_DELTA, protocol.pack_game_delta(5, frag="BONJ"))
+        self.assertEqual(self.sent, [protocol.REQ_SNAPSHOT, protocol.REQ_SNAPSHOT])
+
+class KeyRecorder(BaseClientHandler):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 1), types.SimpleNamespace(send_queue_limit=4, slow_consumer_policy="drop"))
+        self.sent = []
+
+    def send_raw(self, data, key=None):
+        self.sent.append((data[4], key))
+
+class TestSnapshotReply(unittest.TestCase):
+    def test_snapshot_coalesces_with_game_states(self):
+        handler = KeyRecorder()
+        handler.caps = protocol.CAP_BINARY_STATE
+        handler.current_room = Room(1, "Table 1")
+        handler.current_room.game_state.publish("B", None)
+        handler.handle_snapshot()
+        self.assertEqual(handler.sent, [(protocol.GAME_STATE, "GAME_STATE")])
+
+if __name__ == '__main__':
+    unittest.main()
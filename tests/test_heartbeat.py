@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server.heartbeat import TimerWheel, Heartbeat, PING_INTERVAL, PONG_TIMEOUT
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeHandler:
+    def __init__(self):
+        self.pseudo = "p"
+        self.running = True
+        self.last_packet = time.time()
+        self.waiting_pong = False
+        self.pong_deadline = 0
+        self.sent = []
+        self.expired = False
+
+    def send_message(self, opcode, payload=b''):
+        self.sent.append(opcode)
+
+    def heartbeat_expired(self):
+        self.expired = True
+        self.running = False
+
+class TestTimerWheel(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.wheel = TimerWheel(resolution=1.0, slots=8, clock=self.clock)
+        self.fired = []
+
+    def test_fires_once_when_due(self):
+        self.wheel.schedule(3, self.fired.append, "a")
+        self.wheel.schedule(1, self.fired.append, "b")
+        self.clock.now += 1
+        self.assertEqual(self.wheel.advance(), 1)
+        self.assertEqual(self.fired, ["b"])
+        self.clock.now += 2
+        self.wheel.advance()
+        self.wheel.advance()
+        self.assertEqual(self.fired, ["b", "a"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_timer_beyond_one_turn_waits_its_round(self):
+        self.wheel.schedule(10, self.fired.append, "late") # Same slot as tick +2
+        self.clock.now += 2
+        self.wheel.advance()
+        self.assertEqual(self.fired, [])
+        self.clock.now += 8
+        self.wheel.advance()
+        self.assertEqual(self.fired, ["late"])
+
+    def test_long_stall_runs_everything_due(self):
+        for delay in range(1, 20):
+            self.wheel.schedule(delay, self.fired.append, delay)
+        self.clock.now += 30
+        self.assertEqual(self.wheel.advance(), 19)
+        self.assertEqual(sorted(self.fired), list(range(1, 20)))
+
+class TestHeartbeat(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.heartbeat = Heartbeat(TimerWheel(clock=self.clock))
+        self.handler = FakeHandler()
+        self.heartbeat.watch(self.handler)
+
+    def test_recent_traffic_skips_ping(self):
+        self.clock.now += PING_INTERVAL
+        self.handler.last_packet = time.time() - 10
+        self.heartbeat.advance()
+        self.assertEqual(self.handler.sent, [])
+        self.assertEqual(len(self.heartbeat.wheel), 1)
+
+    def test_idle_connection_is_pinged_then_dropped(self):
+        self.clock.now += PING_INTERVAL
+        self.handler.last_packet = time.time() - PING_INTERVAL
+        self.heartbeat.advance()
+        self.assertEqual(self.handler.sent, [protocol.PING])
+        self.assertTrue(self.handler.waiting_pong)
+
+        self.handler.pong_deadline = time.time() # Deadline reached without PONG
+        self.clock.now += PONG_TIMEOUT
+        self.heartbeat.advance()
+        self.assertTrue(self.handler.expired)
+        self.assertEqual(len(self.heartbeat.wheel), 0)
+
+    def test_closed_connection_drops_its_timer(self):
+        self.handler.running = False
+        self.clock.now += PING_INTERVAL
+        self.heartbeat.advance()
+        self.assertEqual(self.handler.sent, [])
+        self.assertEqual(len(self.heartbeat.wheel), 0)
+
+if __name__ == '__main__':
+    unittest.main()
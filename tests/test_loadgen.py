@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from common.dictionary import Dictionary
+from client.loadgen import Bot, Stats
+
+class TestBot(unittest.TestCase):
+    def setUp(self):
+        args = argparse.Namespace(prefix="bot")
+        self.bot = Bot(0, args, Stats(), Dictionary(["CHAT", "CHATON", "CHIEN"]))
+
+    def test_letters_keep_a_word_prefix(self):
+        self.bot.frag = "CH"
+        for _ in range(20):
+            self.assertIn(self.bot.choose_letter(), ("A", "I"))
+
+    def test_avoids_completing_a_word(self):
+        self.bot.frag = "CHA"
+        self.assertEqual(self.bot.choose_letter(), "T") # Only way on, even if it ends a word
+        self.bot.frag = "CHATO"
+        self.assertEqual(self.bot.choose_letter(), "N")
+
+    def test_gap_requests_snapshot_once(self):
+        sent = []
+        self.bot.send = lambda opcode, payload=b'': sent.append(opcode)
+        self.bot.on_frame(protocol.GAME_STATE, protocol.pack_game_state(1, "", [0, 0], 0))
+        for seq in (3, 4, 5):
+            self.bot.on_frame(protocol.GAME_DELTA, protocol.pack_game_delta(seq, frag="B"))
+        self.assertEqual(sent, [protocol.REQ_SNAPSHOT])
+        self.assertEqual(self.bot.stats.snapshots, 1)
+
+        self.bot.on_frame(protocol.GAME_STATE, protocol.pack_game_state(5, "BO", [0, 0], 1))
+        self.assertFalse(self.bot.awaiting_snapshot)
+        self.bot.on_frame(protocol.GAME_DELTA, protocol.pack_game_delta(7, frag="BOL"))
+        self.assertEqual(sent, [protocol.REQ_SNAPSHOT, protocol.REQ_SNAPSHOT])
+
+    def test_report_percentiles(self):
+        stats = Stats()
+        stats.sessions = stats.completed = 1
+        for ms in range(1, 101):
+            stats.record("play", ms / 1000)
+        stats.error("timeout (play)")
+        report = stats.report(10.0)
+        self.assertEqual(report["operations"]["play"]["p50_ms"], 51.0)
+        self.assertEqual(report["operations"]["play"]["p99_ms"], 100.0)
+        self.assertEqual(report["requests_per_second"], 10.0)
+        self.assertAlmostEqual(report["error_rate"], 1 / 101, places=4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server.controllers.client_handler import BaseClientHandler
+from server.main import GhostServer
+from server.models.matchmaker import Matchmaker
+from server.models.room_manager import RoomManager
+
+class FakeHandler:
+    def __init__(self, pseudo):
+        self.pseudo = pseudo
+        self.caps = 0
+        self.running = True
+        self.current_room = None
+        self.entered = None
+
+    def enter_room(self, room):
+        self.entered = room
+
+class TestMatchmaker(unittest.TestCase):
+    def setUp(self):
+        self.rooms = RoomManager(min_rooms=1, max_rooms=2)
+        self.matchmaker = Matchmaker(self.rooms)
+
+    def test_tick_seats_queue_in_order(self):
+        players = [FakeHandler(f"p{i}") for i in range(3)]
+        for p in players:
+            self.assertTrue(self.matchmaker.enqueue(p))
+        self.assertFalse(self.matchmaker.enqueue(players[0]))
+
+        self.assertEqual(self.matchmaker.tick(), 3)
+        self.assertEqual([p.entered.id for p in players], [1, 1, 2])
+        self.assertTrue(all(p.current_room is p.entered for p in players))
+        self.assertEqual(len(self.matchmaker), 0)
+
+    def test_full_server_keeps_players_queued(self):
+        players = [FakeHandler(f"p{i}") for i in range(5)]
+        for p in players:
+            self.matchmaker.enqueue(p)
+        self.assertEqual(self.matchmaker.tick(), 4)
+        self.assertIsNone(players[4].entered)
+        self.assertEqual(len(self.matchmaker), 1)
+
+        self.rooms.leave(players[0].current_room, players[0])
+        self.assertEqual(self.matchmaker.tick(), 1)
+        self.assertEqual(players[4].entered.id, 1)
+
+    def test_cancelled_and_disconnected_players_skipped(self):
+        gone, cancelled, ok = FakeHandler("gone"), FakeHandler("cancelled"), FakeHandler("ok")
+        for p in (gone, cancelled, ok):
+            self.matchmaker.enqueue(p)
+        gone.running = False
+        self.assertTrue(self.matchmaker.cancel(cancelled))
+        self.assertEqual(self.matchmaker.tick(), 1)
+        self.assertIsNone(gone.entered)
+        self.assertIsNone(cancelled.entered)
+        self.assertEqual(self.rooms.get_room(1).clients, [ok])
+
+    def test_metrics(self):
+        self.matchmaker.record_join(True)
+        self.matchmaker.record_join(False)
+        player = FakeHandler("p")
+        self.matchmaker.enqueue(player)
+        self.matchmaker.tick(now=self.matchmaker.queue[player] + 1.5)
+        metrics = self.matchmaker.metrics()
+        self.assertEqual(metrics["matched"], 1)
+        self.assertEqual(metrics["join_failure_rate"], 0.5)
+        self.assertAlmostEqual(metrics["time_to_game_avg"], 1.5)
+        self.assertAlmostEqual(metrics["time_to_game_p95"], 1.5)
+
+class RecordingHandler(BaseClientHandler):
+    def __init__(self, server, pseudo, disconnect_before_enter=False):
+        super().__init__(("127.0.0.1", len(pseudo)), server)
+        self.frames = []
+        self.disconnect_before_enter = disconnect_before_enter
+        server.register_client(self, pseudo)
+
+    def send_raw(self, data, key=None):
+        self.frames.append(data)
+
+    def close(self):
+        pass
+
+    def enter_room(self, room):
+        if self.disconnect_before_enter:
+            self.disconnect() # Between the matchmaker tick seating it and enter_room
+        super().enter_room(room)
+
+class TestSeatingRace(unittest.TestCase):
+    def test_disconnect_between_seating_and_entering(self):
+        server = GhostServer(port=0)
+        self.addCleanup(server.server_socket.close)
+        alice = RecordingHandler(server, "Alice")
+        server.matchmaker.enqueue(alice)
+        server.matchmaker.tick()
+        room = alice.current_room
+        alice.frames.clear()
+
+        bob = RecordingHandler(server, "Bob", disconnect_before_enter=True)
+        server.matchmaker.enqueue(bob)
+        self.assertEqual(server.matchmaker.tick(), 1)
+        self.assertIsNone(bob.current_room)
+        self.assertEqual(room.clients, [alice])
+        opcodes = [frame[4] for frame in alice.frames]
+        self.assertNotIn(protocol.NOTIFY, opcodes) # No JOIN of a player already gone
+        self.assertEqual(bob.frames, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server import metrics
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_by_label(self):
+        counter = self.registry.counter("packets_total", "Frames", "opcode")
+        counter.inc(value="DATA")
+        counter.inc(2, "DATA")
+        counter.inc(value="PONG")
+        text = self.registry.render()
+        self.assertIn("# TYPE packets_total counter", text)
+        self.assertIn('packets_total{opcode="DATA"} 3', text)
+        self.assertIn('packets_total{opcode="PONG"} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=(0.001, 0.01))
+        for value in (0.0005, 0.005, 0.005, 1.0):
+            histogram.observe(value)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.001"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="0.01"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("latency_seconds_count 4", text)
+        self.assertIn("latency_seconds_sum 1.010500", text)
+
+    def test_gauge_is_read_when_rendered(self):
+        depth = {"total": 0}
+        self.registry.gauge("queue_frames", "Queued", lambda: dict(depth), "stat")
+        depth["total"] = 7
+        self.assertIn('queue_frames{stat="total"} 7', self.registry.render())
+
+    def test_opcode_names(self):
+        self.assertEqual(metrics.opcode_name(protocol.REQ_JOIN), "REQ_JOIN")
+        self.assertEqual(metrics.opcode_name(0x42), "0x42")
+
+if __name__ == '__main__':
+    unittest.main()
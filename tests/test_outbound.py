@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.controllers.outbound import OutboundQueue
+
+class TestOutboundQueue(unittest.TestCase):
+    def test_fifo_until_high_water(self):
+        queue = OutboundQueue(high_water=3)
+        for frame in (b"a", b"b", b"c"):
+            self.assertTrue(queue.push(frame))
+        self.assertEqual(queue.pop_all(block=False), [b"a", b"b", b"c"])
+        self.assertEqual(queue.pop_all(block=False), [])
+
+    def test_drop_policy(self):
+        queue = OutboundQueue(high_water=2, policy="drop")
+        for frame in (b"a", b"b", b"c"):
+            self.assertTrue(queue.push(frame))
+        self.assertEqual(queue.pop_all(block=False), [b"a", b"b"])
+        self.assertEqual(queue.dropped, 1)
+
+    def test_coalesce_policy_replaces_keyed_frame(self):
+        queue = OutboundQueue(high_water=2, policy="coalesce")
+        queue.push(b"state1", key="GAME_STATE")
+        queue.push(b"chat")
+        queue.push(b"state2", key="GAME_STATE")
+        queue.push(b"chat2")
+        self.assertEqual(queue.pop_all(block=False), [b"state2", b"chat"])
+        self.assertEqual((queue.coalesced, queue.dropped), (1, 1))
+
+    def test_disconnect_policy(self):
+        queue = OutboundQueue(high_water=1, policy="disconnect")
+        self.assertTrue(queue.push(b"a"))
+        self.assertFalse(queue.push(b"b"))
+
+    def test_closed_queue_drains_then_ends(self):
+        queue = OutboundQueue()
+        queue.push(b"a")
+        queue.close()
+        self.assertEqual(queue.pop_all(), [b"a"])
+        self.assertIsNone(queue.pop_all())
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            OutboundQueue(policy="block")
+
+if __name__ == '__main__':
+    unittest.main()
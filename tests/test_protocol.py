@@ -66,5 +66,134 @@ class TestProtocol(unittest.TestCase):
         decoded = json.loads(res_payload.decode('utf-8'))
         self.assertEqual(decoded, payload)
 
+    def test_room_list_roundtrip(self):
+        rooms = [(1, "Table 1", 2, 2), (7, "Sälle", 0, 4)]
+        self.assertEqual(protocol.unpack_room_list(protocol.pack_room_list(rooms)), rooms)
+
+class TestGameState(unittest.TestCase):
+    def test_roundtrip(self):
+        payload = protocol.pack_game_state(9, "BONJ", [0, 2, 5], active=1,
+                                           event=protocol.EVENT_INVALID_LETTER, event_player=0)
+        self.assertEqual(len(payload), 8 + 3 + 1 + 4)
+        state = protocol.unpack_game_state(memoryview(payload))
+        self.assertEqual(state, {"seq": 9, "frag": "BONJ", "ghosts": [0, 2, 5], "active": 1,
+                                 "event": protocol.EVENT_INVALID_LETTER, "event_player": 0})
+
+    def test_waiting_state(self):
+        state = protocol.unpack_game_state(protocol.pack_game_state(1, "", [0]))
+        self.assertEqual(state["active"], protocol.NO_PLAYER)
+        self.assertEqual(state["event"], protocol.EVENT_NONE)
+        self.assertEqual(state["frag"], "")
+
+class TestFrameDecoder(unittest.TestCase):
+    def test_frames_split_across_chunks(self):
+        stream = protocol.pack_message(protocol.REQ_LOGIN, b"Alice") + protocol.pack_message(protocol.PING)
+        decoder = protocol.FrameDecoder()
+        frames = []
+        for i in range(len(stream)):
+            decoder.feed(stream[i:i + 1])
+            frames.extend((op, bytes(p)) for op, p in decoder.frames())
+        self.assertEqual(frames, [(protocol.REQ_LOGIN, b"Alice"), (protocol.PING, b"")])
+        self.assertEqual(decoder.pending(), b"")
+
+    def test_several_frames_in_one_chunk(self):
+        decoder = protocol.FrameDecoder()
+        decoder.feed(b"".join(protocol.pack_message(protocol.DATA, str(i)) for i in range(3)) + b"\x00\x00")
+        frames = [(op, bytes(p)) for op, p in decoder.frames()]
+        self.assertEqual(frames, [(protocol.DATA, b"0"), (protocol.DATA, b"1"), (protocol.DATA, b"2")])
+        self.assertEqual(decoder.pending(), b"\x00\x00")
+
+    def test_payload_is_memoryview(self):
+        decoder = protocol.FrameDecoder()
+        decoder.feed(protocol.pack_message(protocol.DATA, b"abc"))
+        op, payload = next(decoder.frames())
+        self.assertIsInstance(payload, memoryview)
+        self.assertEqual(str(payload, 'utf-8'), "abc")
+
+    def test_frame_larger_than_buffer(self):
+        big = bytes(range(256)) * 100
+        decoder = protocol.FrameDecoder(buffer_size=16)
+        stream = protocol.pack_message(protocol.DATA, big)
+        for i in range(0, len(stream), 1000):
+            decoder.feed(stream[i:i + 1000])
+        op, payload = next(decoder.frames())
+        self.assertEqual(bytes(payload), big)
+
+    def test_frame_split_across_compaction(self):
+        decoder = protocol.FrameDecoder(buffer_size=64)
+        first = protocol.pack_message(protocol.DATA, b"x" * 35)
+        second = protocol.pack_message(protocol.DATA, bytes(range(20)))
+        decoder.feed(first + second[:8])
+        self.assertEqual([bytes(p) for _, p in decoder.frames()], [b"x" * 35])
+        buffer = decoder.buffer
+        # The rest does not fit after the unconsumed bytes: they move to the front
+        decoder.feed(second[8:])
+        self.assertIs(decoder.buffer, buffer)
+        self.assertEqual(decoder.start, 0)
+        self.assertEqual([bytes(p) for _, p in decoder.frames()], [bytes(range(20))])
+        self.assertEqual(decoder.pending(), b"")
+
+    def test_recv_into_socket(self):
+        import socket
+        a, b = socket.socketpair()
+        try:
+            a.sendall(protocol.pack_message(protocol.NOTIFY, b"\x00Bob") * 2)
+            decoder = protocol.FrameDecoder()
+            frames = []
+            while len(frames) < 2:
+                self.assertTrue(decoder.recv_into(b))
+                frames.extend((op, bytes(p)) for op, p in decoder.frames())
+            self.assertEqual(frames, [(protocol.NOTIFY, b"\x00Bob")] * 2)
+        finally:
+            a.close()
+            b.close()
+
+    def test_rejects_oversized_frame(self):
+        decoder = protocol.FrameDecoder(max_frame_size=10)
+        decoder.feed(struct.pack('!I', 11) + b"\x08")
+        with self.assertRaises(ValueError):
+            list(decoder.frames())
+
+    def test_oversized_header_does_not_grow_buffer(self):
+        decoder = protocol.FrameDecoder(buffer_size=16, max_frame_size=1024)
+        decoder.feed(struct.pack('!I', 1 << 30) + b"\x08")
+        with self.assertRaises(ValueError):
+            decoder.get_buffer()
+        self.assertEqual(len(decoder.buffer), 16)
+
+class TestCompression(unittest.TestCase):
+    def frame(self, n):
+        data = {"type": "BROADCAST", "sender": "ADMIN", "message": f"Annonce numero {n} " * 20}
+        return protocol.pack_message(protocol.DATA, data)
+
+    def test_small_frames_unchanged(self):
+        frame = protocol.pack_message(protocol.PING)
+        self.assertIs(protocol.FrameCompressor().compress(frame), frame)
+
+    def test_stream_roundtrip(self):
+        compressor = protocol.FrameCompressor()
+        decompressor = protocol.FrameDecompressor()
+        decoder = protocol.FrameDecoder()
+        sizes = []
+        for n in range(3):
+            packed = compressor.compress(self.frame(n))
+            sizes.append(len(packed))
+            decoder.feed(packed)
+        flags = []
+        for n, (opcode, payload) in enumerate(decoder.frames()):
+            self.assertEqual(opcode, protocol.COMPRESSED)
+            flags.append(payload[0])
+            self.assertEqual(decompressor.decompress(payload), (protocol.DATA, self.frame(n)[5:]))
+        self.assertEqual(flags, [protocol.COMPRESS_RESET, 0, 0])
+        # Later frames reuse the stream history
+        self.assertLess(sizes[1], sizes[0])
+
+    def test_stream_must_start_with_reset(self):
+        compressor = protocol.FrameCompressor()
+        compressor.compress(self.frame(0))
+        packed = compressor.compress(self.frame(1))
+        with self.assertRaises(ValueError):
+            protocol.FrameDecompressor().decompress(packed[5:])
+
 if __name__ == '__main__':
     unittest.main()
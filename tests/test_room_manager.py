@@ -0,0 +1,127 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server.models.room_manager import RoomManager
+from server.models.lobby import Lobby
+
+class FakeClient:
+    def __init__(self, pseudo):
+        self.pseudo = pseudo
+        self.caps = 0
+        self.sent = []
+
+    def send_raw(self, data, key=None):
+        self.sent.append(data)
+
+class TestRoomManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = RoomManager(min_rooms=2, max_rooms=4, idle_timeout=60)
+
+    def test_initial_rooms(self):
+        self.assertEqual([r["id"] for r in self.manager.list_rooms()], [1, 2])
+        self.assertEqual(self.manager.get_room(1).max_players, 2)
+
+    def test_room_opened_when_last_seat_taken(self):
+        for i in range(4):
+            self.assertIsNotNone(self.manager.join_any(FakeClient(f"p{i}")))
+        self.assertEqual(len(self.manager.rooms), 3)
+        self.assertEqual(self.manager.find_free_room().id, 3)
+
+    def test_join_any_fills_rooms_first(self):
+        room = self.manager.join_any(FakeClient("a"))
+        self.assertIs(self.manager.join_any(FakeClient("b")), room)
+
+    def test_max_rooms(self):
+        for i in range(8):
+            self.assertIsNotNone(self.manager.join_any(FakeClient(f"p{i}")))
+        self.assertIsNone(self.manager.join_any(FakeClient("late")))
+        self.assertFalse(self.manager.join(self.manager.get_room(1), FakeClient("late")))
+
+    def test_idle_rooms_closed_and_recycled(self):
+        clients = [FakeClient(f"p{i}") for i in range(4)]
+        for c in clients:
+            self.manager.join_any(c)
+        room = self.manager.get_room(3)
+        for c in clients[:2]:
+            self.manager.leave(self.manager.get_room(1), c)
+
+        now = room.empty_since
+        self.assertEqual(self.manager.collect_idle(now + 30), 0)
+        self.assertEqual(self.manager.collect_idle(now + 61), 1)
+        self.assertIsNone(self.manager.get_room(3))
+        self.assertEqual(len(self.manager.rooms), 2) # Never below min_rooms
+
+        self.assertIs(self.manager.create_room(max_players=4), room)
+        self.assertEqual((room.id, room.name, room.max_players), (4, "Table 4", 4))
+
+    def test_empty_room_starts_a_new_game(self):
+        room = self.manager.get_room(1)
+        alice = FakeClient("Alice")
+        self.manager.join(room, alice)
+        room.game_state.frag = "BON"
+        self.manager.leave(room, alice)
+        self.assertEqual(room.game_state.frag, "")
+
+    def test_worker_ids(self):
+        manager = RoomManager(min_rooms=3, first_id=2, id_step=4)
+        self.assertEqual(sorted(manager.rooms), [2, 6, 10])
+
+class TestRoomList(unittest.TestCase):
+    def setUp(self):
+        self.manager = RoomManager(min_rooms=2, max_rooms=4)
+        self.manager.pop_changes()
+
+    def test_frame_cached_until_change(self):
+        frame = self.manager.room_list_frame()
+        self.assertIs(self.manager.room_list_frame(), frame)
+        self.assertEqual(frame[4], protocol.ROOM_LIST)
+        self.assertEqual(frame[5:], b'\x00\x00\x00\x02'
+                         b'\x00\x00\x00\x01\x07Table 1\x00\x02'
+                         b'\x00\x00\x00\x02\x07Table 2\x00\x02')
+
+        self.manager.join(self.manager.get_room(1), FakeClient("a"))
+        self.assertIsNot(self.manager.room_list_frame(), frame)
+
+    def test_changes(self):
+        version = self.manager.version
+        a, b = FakeClient("a"), FakeClient("b")
+        self.manager.join(self.manager.get_room(1), a)
+        self.manager.join(self.manager.get_room(1), b)
+        self.manager.join(self.manager.get_room(2), FakeClient("c"))
+        self.manager.leave(self.manager.get_room(1), a)
+        new_version, changes = self.manager.pop_changes()
+        self.assertEqual(new_version, version + 4)
+        self.assertEqual(changes, [(1, "Table 1", 1, 2), (2, "Table 2", 1, 2)])
+        self.assertEqual(self.manager.pop_changes(), (new_version, []))
+
+    def test_closed_room(self):
+        room = self.manager.create_room()
+        self.manager.pop_changes()
+        self.manager.close_room(room)
+        self.assertEqual(self.manager.pop_changes()[1], [(3, "", 0, 0)])
+
+    def test_lobby_publish(self):
+        lobby = Lobby(self.manager)
+        watcher = FakeClient("w")
+        lobby.subscribe(watcher)
+        self.assertEqual(watcher.sent, [self.manager.room_list_frame()])
+        self.assertEqual(lobby.publish(), 0)
+
+        self.manager.join(self.manager.get_room(2), FakeClient("a"))
+        self.assertEqual(lobby.publish(), 1)
+        opcode, payload = protocol.parse_packet(watcher.sent[-1][4:])
+        self.assertEqual(opcode, protocol.ROOM_UPDATE)
+        self.assertEqual(protocol.unpack_room_update(payload), (self.manager.version, [(2, "Table 2", 1, 2)]))
+
+        lobby.unsubscribe(watcher)
+        self.manager.join(self.manager.get_room(2), FakeClient("b"))
+        self.assertEqual(lobby.publish(), 0)
+        self.assertEqual(len(watcher.sent), 2)
+
+if __name__ == '__main__':
+    unittest.main()
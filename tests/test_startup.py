@@ -0,0 +1,25 @@
+import unittest
+import subprocess
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Run in a fresh interpreter: other tests already imported these modules
+CHECK = """
+import sys
+sys.path.append(%r)
+import server.main
+from common import dictionary
+server.main.GhostServer(port=0)
+loaded = [name for name in ("flet", "server.views.admin_dashboard", "http.server", "subprocess") if name in sys.modules]
+print(loaded, dictionary._shared is not None, file=sys.stderr) # Logs go to stdout
+""" % ROOT
+
+class TestStartup(unittest.TestCase):
+    def test_server_import_is_headless_and_lazy(self):
+        output = subprocess.run([sys.executable, "-c", CHECK], capture_output=True, text=True, check=True).stderr
+        self.assertEqual(output.strip().splitlines()[-1], "[] False")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import logging
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import utils
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("TestEventLog")
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def test_disabled_level_is_not_formatted(self):
+        self.logger.setLevel(logging.INFO)
+        log = utils.EventLog(self.logger, "broadcast")
+        log(room="Table 1")
+        self.assertEqual(self.handler.messages, [])
+        self.assertEqual(log.count, 0)
+
+    def test_fields(self):
+        self.logger.setLevel(logging.DEBUG)
+        utils.EventLog(self.logger, "broadcast")(room="Table 1", seq=3)
+        self.assertEqual(self.handler.messages, ["broadcast room='Table 1' seq=3"])
+
+    def test_sampling(self):
+        self.logger.setLevel(logging.DEBUG)
+        log = utils.EventLog(self.logger, "state", every=3)
+        for seq in range(7):
+            log(seq=seq)
+        self.assertEqual(self.handler.messages, ["state seq=2 (2 skipped)", "state seq=5 (2 skipped)"])
+
+class TestSetupLogger(unittest.TestCase):
+    def test_shared_queue_handler(self):
+        a = utils.setup_logger("TestSetupA")
+        b = utils.setup_logger("TestSetupB")
+        self.assertIs(a.handlers[0], b.handlers[0])
+        self.assertIsInstance(a.handlers[0], logging.handlers.QueueHandler)
+        self.assertEqual(len(utils.setup_logger("TestSetupA").handlers), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+import socket
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import protocol
+from server.controllers.async_client_handler import AsyncServerCore
+from server.controllers.client_handler import ClientHandler
+from server.main import GhostServer
+from server.workers import HandoffChannel
+
+def read_until(sock, last_opcode):
+    # Opcodes the server sent on sock, up to last_opcode
+    sock.settimeout(2.0)
+    decoder = protocol.FrameDecoder()
+    opcodes = []
+    while last_opcode not in opcodes:
+        if not decoder.recv_into(sock):
+            break
+        opcodes.extend(opcode for opcode, _ in decoder.frames())
+    return opcodes
+
+def start_async_core(test, server):
+    # Runs server's event loop on an ephemeral port until the test ends
+    server.server_socket.bind(("127.0.0.1", 0))
+    server.server_socket.listen()
+    server.async_core = AsyncServerCore(server, server.server_socket)
+    threading.Thread(target=server.async_core.run, daemon=True).start()
+    test.assertTrue(server.async_core.ready.wait(2.0))
+    test.addCleanup(setattr, server, "running", False)
+    return server.server_socket.getsockname()[1]
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def join_state(pseudo="Alice", pending=b''):
+    return {"pseudo": pseudo, "addr": ["127.0.0.1", 40000], "caps": 0, "join": 1, "pending": pending.hex()}
+
+def claim(test, server, pseudo):
+    # Another client of this worker logged in as pseudo
+    other, peer = socket.socketpair()
+    test.addCleanup(other.close)
+    test.addCleanup(peer.close)
+    handler = ClientHandler(peer, ("127.0.0.1", 40001), server)
+    return server.register_client(handler, pseudo)
+
+class TestAdoptConnection(unittest.TestCase):
+    def setUp(self):
+        self.server = GhostServer(port=0)
+        self.addCleanup(self.server.server_socket.close)
+        self.client, self.sock = socket.socketpair()
+        self.addCleanup(self.client.close)
+
+    def adopt(self, pending=b''):
+        self.server.adopt_connection(self.sock, join_state(pending=pending))
+        handler = self.server.find_client("Alice")
+        self.addCleanup(handler.disconnect)
+        return handler
+
+    def test_pending_frames_are_replayed(self):
+        # REQ_LIST_ROOMS pipelined after the REQ_JOIN that triggered the handoff
+        handler = self.adopt(protocol.pack_message(protocol.REQ_LIST_ROOMS))
+        self.assertEqual(handler.current_room.id, 1)
+        opcodes = read_until(self.client, protocol.ROOM_LIST)
+        self.assertEqual(opcodes[0], protocol.RESP_ROOM)
+        self.assertIn(protocol.ROOM_LIST, opcodes)
+
+    def test_pseudo_taken_in_this_worker_is_refused(self):
+        self.assertTrue(claim(self, self.server, "Alice"))
+        self.server.adopt_connection(self.sock, join_state())
+        self.assertEqual(read_until(self.client, protocol.ERROR), [protocol.ERROR])
+        self.assertEqual(self.client.recv(1), b"") # Closed, not joined
+        self.assertEqual(self.server.find_client("Alice").addr, ("127.0.0.1", 40001))
+        self.assertFalse(self.server.room_manager.get_room(1).clients)
+
+class TestAsyncAdoptConnection(unittest.TestCase):
+    def setUp(self):
+        self.server = GhostServer(mode="async", port=0)
+        self.addCleanup(self.server.server_socket.close)
+        start_async_core(self, self.server)
+        self.client, self.sock = socket.socketpair()
+        self.addCleanup(self.client.close)
+
+    def test_pending_frames_are_replayed(self):
+        self.server.adopt_connection(self.sock, join_state(pending=protocol.pack_message(protocol.REQ_LIST_ROOMS)))
+        opcodes = read_until(self.client, protocol.ROOM_LIST)
+        self.assertEqual(opcodes[0], protocol.RESP_ROOM)
+        self.assertIn(protocol.ROOM_LIST, opcodes)
+        handler = self.server.find_client("Alice")
+        self.assertEqual(handler.current_room.id, 1)
+        handler.disconnect()
+
+    def test_pseudo_taken_in_this_worker_is_refused(self):
+        self.assertTrue(claim(self, self.server, "Alice"))
+        self.server.adopt_connection(self.sock, join_state())
+        self.assertEqual(read_until(self.client, protocol.ERROR), [protocol.ERROR])
+        self.assertEqual(self.client.recv(1), b"")
+        self.assertEqual(self.server.find_client("Alice").addr, ("127.0.0.1", 40001))
+
+    def test_flush_writes_queued_frames_first(self):
+        self.server.adopt_connection(self.sock, join_state())
+        self.assertTrue(wait_for(lambda: self.server.find_client("Alice") is not None))
+        handler = self.server.find_client("Alice")
+        self.addCleanup(handler.disconnect)
+        read_until(self.client, protocol.RESP_ROOM)
+        flushed = threading.Event()
+
+        def queue_and_flush():
+            handler.pause_writing() # As if the transport buffer were full: frames are queued
+            handler.send_message(protocol.NOTIFY, b"\x00Bob")
+            handler.flush(lambda: flushed.set() if not handler.outbound and not handler.transport.get_write_buffer_size() else None)
+        handler.core.loop.call_soon_threadsafe(queue_and_flush)
+        self.assertTrue(flushed.wait(2.0))
+        self.assertEqual(read_until(self.client, protocol.NOTIFY), [protocol.NOTIFY])
+
+class TestSharding(unittest.TestCase):
+    """
+    --workers shards the rooms and the pseudo claims: each worker lists only
+    the rooms it owns, and a pseudo is only unique within one worker.
+    """
+    def setUp(self):
+        self.workers = [GhostServer(worker_index=i, worker_count=2, port=0) for i in range(2)]
+        for server in self.workers:
+            self.addCleanup(server.server_socket.close)
+
+    def test_each_worker_lists_its_own_rooms(self):
+        for index, server in enumerate(self.workers):
+            ids = [room["id"] for room in server.room_manager.list_rooms()]
+            self.assertEqual(ids, [index + 1, index + 3, index + 5])
+            self.assertTrue(all(server.owns_room(room_id) for room_id in ids))
+            self.assertFalse(any(server.owns_room(room_id + 1) for room_id in ids))
+            listed = protocol.unpack_room_list(server.room_manager.room_list_frame()[protocol.HEADER_SIZE + 1:])
+            self.assertEqual([room[0] for room in listed], ids)
+
+    def test_pseudo_claims_are_per_worker(self):
+        self.assertTrue(claim(self, self.workers[0], "Alice"))
+        self.assertTrue(claim(self, self.workers[1], "Alice"))
+        self.assertFalse(claim(self, self.workers[0], "Alice"))
+
+class TestHandoff(unittest.TestCase):
+    def test_socket_and_state_reach_the_owner(self):
+        channel = HandoffChannel(2)
+        for sock in channel.inboxes + channel.outboxes:
+            self.addCleanup(sock.close)
+        channel.index = 1 # Both workers live in this process
+        source = GhostServer(worker_index=0, worker_count=2, handoff=channel, port=0)
+        owner = GhostServer(worker_index=1, worker_count=2, handoff=channel, port=0)
+        for server in (source, owner):
+            self.addCleanup(server.server_socket.close)
+        threading.Thread(target=channel.receive_loop, args=(owner,), daemon=True).start()
+
+        client, sock = socket.socketpair()
+        self.addCleanup(client.close)
+        handler = ClientHandler(sock, ("127.0.0.1", 40000), source)
+        source.register_client(handler, "Alice")
+        handler.caps = protocol.CAP_BINARY_STATE
+        # Received along with the REQ_JOIN, not handled yet
+        handler.decoder.feed(protocol.pack_message(protocol.REQ_LIST_ROOMS))
+
+        source.hand_off(handler, (2).to_bytes(4, 'big')) # Room 2 belongs to worker 1
+        self.assertIsNone(source.find_client("Alice"))
+        handler.disconnect() # As the reader loop does when it ends: no-op
+
+        deadline = time.monotonic() + 2.0
+        while owner.find_client("Alice") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        adopted = owner.find_client("Alice")
+        self.assertIsNotNone(adopted)
+        self.addCleanup(adopted.disconnect)
+        self.assertEqual(adopted.addr, ("127.0.0.1", 40000))
+        self.assertEqual(adopted.caps, protocol.CAP_BINARY_STATE)
+        self.assertEqual(adopted.current_room.id, 2)
+        # Replies come from the owner through the passed socket
+        opcodes = read_until(client, protocol.ROOM_LIST)
+        self.assertEqual(opcodes[0], protocol.RESP_ROOM)
+        self.assertIn(protocol.ROOM_LIST, opcodes)
+
+if __name__ == '__main__':
+    unittest.main()